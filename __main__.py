@@ -1,3 +1,4 @@
+import sys
 from src import main
 if __name__ == '__main__':
-    main.main()
+    sys.exit(main.main())
@@ -1,44 +1,254 @@
-from .my_algorithms import my_range
+from __future__ import division
+from .my_algorithms import my_range, fast_gcd, my_abs
+from array import array
+import sys
 
+# Python 3 merged long into int.
+if sys.version_info[0] == 3:
+    long = int
 
-class Matrix:
-    """Matrix object"""
+
+def _is_integer(n):
+    """Find out if a given argument is an integer."""
+    return isinstance(n, int) or isinstance(n, long)
+
+
+def _buffer(values):
+    """Store a list of numbers compactly.
+
+    Values that all fit into 64 bits are packed into an array of machine
+    integers. Otherwise (big integers or floats) the list is kept as is.
+    """
+    try:
+        return array("q", values)
+    except (OverflowError, TypeError, ValueError):
+        return values
+
+
+def _copy_buffer(buffer):
+    """Copy a buffer into memory.
+
+    Arrays and lists are copied as is. Other buffers, e.g. the memory-mapped
+    sections of a binary matrix file, are read into a new array or list.
+    """
+    if isinstance(buffer, array) or isinstance(buffer, list):
+        return buffer[:]
+    return _buffer(list(buffer))
+
+
+def _reduce_row(numerators, denominator):
+    """Divide a row and its common denominator by their greatest common divisor.
+
+    Return a tuple (numerators, denominator) with a positive denominator.
+    """
+    if denominator < 0:
+        numerators = [-x for x in numerators]
+        denominator = -denominator
+
+    syt = denominator
+    for x in numerators:
+        if syt == 1:
+            break
+        syt = fast_gcd(syt, x)
+    syt = my_abs(syt)
+
+    if syt > 1:
+        numerators = [x // syt for x in numerators]
+        denominator //= syt
+    return (numerators, denominator)
+
+
+def _pack_row(row):
+    """Turn a row of (num, den) tuples into a tuple (numerators, denominator).
+
+    Exact rows are scaled to their reduced common denominator. Inexact cells
+    (floats) are stored by value, with denominator 1.
+    """
+    common = 1
+    for cell in row:
+        if not _is_integer(cell[0]) or not _is_integer(cell[1]):
+            return ([cell[0] * 1.0 / cell[1] for cell in row], 1)
+        common = common // fast_gcd(common, cell[1]) * my_abs(cell[1])
+
+    return _reduce_row([cell[0] * (common // cell[1]) for cell in row], common)
+
+
+def _write_buffer(buffer, start, values):
+    """Overwrite buffer[start:start + len(values)] with values.
+
+    Memory-mapped buffers are read-only, so they are copied into memory
+    first, and an array of machine integers is turned into a list once a
+    value does not fit into it. Return the buffer written to.
+    """
+    if not isinstance(buffer, array) and not isinstance(buffer, list):
+        buffer = _copy_buffer(buffer)
+    if isinstance(buffer, array):
+        try:
+            buffer[start:start + len(values)] = array("q", values)
+            return buffer
+        except (OverflowError, TypeError):
+            buffer = buffer.tolist()
+    buffer[start:start + len(values)] = values
+    return buffer
+
+
+def _format_number(numerator, denominator):
+    """Format a cell for printing.
+
+    Integers are printed exactly however big they are, other values as
+    decimals. Exact fractions too big for a float are printed as num/den.
+    """
+    if not _is_integer(numerator) or not _is_integer(denominator):
+        elem = numerator * 1.0 / denominator
+        if elem % 1 == 0:
+            return str(int(elem))
+        return str(elem)
+
+    if denominator == 1:
+        return str(numerator)
+    try:
+        # True division of integers is correctly rounded.
+        return str(numerator / denominator)
+    except OverflowError:
+        return str(numerator) + "/" + str(denominator)
+
+
+class Matrix(object):
+    """Matrix object
+
+    The cells are stored compactly: self.numerators is one row-major buffer of
+    integer numerators and self.denominators holds one common denominator per
+    row. Cell (i, j) is scalar * numerators[i*m + j] / denominators[i]. The
+    getters return the cells as (numerator, denominator) tuples as before.
+    The buffers can also be sections of a memory-mapped file, see storage.py.
+
+    self.determinant caches the exact determinant as a reduced fraction,
+    self.factorization the LUP factorization, self.inverse the inverse and
+    self.structure the shape of the non-zeros (see structure.py), all None
+    until computed. setCell, replaceRow and replaceColumn keep the cached
+    determinant and inverse current where they can, see update.py.
+
+    self.version counts the changes of the cells, so that the views of the
+    matrix (see view.py) can tell when their caches are out of date.
+    """
+
+    __slots__ = ["rowAmount", "colAmount", "scalar", "numerators",
+                 "denominators", "determinant", "factorization", "inverse",
+                 "structure", "version"]
 
     def __init__(self, rows, n, m):
         """Construct a matrix.
 
         Keyword arguments:
-        rows -- the list of rows in the matrix
+        rows -- the list of rows in the matrix, each cell a (num, den) tuple
         n    -- the number of rows in the matrix
         m    -- the number of column in the matrix
         """
+        numerators = []
+        denominators = []
+
+        for row in rows:
+            rowNumerators, common = _pack_row(row)
+            numerators.extend(rowNumerators)
+            denominators.append(common)
+
         self.rowAmount = n
         self.colAmount = m
-        self.rowArray = rows
-        self.colArray = [[] for i in my_range(n)]
+        self.numerators = _buffer(numerators)
+        self.denominators = _buffer(denominators)
         self.scalar = 1
+        self.determinant = None
+        self.factorization = None
+        self.inverse = None
+        self.structure = None
+        self.version = 0
 
-    def __str__(self):
-        """Print the matrix in a readable format"""
-        output = ""
+    @staticmethod
+    def fromIntegerRows(rows, denominators=None):
+        """Construct a matrix from rows of integers without any tuples.
+
+        Keyword arguments:
+        rows         -- the list of rows, each a list of integer numerators
+        denominators -- the common denominator of each row, 1 by default
+        """
+        n = len(rows)
+        m = len(rows[0]) if n > 0 else 0
+        if denominators is None:
+            denominators = [1] * n
+
+        numerators = []
+        reducedDenominators = []
+        for i in my_range(n):
+            rowNumerators, denominator = _reduce_row(rows[i], denominators[i])
+            numerators.extend(rowNumerators)
+            reducedDenominators.append(denominator)
 
-        for row in self.rowArray:
-            output += "["
+        return Matrix.fromBuffers(_buffer(numerators),
+                                  _buffer(reducedDenominators), n, m)
 
-            for i in my_range(len(row)):
-                cell = row[i]
-                elem = self.scalar * 1.0 * cell[0] / cell[1]
+    @staticmethod
+    def fromBuffers(numerators, denominators, n, m):
+        """Construct a matrix around existing buffers without copying them.
+
+        Keyword arguments:
+        numerators   -- the row-major integer numerators, n * m of them
+        denominators -- the positive denominator of each row, each row
+                        already reduced
+        n            -- the number of rows in the matrix
+        m            -- the number of column in the matrix
+        """
+        A = Matrix.__new__(Matrix)
+        A.rowAmount = n
+        A.colAmount = m
+        A.numerators = numerators
+        A.denominators = denominators
+        A.scalar = 1
+        A.determinant = None
+        A.factorization = None
+        A.inverse = None
+        A.structure = None
+        A.version = 0
+        return A
 
-                if elem % 1 == 0:
-                    elem = int(elem)
+    def copy(self):
+        """Return a copy of the matrix that does not share any storage."""
+        A = Matrix.__new__(Matrix)
+        A.rowAmount = self.rowAmount
+        A.colAmount = self.colAmount
+        A.numerators = _copy_buffer(self.numerators)
+        A.denominators = _copy_buffer(self.denominators)
+        A.scalar = self.scalar
+        A.determinant = self.determinant
+        A.factorization = None
+        # The cached inverse is replaced, never modified, so it can be shared.
+        A.inverse = self.inverse
+        A.structure = self.structure
+        A.version = 0
+        return A
 
-                if i == len(row) - 1:
-                    output += str(elem)
-                else:
-                    output += str(elem) + " "
+    def __cell(self, numerator, denominator):
+        """Return a cell as a reduced (num, den) tuple, scalar applied."""
+        numerator = self.scalar * numerator
+        if denominator == 1 or not _is_integer(numerator):
+            return (numerator, denominator)
 
-            output += "]\n"
-        return output[:-1]
+        syt = fast_gcd(numerator, denominator)
+        if syt == 0:
+            return (numerator, denominator)
+        return (numerator // syt, denominator // syt)
+
+    def __str__(self):
+        """Print the matrix in a readable format"""
+        m = self.colAmount
+        lines = []
+
+        for row in my_range(self.rowAmount):
+            denominator = self.denominators[row]
+            start = row * m
+            elems = [_format_number(*self.__cell(numerator, denominator))
+                     for numerator in self.numerators[start:start + m]]
+            lines.append("[" + " ".join(elems) + "]")
+        return "\n".join(lines)
 
     def multiplyScalar(self, n):
         """Multiply the current scalar value.
@@ -46,8 +256,154 @@ class Matrix:
         self.scalar handles the scalar multiplication of the matrix. Each time
         a value(s) is returned via a getter, the returned values have to be
         multiplied by the scalar.
+
+        The cached determinant is multiplied by n^rows and the cached
+        factorization updated accordingly. The cached inverse and structure
+        are dropped.
         """
         self.scalar *= n
+        self.version += 1
+
+        if self.determinant is not None:
+            if _is_integer(n):
+                numerator = self.determinant[0] * n ** self.rowAmount
+                denominator = self.determinant[1]
+                syt = my_abs(fast_gcd(numerator, denominator))
+                if syt == 0:
+                    syt = 1
+                self.determinant = (numerator // syt, denominator // syt)
+            else:
+                self.determinant = None
+
+        if self.factorization is not None:
+            self.factorization.scale(n)
+        self.inverse = None
+        self.structure = None
+
+    def __apply_scalar(self):
+        """Multiply the scalar into the stored rows, so that it becomes 1."""
+        if self.scalar == 1:
+            return
+
+        numerators = []
+        denominators = []
+        for i in my_range(self.rowAmount):
+            rowNumerators, denominator = _pack_row(self.getRow(i))
+            numerators.extend(rowNumerators)
+            denominators.append(denominator)
+
+        self.numerators = _buffer(numerators)
+        self.denominators = _buffer(denominators)
+        self.scalar = 1
+
+    def __store_row(self, row, cells):
+        """Overwrite a row with a list of (num, den) tuples."""
+        rowNumerators, denominator = _pack_row(cells)
+        self.numerators = _write_buffer(self.numerators,
+                                        row * self.colAmount, rowNumerators)
+        self.denominators = _write_buffer(self.denominators, row,
+                                          [denominator])
+        self.version += 1
+
+    def setCell(self, row, col, value):
+        """Set the content of a cell to a (num, den) tuple.
+
+        See replaceRow.
+        """
+        from .update import updateCell
+        updateCell(self, row, col, value)
+
+        self.__apply_scalar()
+        cells = self.getRow(row)
+        cells[col] = value
+        self.__store_row(row, cells)
+        self.factorization = None
+        self.structure = None
+
+    def replaceRow(self, row, values):
+        """Replace a row with a list of (num, den) tuples.
+
+        An edit is a rank-one change of the matrix, so a cached inverse and
+        determinant are updated in O(n^2) instead of being recomputed, see
+        update.py. Nothing that is not cached is computed. The factorization
+        and the structure are dropped.
+        """
+        from .update import updateRow
+        updateRow(self, row, values)
+
+        self.__apply_scalar()
+        self.__store_row(row, list(values))
+        self.factorization = None
+        self.structure = None
+
+    def replaceColumn(self, col, values):
+        """Replace a column with a list of (num, den) tuples.
+
+        See replaceRow.
+        """
+        from .update import updateColumn
+        updateColumn(self, col, values)
+
+        self.__apply_scalar()
+        for i in my_range(self.rowAmount):
+            cells = self.getRow(i)
+            cells[col] = values[i]
+            self.__store_row(i, cells)
+        self.factorization = None
+        self.structure = None
+
+    # The operators build lazy expressions, see expression.py. Use
+    # evaluate() on the result to get a Matrix.
+
+    def __add__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__add__(other)
+
+    def __radd__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__radd__(other)
+
+    def __sub__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__sub__(other)
+
+    def __rsub__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__rsub__(other)
+
+    def __neg__(self):
+        from .expression import Leaf
+        return Leaf(self).__neg__()
+
+    def __mul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__mul__(other)
+
+    def __rmul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__rmul__(other)
+
+    def __matmul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__matmul__(other)
+
+    def __rmatmul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__rmatmul__(other)
+
+    @property
+    def T(self):
+        """The transpose of the matrix as a lazy expression."""
+        from .expression import Leaf
+        return Leaf(self, True)
+
+    @property
+    def rowArray(self):
+        """The rows of the matrix as (num, den) tuples, scalar not applied."""
+        m = self.colAmount
+        return [[(self.numerators[i * m + j], self.denominators[i])
+                 for j in my_range(m)]
+                for i in my_range(self.rowAmount)]
 
     def getRowAmount(self):
         """Return the amount of rows.
@@ -59,11 +415,7 @@ class Matrix:
         """Return the row array.
 
         This is needed mainly for testing purposes."""
-        if self.scalar == 1:
-            return self.rowArray
-        returnArray = [[self.scalar * elem for elem in row]
-                       for row in self.rowArray]
-        return returnArray
+        return [self.getRow(i) for i in my_range(self.rowAmount)]
 
     def getColAmount(self):
         """Return the amount of columns.
@@ -72,10 +424,10 @@ class Matrix:
         return self.colAmount
 
     def getColArray(self):
-        """Return the current column array.
+        """Return the column array.
 
         This is needed mainly for testing purposes"""
-        return self.colArray
+        return [self.getCol(j) for j in my_range(self.colAmount)]
 
     def getScalar(self):
         """Return the current scalar value.
@@ -85,41 +437,68 @@ class Matrix:
 
     def getCell(self, row, col):
         """Return the content of the requested cell"""
-        return (self.scalar * self.rowArray[row][col][0],
-                self.rowArray[row][col][1])
+        return self.__cell(self.numerators[row * self.colAmount + col],
+                           self.denominators[row])
 
     def getRow(self, row):
         """Return the requested row."""
-        if self.scalar == 1:
-            return self.rowArray[row]
-
-        returnRow = [(self.scalar * elem[0], elem[1])
-                     for elem in self.rowArray[row]]
-        return returnRow
+        m = self.colAmount
+        denominator = self.denominators[row]
+        return [self.__cell(self.numerators[row * m + j], denominator)
+                for j in my_range(m)]
 
     def genColArray(self, col):
-        """Generate only the requested column and store it in self.colArray.
+        """Generate the requested column, scalar not applied.
 
-        Generating only the needed column at a time keeps the worst case
-        scenario at a reasonable O(m). As the same column vector is requested
-        again, then getCol becomes O(1).
+        The column is read straight from the row-major buffer in O(n), so no
+        separate copy of the columns is kept.
         """
-        for i in my_range(self.rowAmount):
-            self.colArray[col].append(self.rowArray[i][col])
-        return self.colArray[col]
+        m = self.colAmount
+        return [(self.numerators[i * m + col], self.denominators[i])
+                for i in my_range(self.rowAmount)]
 
     def getCol(self, col):
-        """Return the requested column of the matrix.
+        """Return the requested column of the matrix."""
+        m = self.colAmount
+        return [self.__cell(self.numerators[i * m + col],
+                            self.denominators[i])
+                for i in my_range(self.rowAmount)]
+
+    def getIntegerRow(self, row):
+        """Return the requested row as a tuple (numerators, denominator).
 
-        If this is the first time requesting a column, the column must be first
-        generated. Otherwise, we may just look the column up from self.colArray.
+        The numerators are a new list of integers with the scalar applied.
+        Return None if the matrix does not consist of exact fractions.
         """
-        if len(self.colArray[col]) == 0:
-            self.genColArray(col)
+        if not _is_integer(self.scalar):
+            return None
 
-        if self.scalar == 1:
-            return self.colArray[col]
+        m = self.colAmount
+        numerators = self.numerators[row * m:(row + 1) * m]
+        if isinstance(numerators, array):
+            numerators = numerators.tolist()
+        elif len(numerators) > 0 and not _is_integer(numerators[0]):
+            return None
+        elif not isinstance(numerators, list):
+            numerators = list(numerators)
+
+        if self.scalar != 1:
+            numerators = [self.scalar * x for x in numerators]
+        return (numerators, self.denominators[row])
+
+    def getIntegerRows(self):
+        """Scale every row to integers by the row's common denominator.
 
-        returnCol = [(self.scalar * elem[0], elem[1])
-                     for elem in self.colArray[col]]
-        return returnCol
+        Return a tuple (rows, denominator) so that the matrix equals
+        rows / denominator, or None if the matrix does not consist of exact
+        fractions (e.g. it has a float scalar).
+        """
+        rows = []
+        denominator = 1
+        for i in my_range(self.rowAmount):
+            integerRow = self.getIntegerRow(i)
+            if integerRow is None:
+                return None
+            rows.append(integerRow[0])
+            denominator *= integerRow[1]
+        return (rows, denominator)
@@ -0,0 +1,206 @@
+from .my_algorithms import my_range, fast_gcd, my_abs
+from .Matrix import Matrix, _is_integer
+
+
+def _reduce(numerator, denominator):
+    """Reduce a fraction and make its denominator positive."""
+    syt = my_abs(fast_gcd(numerator, denominator))
+    if syt == 0:
+        syt = 1
+    if denominator < 0:
+        syt = -syt
+    return (numerator // syt, denominator // syt)
+
+
+class SparseMatrix(object):
+    """Sparse matrix object in dictionary-of-keys form
+
+    Only the non-zero cells are stored: self.rows holds one dictionary per row
+    mapping a column index to a reduced (num, den) tuple. Memory and the work
+    done by the sparse algorithms scale with the amount of non-zero cells. The
+    getters are the same as the ones of Matrix.
+    """
+
+    __slots__ = ["rowAmount", "colAmount", "scalar", "rows", "determinant",
+                 "factorization"]
+
+    def __init__(self, rows, n, m):
+        """Construct a sparse matrix.
+
+        Keyword arguments:
+        rows -- the list of rows, each a dictionary {column: (num, den)} of
+                the non-zero cells
+        n    -- the number of rows in the matrix
+        m    -- the number of column in the matrix
+        """
+        self.rowAmount = n
+        self.colAmount = m
+        self.scalar = 1
+        self.determinant = None
+        self.factorization = None
+        self.rows = []
+
+        for row in rows:
+            newRow = {}
+            for col in row:
+                cell = row[col]
+                if cell[0] != 0:
+                    if _is_integer(cell[0]) and _is_integer(cell[1]):
+                        cell = _reduce(cell[0], cell[1])
+                    newRow[col] = cell
+            self.rows.append(newRow)
+
+    @staticmethod
+    def fromDenseRows(rows, n, m):
+        """Construct a sparse matrix from rows of (num, den) tuples."""
+        return SparseMatrix(
+            [dict([(j, row[j]) for j in my_range(m) if row[j][0] != 0])
+             for row in rows],
+            n, m)
+
+    @staticmethod
+    def fromMatrix(A):
+        """Construct a sparse matrix with the same cells as matrix A."""
+        return SparseMatrix.fromDenseRows(A.getRowArray(), A.getRowAmount(),
+                                          A.getColAmount())
+
+    def toMatrix(self):
+        """Return a dense Matrix with the same cells."""
+        return Matrix(self.getRowArray(), self.rowAmount, self.colAmount)
+
+    def copy(self):
+        """Return a copy of the matrix that does not share any storage."""
+        A = SparseMatrix(self.rows, self.rowAmount, self.colAmount)
+        A.scalar = self.scalar
+        A.determinant = self.determinant
+        return A
+
+    def __cell(self, cell):
+        """Return a cell with the scalar applied."""
+        if self.scalar == 1:
+            return cell
+        numerator = self.scalar * cell[0]
+        if not _is_integer(numerator) or not _is_integer(cell[1]):
+            return (numerator, cell[1])
+        return _reduce(numerator, cell[1])
+
+    def __str__(self):
+        """Print the matrix in a readable format"""
+        return self.toMatrix().__str__()
+
+    def multiplyScalar(self, n):
+        """Multiply the current scalar value.
+
+        Like Matrix.multiplyScalar, the cached determinant is updated and the
+        cached factorization dropped.
+        """
+        self.scalar *= n
+        self.factorization = None
+
+        if self.determinant is not None:
+            if _is_integer(n):
+                self.determinant = _reduce(
+                    self.determinant[0] * n ** self.rowAmount,
+                    self.determinant[1])
+            else:
+                self.determinant = None
+
+    def getNonzeroAmount(self):
+        """Return the amount of stored non-zero cells."""
+        total = 0
+        for row in self.rows:
+            total += len(row)
+        return total
+
+    def getSparseRow(self, row):
+        """Return the non-zero cells of a row as {column: (num, den)}."""
+        if self.scalar == 1:
+            return self.rows[row]
+        return dict([(col, self.__cell(self.rows[row][col]))
+                     for col in self.rows[row]])
+
+    def getRowAmount(self):
+        """Return the amount of rows."""
+        return self.rowAmount
+
+    def getColAmount(self):
+        """Return the amount of columns."""
+        return self.colAmount
+
+    def getScalar(self):
+        """Return the current scalar value."""
+        return self.scalar
+
+    def getCell(self, row, col):
+        """Return the content of the requested cell"""
+        cell = self.rows[row].get(col)
+        if cell is None:
+            return (0, 1)
+        return self.__cell(cell)
+
+    def getRow(self, row):
+        """Return the requested row."""
+        return [self.getCell(row, col) for col in my_range(self.colAmount)]
+
+    def getRowArray(self):
+        """Return the row array."""
+        return [self.getRow(i) for i in my_range(self.rowAmount)]
+
+    def getCol(self, col):
+        """Return the requested column of the matrix."""
+        return [self.getCell(row, col) for row in my_range(self.rowAmount)]
+
+    def getColArray(self):
+        """Return the column array."""
+        return [self.getCol(j) for j in my_range(self.colAmount)]
+
+    def getIntegerRow(self, row):
+        """Return the requested row as a tuple (numerators, denominator).
+
+        See Matrix.getIntegerRow. The row is returned densely.
+        """
+        if not _is_integer(self.scalar):
+            return None
+
+        cells = self.rows[row]
+        common = 1
+        for col in cells:
+            if not _is_integer(cells[col][0]):
+                return None
+            den = cells[col][1]
+            common = common // fast_gcd(common, den) * my_abs(den)
+
+        numerators = [0] * self.colAmount
+        for col in cells:
+            cell = cells[col]
+            numerators[col] = self.scalar * cell[0] * (common // cell[1])
+        return (numerators, common)
+
+    def getIntegerRows(self):
+        """Scale every row to integers by the row's common denominator.
+
+        See Matrix.getIntegerRows.
+        """
+        rows = []
+        denominator = 1
+        for i in my_range(self.rowAmount):
+            integerRow = self.getIntegerRow(i)
+            if integerRow is None:
+                return None
+            rows.append(integerRow[0])
+            denominator *= integerRow[1]
+        return (rows, denominator)
+
+    def isExact(self):
+        """Find out if every cell is an exact fraction.
+
+        Unlike getIntegerRows, only the stored non-zero cells are looked at,
+        so the check costs O(non-zeros) time and no extra memory.
+        """
+        if not _is_integer(self.scalar):
+            return False
+        for row in self.rows:
+            for col in row:
+                if not _is_integer(row[col][0]):
+                    return False
+        return True
@@ -0,0 +1,222 @@
+from .parser import parseRows
+from .calculator import matrixDeterminantFraction, matrixInverse, isSingular
+from .float_filter import filterStatistics, resetFilterStatistics
+from collections import deque
+import argparse
+import sys
+import time
+
+
+def readMatrices(stream):
+    """Read matrices from a text stream one at a time.
+
+    Each matrix is given row by row, one row per line, in the same syntax as
+    in the interactive mode. Matrices are separated by blank lines and lines
+    starting with '#' are ignored. Yield the list of row strings of each matrix.
+    """
+    rows = []
+    for line in stream:
+        line = line.strip()
+        if line.startswith("#"):
+            continue
+        if not line:
+            if rows:
+                yield rows
+                rows = []
+            continue
+        rows.append(line)
+
+    if rows:
+        yield rows
+
+
+def __chunks(iterable, size):
+    """Group the items of iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def __format_frac(frac):
+    """Format a fraction exactly as 'numerator/denominator'."""
+    if frac[1] < 0:
+        frac = (-frac[0], -frac[1])
+    if frac[1] == 1:
+        return str(frac[0])
+    return str(frac[0]) + "/" + str(frac[1])
+
+
+def checkSystem(rows, withInverse=False, withDeterminant=True, sparse=False,
+                workers=1):
+    """Check whether the system given by rows is singular.
+
+    Return a tuple (status, det, inverse) of strings, where status is
+    "singular", "nonsingular", "nonsquare" or "invalid". Without the
+    determinant, the check is answered by the floating-point filter whenever
+    possible. With sparse=True the system is stored and solved as a
+    SparseMatrix. workers is passed on to matrixDeterminantFraction.
+    """
+    A = parseRows(rows, sparse)
+    if A is None:
+        return ("invalid", "", "")
+
+    if not withDeterminant and not withInverse:
+        singular = isSingular(A)
+        if singular is None:
+            return ("nonsquare", "", "")
+        if singular:
+            return ("singular", "", "")
+        return ("nonsingular", "", "")
+
+    det = matrixDeterminantFraction(A, workers=workers)
+    if det is None:
+        return ("nonsquare", "", "")
+    if det[0] == 0:
+        return ("singular", "0", "")
+
+    inverse = ""
+    if withInverse:
+        B = matrixInverse(A)
+        inverse = "; ".join([" ".join([__format_frac(cell) for cell in row])
+                             for row in B.getRowArray()])
+
+    return ("nonsingular", __format_frac(det), inverse)
+
+
+def __check_chunk(chunk, withInverse, withDeterminant, sparse, workers=1):
+    """Check every system of a chunk. This is run by the worker processes.
+
+    Return the results together with the filter statistics of the chunk.
+    """
+    resetFilterStatistics()
+    results = [checkSystem(rows, withInverse, withDeterminant, sparse,
+                           workers)
+               for rows in chunk]
+    return (results, filterStatistics())
+
+
+def __collect(chunkResult, statistics):
+    """Add the filter statistics of a chunk to statistics, return results."""
+    results, chunkStatistics = chunkResult
+    if statistics is not None:
+        statistics["calls"] = statistics.get("calls", 0) + \
+            chunkStatistics["calls"]
+        statistics["hits"] = statistics.get("hits", 0) + \
+            chunkStatistics["hits"]
+    return results
+
+
+def checkSystems(matrices, jobs=1, chunkSize=64, withInverse=False,
+                 withDeterminant=True, statistics=None, sparse=False,
+                 workers=1):
+    """Check an iterable of matrices (lists of row strings) for singularity.
+
+    The matrices are checked in chunks of chunkSize by a pool of jobs worker
+    processes. At most a few chunks per worker are in flight at any time, so
+    memory use does not depend on the amount of input. Yield the results of
+    checkSystem in input order. If statistics is a dict, the calls and hits of
+    the floating-point filter are added to it. Without a pool (jobs <= 1),
+    each determinant is eliminated by workers processes.
+    """
+    chunks = __chunks(matrices, chunkSize)
+
+    if jobs <= 1:
+        for chunk in chunks:
+            chunkResult = __check_chunk(chunk, withInverse, withDeterminant,
+                                        sparse, workers)
+            for result in __collect(chunkResult, statistics):
+                yield result
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk in chunks:
+            # The jobs already use the cores, so every determinant is
+            # computed in one process.
+            pending.append(executor.submit(__check_chunk, chunk, withInverse,
+                                           withDeterminant, sparse, 1))
+
+            # Wait for the oldest chunk before reading any further.
+            if len(pending) >= 4 * jobs:
+                chunkResult = pending.popleft().result()
+                for result in __collect(chunkResult, statistics):
+                    yield result
+
+        while pending:
+            chunkResult = pending.popleft().result()
+            for result in __collect(chunkResult, statistics):
+                yield result
+
+
+def main(argv):
+    """Run the batch mode with command line arguments argv."""
+    argParser = argparse.ArgumentParser(
+        prog="batch",
+        description="Check systems of linear equations for singularity. "
+                    "Prints 'index status determinant [inverse]' per system.")
+    argParser.add_argument("input", nargs="?", default="-",
+                           help="input file, '-' for stdin (default)")
+    argParser.add_argument("-o", "--output", default="-",
+                           help="output file, '-' for stdout (default)")
+    argParser.add_argument("-j", "--jobs", type=int, default=1,
+                           help="amount of worker processes")
+    argParser.add_argument("-w", "--workers", type=int, default=1,
+                           help="amount of processes eliminating each big "
+                                "determinant, without --jobs")
+    argParser.add_argument("--chunk-size", type=int, default=64,
+                           help="amount of systems sent to a worker at once")
+    argParser.add_argument("--inverse", action="store_true",
+                           help="also print the inverse of nonsingular systems")
+    argParser.add_argument("--singular-only", action="store_true",
+                           help="only decide singularity, skip the "
+                                "determinant")
+    argParser.add_argument("--sparse", action="store_true",
+                           help="store the systems as sparse matrices")
+    args = argParser.parse_args(argv)
+
+    inStream = sys.stdin if args.input == "-" else open(args.input)
+    outStream = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    start = time.time()
+    total = 0
+    singular = 0
+    statistics = {}
+    try:
+        results = checkSystems(readMatrices(inStream), args.jobs,
+                               args.chunk_size, args.inverse,
+                               not args.singular_only, statistics,
+                               args.sparse, args.workers)
+        for status, det, inverse in results:
+            total += 1
+            if status == "singular":
+                singular += 1
+
+            line = str(total) + " " + status
+            if det:
+                line += " " + det
+            if inverse:
+                line += " " + inverse
+            outStream.write(line + "\n")
+    finally:
+        if inStream is not sys.stdin:
+            inStream.close()
+        if outStream is not sys.stdout:
+            outStream.close()
+
+    elapsed = time.time() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    sys.stderr.write("%d systems (%d singular) in %.3f s, %.1f systems/s\n"
+                     % (total, singular, elapsed, rate))
+    if statistics.get("calls", 0) > 0:
+        sys.stderr.write("floating-point filter decided %d of %d (%.1f %%)\n"
+                         % (statistics["hits"], statistics["calls"],
+                            100.0 * statistics["hits"] / statistics["calls"]))
+    return 0
@@ -0,0 +1,325 @@
+from .Matrix import Matrix
+from .calculator import matrixDeterminant, matrixInverse, \
+    matrixMultiplication, matrixTranspose
+from .parser import parseRows
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# time.perf_counter does not exist in python2.
+__clock = getattr(time, "perf_counter", time.time)
+
+FAMILIES = ["integer8", "integer32", "integer128", "rational", "singular",
+            "sparse", "hilbert", "triangular"]
+OPERATIONS = ["determinant", "inverse", "multiplication", "transpose",
+              "parser"]
+SIZES = [5, 10, 25, 50, 100, 200, 300]
+
+# Differences below this many seconds are noise, not regressions.
+NOISE = 0.001
+
+
+def __random_integer(rng, bits):
+    """Return a random integer of at most bits bits, sign included."""
+    return rng.randint(-2 ** (bits - 1), 2 ** (bits - 1))
+
+
+def generateRows(family, n, seed=0):
+    """Generate the rows of an n x n matrix of the given family.
+
+    The same family, size and seed always give the same matrix. Return a list
+    of rows of (num, den) tuples.
+    """
+    rng = random.Random("%s-%d-%d" % (family, n, seed))
+
+    if family.startswith("integer"):
+        bits = int(family[len("integer"):])
+        return [[(__random_integer(rng, bits), 1) for j in range(n)]
+                for i in range(n)]
+
+    if family == "rational":
+        return [[(rng.randint(-99, 99), rng.randint(1, 99)) for j in range(n)]
+                for i in range(n)]
+
+    if family == "singular":
+        # The last row is a combination of two others.
+        rows = [[(rng.randint(-99, 99), 1) for j in range(n)]
+                for i in range(n)]
+        if n > 2:
+            a = rng.randint(1, 9)
+            b = rng.randint(1, 9)
+            rows[-1] = [(a * x[0] + b * y[0], 1)
+                        for x, y in zip(rows[0], rows[1])]
+        else:
+            rows[-1] = rows[0]
+        return rows
+
+    if family == "sparse":
+        # A non-zero diagonal and about two other non-zeros per row.
+        rows = [[(0, 1) for j in range(n)] for i in range(n)]
+        for i in range(n):
+            rows[i][i] = (rng.randint(1, 99), 1)
+            for k in range(2):
+                rows[i][rng.randrange(n)] = (rng.randint(-99, 99), 1)
+        return rows
+
+    if family == "hilbert":
+        return [[(1, i + j + 1) for j in range(n)] for i in range(n)]
+
+    if family == "triangular":
+        return [[(rng.randint(1, 99) if i == j else
+                  rng.randint(-99, 99) if j > i else 0, 1)
+                 for j in range(n)] for i in range(n)]
+
+    raise ValueError("unknown family '%s'" % family)
+
+
+def __format_cell(cell):
+    """Format a cell in the input syntax."""
+    if cell[1] == 1:
+        return str(cell[0])
+    return "%d/%d" % cell
+
+
+def __bits(value):
+    """Return the bit length of the biggest numerator or denominator."""
+    if isinstance(value, tuple):
+        return max(abs(int(value[0])).bit_length(),
+                   abs(int(value[1])).bit_length())
+    if isinstance(value, int) or isinstance(value, float):
+        return abs(int(value)).bit_length()
+    if value is None:
+        return 0
+    best = 0
+    for row in value.getRowArray():
+        for cell in row:
+            best = max(best, __bits(cell))
+    return best
+
+
+def __prepare(operation, rows, rows2):
+    """Return a function running the operation on fresh matrices.
+
+    The matrices are built anew for every run, so that the caches of a Matrix
+    do not hide any work.
+    """
+    n = len(rows)
+
+    if operation == "determinant":
+        def determinant():
+            # Report the bits of the exact determinant the matrix caches, not
+            # of the float matrixDeterminant may return.
+            A = Matrix(rows, n, n)
+            matrixDeterminant(A)
+            return A.determinant
+        return determinant
+    if operation == "inverse":
+        return lambda: matrixInverse(Matrix(rows, n, n))
+    if operation == "multiplication":
+        return lambda: matrixMultiplication(Matrix(rows, n, n),
+                                            Matrix(rows2, n, n))
+    if operation == "transpose":
+        return lambda: matrixTranspose(Matrix(rows, n, n))
+    if operation == "parser":
+        text = [" ".join([__format_cell(cell) for cell in row])
+                for row in rows]
+        return lambda: parseRows(text)
+    raise ValueError("unknown operation '%s'" % operation)
+
+
+def measure(family, n, operation, repeat=3, memory=True, seed=0):
+    """Benchmark one operation on one matrix.
+
+    Return a dict with the best time of repeat runs in seconds, the peak
+    memory allocated by one run in bytes (None without tracemalloc or with
+    memory=False), and the bit lengths of the input and the result. If the
+    operation raises an exception, seconds is None and error tells what went
+    wrong.
+    """
+    rows = generateRows(family, n, seed)
+    rows2 = generateRows(family, n, seed + 1)
+    run = __prepare(operation, rows, rows2)
+    report = {"family": family, "size": n, "operation": operation,
+              "seconds": None, "peak_bytes": None,
+              "input_bits": max([__bits(cell) for row in rows
+                                 for cell in row])}
+
+    best = None
+    result = None
+    for k in range(repeat):
+        start = __clock()
+        try:
+            result = run()
+        except Exception as e:
+            report["error"] = "%s: %s" % (type(e).__name__, e)
+            return report
+        elapsed = __clock() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    peak = None
+    if memory and tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    report["seconds"] = best
+    report["peak_bytes"] = peak
+    report["output_bits"] = __bits(result)
+    return report
+
+
+def runBenchmarks(families=None, sizes=None, operations=None, repeat=3,
+                  memory=True, timeLimit=10.0, seed=0, log=None):
+    """Run every combination of family, size and operation.
+
+    The sizes of a family and an operation are run from the smallest up. Once
+    a run takes longer than timeLimit seconds, the bigger sizes are skipped.
+    If log is a stream, each result is written to it as it comes. Return the
+    list of results of measure.
+    """
+    if families is None:
+        families = FAMILIES
+    if sizes is None:
+        sizes = SIZES
+    if operations is None:
+        operations = OPERATIONS
+
+    results = []
+    for family in families:
+        for operation in operations:
+            for n in sorted(sizes):
+                result = measure(family, n, operation, repeat, memory, seed)
+                results.append(result)
+                if log is not None:
+                    log.write(__format_result(result) + "\n")
+                    log.flush()
+                if result["seconds"] is None or \
+                        result["seconds"] > timeLimit:
+                    break
+    return results
+
+
+def __format_result(result):
+    """Format a result as one line of a table."""
+    if result["seconds"] is None:
+        return "%-11s %4d %-15s %s" % (result["family"], result["size"],
+                                       result["operation"], result["error"])
+    peak = result["peak_bytes"]
+    return "%-11s %4d %-15s %10.6f s %10s B %6d bits" % (
+        result["family"], result["size"], result["operation"],
+        result["seconds"], "-" if peak is None else str(peak),
+        result["output_bits"])
+
+
+def compareResults(baseline, results, threshold=1.25):
+    """Compare results against baseline results.
+
+    Return the list of (baseline, result, ratio) of the cases that got slower
+    by more than the factor threshold. A case that used to work but now
+    fails counts as a regression with ratio None. Cases missing from either
+    side or failing in the baseline are ignored.
+    """
+    old = dict([((r["family"], r["size"], r["operation"]), r)
+                for r in baseline])
+    regressions = []
+    for result in results:
+        key = (result["family"], result["size"], result["operation"])
+        if key not in old or old[key]["seconds"] is None:
+            continue
+        before = old[key]["seconds"]
+        after = result["seconds"]
+        if after is None:
+            regressions.append((old[key], result, None))
+        elif after > before * threshold and after - before > NOISE:
+            regressions.append((old[key], result, after / before))
+    return regressions
+
+
+def main(argv):
+    """Run the benchmarks with command line arguments argv."""
+    argParser = argparse.ArgumentParser(
+        prog="bench",
+        description="Time the matrix operations on reproducible families of "
+                    "matrices and write the results as JSON.")
+    argParser.add_argument("-o", "--output",
+                           help="write the results into this JSON file")
+    argParser.add_argument("--baseline",
+                           help="compare against the results in this JSON "
+                                "file, exit with 1 on regressions")
+    argParser.add_argument("--threshold", type=float, default=1.25,
+                           help="slowdown factor counted as a regression")
+    argParser.add_argument("--families", default=",".join(FAMILIES),
+                           help="comma separated families (default: all)")
+    argParser.add_argument("--operations", default=",".join(OPERATIONS),
+                           help="comma separated operations (default: all)")
+    argParser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                           help="comma separated matrix sizes")
+    argParser.add_argument("--repeat", type=int, default=3,
+                           help="runs per case, the best time counts")
+    argParser.add_argument("--time-limit", type=float, default=10.0,
+                           help="skip the bigger sizes once a run is slower")
+    argParser.add_argument("--seed", type=int, default=0,
+                           help="seed of the generated matrices")
+    argParser.add_argument("--no-memory", action="store_true",
+                           help="do not measure the peak memory")
+    args = argParser.parse_args(argv)
+
+    for family in args.families.split(","):
+        if family not in FAMILIES:
+            argParser.error("unknown family '%s'" % family)
+    for operation in args.operations.split(","):
+        if operation not in OPERATIONS:
+            argParser.error("unknown operation '%s'" % operation)
+
+    results = runBenchmarks(args.families.split(","),
+                            [int(n) for n in args.sizes.split(",")],
+                            args.operations.split(","), args.repeat,
+                            not args.no_memory, args.time_limit, args.seed,
+                            sys.stdout)
+
+    if args.output:
+        report = {"python": platform.python_version(),
+                  "implementation": platform.python_implementation(),
+                  "machine": platform.machine(),
+                  "seed": args.seed,
+                  "results": results}
+        stream = open(args.output, "w")
+        try:
+            json.dump(report, stream, indent=1, sort_keys=True)
+        finally:
+            stream.close()
+
+    if args.baseline:
+        stream = open(args.baseline)
+        try:
+            baseline = json.load(stream)["results"]
+        finally:
+            stream.close()
+
+        regressions = compareResults(baseline, results, args.threshold)
+        for before, after, ratio in regressions:
+            case = "%s %d %s" % (after["family"], after["size"],
+                                 after["operation"])
+            if ratio is None:
+                sys.stdout.write("REGRESSION %s: %s\n" % (case,
+                                                          after["error"]))
+            else:
+                sys.stdout.write("REGRESSION %s: %.6f s -> %.6f s (x%.2f)\n"
+                                 % (case, before["seconds"],
+                                    after["seconds"], ratio))
+        if regressions:
+            return 1
+        sys.stdout.write("no regressions against %s\n" % args.baseline)
+    return 0
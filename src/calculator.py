@@ -1,5 +1,20 @@
-from .Matrix import Matrix
-from .my_algorithms import my_gcd, my_abs, my_range, my_reversed
+from __future__ import division
+from .Matrix import Matrix, _is_integer
+from .SparseMatrix import SparseMatrix
+from .my_algorithms import fast_gcd, my_abs, my_range, my_reversed, \
+    bipartite_matching, permutation_sign
+from .modular import modular_determinant, probably_singular, \
+    probably_rank_deficient, WORD_BITS
+from .float_filter import certifiedSign
+from .factorization import LUPFactorization, SparseLUFactorization
+from .integer_matrix import integer_product, echelon_basis, reduced_basis, \
+    banded_determinant, adjugate_determinant
+from .parallel import parallelBareiss, useParallel
+from .structure import scanStructure
+
+# Intermediate fractions are only reduced once their numerator or denominator
+# is longer than this many bits, see frac_lazy_reduc.
+REDUCE_BITS = 128
 
 
 def frac_add(frac_a, frac_b):
@@ -46,16 +61,81 @@ def frac_ge(frac_a, frac_b):
     return frac_a[0] * frac_b[1] > frac_b[0] * frac_a[1]
 
 
+def __fold(frac):
+    """Fold an inexact fraction into (value, 1).
+
+    Otherwise the float denominators multiply on every step of an
+    elimination until they overflow to inf and the cells become nan.
+    """
+    if frac[1] == 1:
+        return frac
+    return (frac[0] / frac[1], 1)
+
+
 def frac_reduc(frac):
-    """Reduce the given fraction."""
-    syt = my_gcd(frac[0], frac[1])
+    """Reduce the given fraction.
+
+    Only integer division is used, so numerators and denominators of any size
+    stay exact. Fractions of floats are folded into (value, 1).
+    """
+    if not _is_integer(frac[0]) or not _is_integer(frac[1]):
+        return __fold(frac)
+
+    syt = fast_gcd(frac[0], frac[1])
 
     # This condition here ensures we don't end up dividing by 0. Namely, in
     # Python gcd(0, 0) == 0.
     if syt == 0:
         syt = 1
 
-    return (int(frac[0] / syt), int(frac[1] // syt))
+    return (frac[0] // syt, frac[1] // syt)
+
+
+def frac_lazy_reduc(frac):
+    """Reduce the given fraction only if it has grown big.
+
+    Reducing costs a gcd, which is wasted on small fractions that would be
+    reduced later anyway. The fraction is reduced once its numerator or
+    denominator is longer than REDUCE_BITS bits. Fractions of floats are
+    folded like in frac_reduc.
+    """
+    if not _is_integer(frac[0]) or not _is_integer(frac[1]):
+        return __fold(frac)
+    if frac[0].bit_length() > REDUCE_BITS or \
+            frac[1].bit_length() > REDUCE_BITS:
+        return frac_reduc(frac)
+    return frac
+
+
+def __compact_addition(A, B, sign=1):
+    """Add sign * B to A row by row over the integer buffers.
+
+    Return None if A or B does not consist of exact fractions.
+    """
+    rows = []
+    denominators = []
+    for i in my_range(A.getRowAmount()):
+        rowOfA = A.getIntegerRow(i)
+        rowOfB = B.getIntegerRow(i)
+        if rowOfA is None or rowOfB is None:
+            return None
+
+        numsOfA, denOfA = rowOfA
+        numsOfB, denOfB = rowOfB
+        if sign != 1:
+            numsOfB = [sign * b for b in numsOfB]
+        if denOfA == denOfB:
+            rows.append([a + b for a, b in zip(numsOfA, numsOfB)])
+            denominators.append(denOfA)
+            continue
+
+        common = __lcm(denOfA, denOfB)
+        multA = common // denOfA
+        multB = common // denOfB
+        rows.append([a * multA + b * multB for a, b in zip(numsOfA, numsOfB)])
+        denominators.append(common)
+
+    return Matrix.fromIntegerRows(rows, denominators)
 
 
 def matrixAddition(A, B):
@@ -70,6 +150,11 @@ def matrixAddition(A, B):
     if A.getRowAmount() != B.getRowAmount():
         return None
 
+    # Work on the integer buffers whenever both matrices are exact.
+    C = __compact_addition(A, B)
+    if C is not None:
+        return C
+
     # Resulting matrix.
     C = []
     for rowIndex in my_range(A.getRowAmount()):
@@ -78,7 +163,7 @@ def matrixAddition(A, B):
             cellOfA = A.getCell(rowIndex, colIndex)
             cellOfB = B.getCell(rowIndex, colIndex)
             result = frac_add(cellOfA, cellOfB)
-            resultRow.append(frac_reduc(result))
+            resultRow.append(frac_lazy_reduc(result))
         C.append(resultRow)
 
     return Matrix(C, A.getRowAmount(), A.getColAmount())
@@ -99,6 +184,16 @@ def matrixSubstraction(A, B):
             A.getRowAmount(),
             A.getColAmount())
 
+    if A.getColAmount() != B.getColAmount() or \
+            A.getRowAmount() != B.getRowAmount():
+        return None
+
+    # Work on the integer buffers whenever both matrices are exact, without
+    # touching B.
+    C = __compact_addition(A, B, -1)
+    if C is not None:
+        return C
+
     # Multiply B by a scalar of -1. This is because A-B == A+(-1*B).
     B.multiplyScalar(-1)
     resultMatrix = matrixAddition(A, B)
@@ -115,6 +210,87 @@ def matrixScalarMultiplication(A, scalar):
     return A
 
 
+def __common_denominator_rows(A):
+    """Scale all rows of A to one common denominator.
+
+    Return a tuple (rows, denominator) of integer rows, or None if A does not
+    consist of exact fractions.
+    """
+    integerRows = []
+    common = 1
+    for i in my_range(A.getRowAmount()):
+        integerRow = A.getIntegerRow(i)
+        if integerRow is None:
+            return None
+        integerRows.append(integerRow)
+        common = __lcm(common, integerRow[1])
+
+    rows = []
+    for numerators, denominator in integerRows:
+        mult = common // denominator
+        if mult == 1:
+            rows.append(numerators)
+        else:
+            rows.append([x * mult for x in numerators])
+    return (rows, common)
+
+
+def __compact_multiplication(A, B):
+    """Multiply A by B over the integer buffers.
+
+    Row i of the product is (sum_k a_ik * b_k) / (den_i * D), where the rows
+    b_k of B are scaled to one common denominator D. The integer product runs
+    on the blocked / Strassen-Winograd kernel and only one reduction per row
+    is needed. Return None if A or B does not consist of exact fractions.
+    """
+    scaledB = __common_denominator_rows(B)
+    if scaledB is None:
+        return None
+    rowsOfB, denOfB = scaledB
+
+    rowsOfA = []
+    denominators = []
+    for i in my_range(A.getRowAmount()):
+        rowOfA = A.getIntegerRow(i)
+        if rowOfA is None:
+            return None
+        rowsOfA.append(rowOfA[0])
+        denominators.append(rowOfA[1] * denOfB)
+
+    rows = integer_product(rowsOfA, rowsOfB)
+    return Matrix.fromIntegerRows(rows, denominators)
+
+
+def __sparse_rows(A):
+    """Return the rows of A as dictionaries {column: (num, den)}."""
+    if not isinstance(A, SparseMatrix):
+        A = SparseMatrix.fromMatrix(A)
+    return [A.getSparseRow(i) for i in my_range(A.getRowAmount())]
+
+
+def __sparse_multiplication(A, B):
+    """Multiply A by B, when at least one of them is a SparseMatrix.
+
+    Only the products of non-zero cells are formed.
+    """
+    rowsOfA = __sparse_rows(A)
+    rowsOfB = __sparse_rows(B)
+
+    C = []
+    for rowOfA in rowsOfA:
+        resultRow = {}
+        for k in rowOfA:
+            a = rowOfA[k]
+            rowOfB = rowsOfB[k]
+            for j in rowOfB:
+                toAdd = frac_mult(a, rowOfB[j])
+                resultRow[j] = frac_lazy_reduc(
+                    frac_add(resultRow.get(j, (0, 1)), toAdd))
+        C.append(resultRow)
+
+    return SparseMatrix(C, A.getRowAmount(), B.getColAmount())
+
+
 def matrixMultiplication(A, B):
     """Multiply two matrices if the product is defined."""
 
@@ -124,10 +300,19 @@ def matrixMultiplication(A, B):
     if A.getColAmount() != B.getRowAmount():
         return None
 
+    # A sparse product stays sparse.
+    if isinstance(A, SparseMatrix) or isinstance(B, SparseMatrix):
+        return __sparse_multiplication(A, B)
+
     n = A.getRowAmount()
     m = A.getColAmount()
     p = B.getColAmount()
 
+    # Work on the integer buffers whenever both matrices are exact.
+    C = __compact_multiplication(A, B)
+    if C is not None:
+        return C
+
     # This will be the result matrix.
     C = [[(0, 1) for i in my_range(p)] for j in my_range(n)]
 
@@ -137,9 +322,8 @@ def matrixMultiplication(A, B):
 
             for k in my_range(m):
                 toAdd = frac_mult(A.getCell(i, k), B.getCell(k, j))
-                cellValue = frac_add(cellValue, toAdd)
+                cellValue = frac_lazy_reduc(frac_add(cellValue, toAdd))
 
-            cellValue = frac_reduc(cellValue)
             C[i][j] = cellValue
 
     return Matrix(C, n, p)
@@ -149,120 +333,669 @@ def matrixTranspose(A):
     """Calculate the transpose of matrix A."""
     n = A.getRowAmount()
     m = A.getColAmount()
+
+    # Columns of A have no common denominator, so use one for the whole matrix.
+    scaled = __common_denominator_rows(A)
+    if scaled is not None:
+        rows, denominator = scaled
+        result = [[rows[j][i] for j in my_range(n)] for i in my_range(m)]
+        return Matrix.fromIntegerRows(result, [denominator] * m)
+
     result = [[A.getCell(j, i) for j in my_range(n)] for i in my_range(m)]
     return Matrix(result, m, n)
 
 
-def __pivot(A):
-    """Pivot A so that largest element of each column is on the diagonal.
+def __choose_pivot(rows, k):
+    """Choose the pivot row of step k of the LUP decomposition.
+
+    Among the rows k, k+1, ... with a non-zero in column k, exact fractions
+    prefer the one of the fewest bits, which keeps the coefficients small,
+    and floats the one of the largest absolute value, which keeps the
+    rounding errors small. A column with a float in it is pivoted like a
+    float column. Return None if the whole column is zero.
+    """
+    candidates = [i for i in my_range(k, len(rows)) if rows[i][k][0] != 0]
+    if len(candidates) == 0:
+        return None
+
+    exact = True
+    for i in candidates:
+        cell = rows[i][k]
+        if not _is_integer(cell[0]) or not _is_integer(cell[1]):
+            exact = False
+            break
+
+    best = None
+    bestSize = None
+    for i in candidates:
+        cell = rows[i][k]
+        if exact:
+            size = __bit_size(cell)
+        else:
+            size = -my_abs(cell[0] * 1.0 / cell[1])
+        if best is None or size < bestSize:
+            best = i
+            bestSize = size
+    return best
+
 
-    More specifically, A is modified so that every diagonal element has a value
-    that is has at least as large absolute value as every cell below it."""
+def __LUP_decomposition(A):
+    """Calculate the LUP decomposition PA = LU of A.
+
+    This is right-looking Gaussian elimination on fractions, with the pivot
+    of each step chosen by __choose_pivot among the remaining rows. The rows
+    are swapped in place and P is kept as the permutation vector perm, row i
+    of PA being row perm[i] of A, with its sign counted swap by swap. A
+    column without a non-zero pivot is skipped, leaving a zero on the
+    diagonal of U, so singular matrices are factored too.
+    """
     n = A.getRowAmount()
 
-    # At first, P is the identity matrix.
-    P = [[(int(i == j), 1) for i in my_range(n)] for j in my_range(n)]
+    # The multipliers of L are stored below the diagonal as they are found.
+    rows = [A.getRow(i) for i in my_range(n)]
+    perm = list(my_range(n))
+    sign = 1
+
+    for k in my_range(n):
+        pivotRow = __choose_pivot(rows, k)
+        if pivotRow is None:
+            continue
+        if pivotRow != k:
+            rows[k], rows[pivotRow] = rows[pivotRow], rows[k]
+            perm[k], perm[pivotRow] = perm[pivotRow], perm[k]
+            sign = -sign
+
+        rowOfU = rows[k]
+        pivot = rowOfU[k]
+        for i in my_range(k+1, n):
+            row = rows[i]
+            if row[k][0] == 0:
+                continue
+            factor = frac_lazy_reduc(frac_div(row[k], pivot))
+            row[k] = factor
+            for j in my_range(k+1, n):
+                if rowOfU[j][0] != 0:
+                    value = frac_sub(row[j], frac_mult(factor, rowOfU[j]))
+                    row[j] = frac_lazy_reduc(value)
+
+    L = [[rows[i][j] if j < i else (int(i == j), 1) for j in my_range(n)]
+         for i in my_range(n)]
+    U = [[rows[i][j] if j >= i else (0, 1) for j in my_range(n)]
+         for i in my_range(n)]
+
+    return LUPFactorization(Matrix(L, n, n), Matrix(U, n, n), perm, sign)
+
+
+def __bit_size(frac):
+    """Return the size of a fraction in bits."""
+    return my_abs(frac[0]).bit_length() + my_abs(frac[1]).bit_length()
+
+
+def __pivot_size(frac):
+    """Return the tie-break key of a pivot, the smaller the better.
+
+    Exact pivots are ranked by their size in bits. Inexact (float) pivots
+    have no bit size; the biggest magnitude is the most stable one.
+    """
+    if _is_integer(frac[0]) and _is_integer(frac[1]):
+        return __bit_size(frac)
+    return -abs(frac[0] * 1.0 / frac[1])
+
+
+def __markowitz_pivot(rows, cols, buckets):
+    """Choose the next pivot of the sparse LU with the Markowitz criterion.
+
+    buckets[c] is the set of active columns with c non-zeros. Among the (at
+    most four) active columns with the fewest non-zeros, pick the non-zero
+    (i, j) that minimizes (r_i - 1)(c_j - 1), where r_i and c_j count the
+    non-zeros of its row and column. Ties prefer the cell with the smallest
+    bit size, or the biggest magnitude for floats, see __pivot_size. Return
+    None if no non-zero is left.
+    """
+    candidates = []
+    count = 1
+    while len(candidates) < 4 and count < len(buckets):
+        for j in buckets[count]:
+            candidates.append((count, j))
+            if len(candidates) == 4:
+                break
+        count += 1
+
+    best = None
+    bestKey = None
+    for count, j in candidates:
+        for i in cols[j]:
+            key = ((len(rows[i]) - 1) * (count - 1), __pivot_size(rows[i][j]))
+            if best is None or key < bestKey:
+                best = (i, j)
+                bestKey = key
+    return best
+
+
+def __sparse_LU_decomposition(A):
+    """Calculate the sparse LU factorization PAQ = LU of A.
+
+    The sparsity pattern is checked first: if the rows and columns have no
+    perfect matching, every term of the determinant vanishes and A is
+    structurally singular, so no arithmetic is done at all. Otherwise the
+    pivots are chosen with the Markowitz criterion to limit fill-in, and only
+    the non-zero cells are ever touched.
+    """
+    n = A.getRowAmount()
+    rows = [dict(A.getSparseRow(i)) for i in my_range(n)]
 
-    # Needed for calculating the determinant of P.
-    totalPivots = 0
+    matching = bipartite_matching([list(row) for row in rows], n)
+    if -1 in matching:
+        return SparseLUFactorization(n, [], [], [], [], True)
 
-    # Iterate through columns.
+    # cols[j] is the set of active rows with a non-zero on column j.
+    cols = [set() for j in my_range(n)]
+    for i in my_range(n):
+        for j in rows[i]:
+            cols[j].add(i)
+    # The active columns by their amount of non-zeros, so choosing a pivot
+    # does not scan every column.
+    buckets = [set() for count in my_range(n + 1)]
     for j in my_range(n):
-        greatest = (0, 1)
-        swapWith = j
+        buckets[len(cols[j])].add(j)
+
+    rowOrder = []
+    colOrder = []
+    lower = []
+    upper = []
+    for step in my_range(n):
+        pivotPosition = __markowitz_pivot(rows, cols, buckets)
+
+        # Everything cancelled out, A is singular.
+        if pivotPosition is None:
+            break
+
+        i, j = pivotPosition
+        pivotRow = rows[i]
+        pivot = pivotRow[j]
+        # Only the columns of the pivot row change their counts.
+        counts = dict([(col, len(cols[col])) for col in pivotRow])
+        for col in pivotRow:
+            cols[col].discard(i)
+
+        # Eliminate column j from every other active row.
+        factors = {}
+        for r in cols[j]:
+            row = rows[r]
+            factor = frac_lazy_reduc(frac_div(row[j], pivot))
+            factors[r] = factor
+            del row[j]
+
+            for col in pivotRow:
+                if col == j:
+                    continue
+                toSub = frac_mult(factor, pivotRow[col])
+                value = frac_lazy_reduc(frac_sub(row.get(col, (0, 1)),
+                                                 toSub))
+                if value[0] == 0:
+                    if col in row:
+                        del row[col]
+                        cols[col].discard(r)
+                else:
+                    if col not in row:
+                        cols[col].add(r)
+                    row[col] = value
+        cols[j] = set()
+        for col in counts:
+            buckets[counts[col]].discard(col)
+            if col != j:
+                buckets[len(cols[col])].add(col)
+
+        rowOrder.append(i)
+        colOrder.append(j)
+        lower.append(factors)
+        upper.append(pivotRow)
+
+    return SparseLUFactorization(n, rowOrder, colOrder, lower, upper)
+
+
+def __sparse_solve(factorization, b):
+    """Solve Ax = b for a vector b of fractions, given A's sparse LU."""
+    b = list(b)
+
+    # Apply the elimination steps to b.
+    for k in my_range(len(factorization.rowOrder)):
+        value = b[factorization.rowOrder[k]]
+        if value[0] == 0:
+            continue
+        factors = factorization.lower[k]
+        for r in factors:
+            b[r] = frac_lazy_reduc(frac_sub(b[r],
+                                            frac_mult(factors[r], value)))
+
+    # Back substitution in reversed elimination order.
+    x = [(0, 1) for i in my_range(factorization.n)]
+    for k in my_reversed(my_range(len(factorization.rowOrder))):
+        j = factorization.colOrder[k]
+        pivotRow = factorization.upper[k]
+        value = b[factorization.rowOrder[k]]
+        for col in pivotRow:
+            if col != j and x[col][0] != 0:
+                value = frac_sub(value, frac_mult(pivotRow[col], x[col]))
+        x[j] = frac_lazy_reduc(frac_div(value, pivotRow[j]))
+    return x
+
+
+def __sparse_inverse(factorization):
+    """Invert a nonsingular sparse matrix column by column."""
+    n = factorization.n
+    rows = [{} for i in my_range(n)]
+    for col in my_range(n):
+        unit = [(int(i == col), 1) for i in my_range(n)]
+        x = __sparse_solve(factorization, unit)
+        for i in my_range(n):
+            if x[i][0] != 0:
+                rows[i][col] = x[i]
+    return SparseMatrix(rows, n, n)
+
+
+def matrixFactorization(A):
+    """Return the LUP factorization of the square matrix A.
+
+    The factorization is computed at most once and cached in A, so the
+    determinant, the inverse and the solvers of the same matrix share it.
+    A SparseMatrix gets a SparseLUFactorization. Return None if A is not
+    square.
+    """
+    if A.getRowAmount() != A.getColAmount():
+        return None
 
-        # We don't have to care about column values above the diagonal.
-        for row in my_range(j+1, n):
-            if frac_ge(frac_abs(A.getCell(row, j)), greatest):
-                greatest = frac_abs(A.getCell(row, j))
-                swapWith = row
+    if A.factorization is None:
+        if isinstance(A, SparseMatrix):
+            A.factorization = __sparse_LU_decomposition(A)
+        else:
+            A.factorization = __LUP_decomposition(A)
+    return A.factorization
 
-        # True if we need to swap rows.
-        if swapWith != j:
-            # Swap rows so that the greatest element is now on the diagonal.
-            P[j], P[swapWith] = P[swapWith], P[j]
-            totalPivots += 1
 
-    return (Matrix(P, n, n), totalPivots)
+def matrixStructure(A):
+    """Return the Structure of the square matrix A, see structure.py.
 
+    The non-zeros are scanned once, when A is first analysed, and the result
+    is cached in A; str() of it tells which specialised path the determinant,
+    the inverse and solve take. Return None if A is sparse, not square or not
+    exact.
+    """
+    if isinstance(A, SparseMatrix):
+        return None
+    if A.structure is None:
+        A.structure = scanStructure(A)
+    return A.structure
 
-def __LUP_decomposition(A):
-    """Calculate the LUP decomposition of A."""
+
+def __structured_determinant(A, structure):
+    """Calculate the determinant of a structured exact matrix A.
+
+    A permutation matrix costs the sign of the permutation, a triangular one
+    the product of its diagonal and a banded one O(n * bandwidth^2).
+    """
     n = A.getRowAmount()
+    if structure.kind == "permutation":
+        return (permutation_sign(structure.permutation), 1)
 
-    # Format L and U as the zero matrix. Note that we are dealing with fractions
-    # here for 100% accuracy.
-    L = [[(0, 1) for i in my_range(n)] for j in my_range(n)]
-    U = [[(0, 1) for i in my_range(n)] for j in my_range(n)]
+    integerRows = [A.getIntegerRow(i) for i in my_range(n)]
+    denominator = 1
+    for numerators, rowDenominator in integerRows:
+        denominator *= rowDenominator
 
-    pivot_info = __pivot(A)
-    P = pivot_info[0]
+    if structure.kind == "banded":
+        det = banded_determinant([row[0] for row in integerRows],
+                                 structure.lower, structure.upper)
+    else:
+        det = 1
+        for i in my_range(n):
+            det *= integerRows[i][0][i]
 
-    # Set mult equal to the determinant of P.
-    mult = (-1) ** pivot_info[1]
+    return frac_reduc((det, denominator))
 
-    Prod = matrixMultiplication(P, A)
 
-    # We use the general algorithm described here:
-    # https://rosettacode.org/wiki/LU_decomposition to calculate cell values for
-    # U and L. There is a summation formula given for U_ij and L_ij, which is
-    # implemented here.
-    for j in my_range(n):
-        # Calculate U[i][j].
-        for i in my_range(j+1):
-            the_sum = (0, 1)
+def __band_factorization(A, structure):
+    """Eliminate the band matrix A without leaving its band.
 
-            for k in my_range(i):
-                toAdd = frac_mult(U[k][j], L[i][k])
-                the_sum = frac_add(the_sum, toAdd)
+    The rows are dicts {column: (num, den)} of the cells inside the band, so
+    a matrix with bandwidths l and u costs O(n * l * (l + u)) operations; a
+    triangular matrix is a band matrix too. A zero pivot is replaced by the
+    first non-zero below it, which widens the upper band by at most l.
 
-            the_sum = frac_reduc(the_sum)
-            # U_ij == Prod_ij - the_sum
-            U[i][j] = frac_sub(Prod.getCell(i, j), the_sum)
+    Return a tuple (rows, steps), the rows being U and steps[k] the row
+    swapped with row k on step k and the (row, multiplier) pairs of L, or
+    None if A is singular.
+    """
+    n = A.getRowAmount()
+    lower = structure.lower
+    upper = structure.upper
 
-        # Calculate L[i][j].
-        for i in my_range(j, n):
-            the_sum = (0, 1)
+    rows = []
+    for i in my_range(n):
+        row = {}
+        for j in my_range(max(0, i - lower), min(n, i + upper + 1)):
+            cell = A.getCell(i, j)
+            if cell[0] != 0:
+                row[j] = cell
+        rows.append(row)
+
+    steps = []
+    for k in my_range(n):
+        last = min(n - 1, k + lower)
+        swapWith = k
+        while swapWith <= last and rows[swapWith].get(k, (0, 1))[0] == 0:
+            swapWith += 1
+        if swapWith > last:
+            return None
+        rows[k], rows[swapWith] = rows[swapWith], rows[k]
+
+        pivotRow = rows[k]
+        pivot = pivotRow[k]
+        multipliers = []
+        for i in my_range(k + 1, last + 1):
+            row = rows[i]
+            cell = row.pop(k, (0, 1))
+            if cell[0] == 0:
+                continue
+            factor = frac_lazy_reduc(frac_div(cell, pivot))
+            for j in pivotRow:
+                if j > k:
+                    value = frac_sub(row.get(j, (0, 1)),
+                                     frac_mult(factor, pivotRow[j]))
+                    row[j] = frac_lazy_reduc(value)
+            multipliers.append((i, factor))
+        steps.append((swapWith, multipliers))
+    return (rows, steps)
+
+
+def __band_solve(factorization, b):
+    """Solve Ax = b for a vector b, given the band factorization of A."""
+    rows, steps = factorization
+    n = len(rows)
+
+    y = list(b)
+    for k in my_range(n):
+        swapWith, multipliers = steps[k]
+        y[k], y[swapWith] = y[swapWith], y[k]
+        if y[k][0] != 0:
+            for i, factor in multipliers:
+                y[i] = frac_lazy_reduc(frac_sub(y[i], frac_mult(factor, y[k])))
+
+    x = [(0, 1) for i in my_range(n)]
+    for k in my_reversed(my_range(n)):
+        value = y[k]
+        for j, cell in rows[k].items():
+            if j > k and x[j][0] != 0:
+                value = frac_sub(value, frac_mult(cell, x[j]))
+        x[k] = frac_lazy_reduc(frac_div(value, rows[k][k]))
+    return [frac_reduc(value) for value in x]
+
+
+def __structured_solver(A, structure):
+    """Return a function solving Ax = b for the structured matrix A.
+
+    The function takes and returns vectors of fractions. Return None if A is
+    singular.
+    """
+    if structure.kind == "permutation":
+        permutation = structure.permutation
+
+        def solvePermutation(b):
+            x = [None] * len(b)
+            for i in my_range(len(b)):
+                x[permutation[i]] = b[i]
+            return x
+        return solvePermutation
+
+    factorization = __band_factorization(A, structure)
+    if factorization is None:
+        return None
+    return lambda b: __band_solve(factorization, b)
+
+
+def __structured_inverse(A, structure):
+    """Invert the nonsingular structured matrix A.
+
+    The inverse of a diagonal matrix is read off in O(n) and the one of a
+    permutation matrix is its transpose. Otherwise the band factorization
+    solves for the columns of the identity.
+    """
+    n = A.getRowAmount()
+    if structure.kind == "diagonal":
+        rows = [[0] * n for i in my_range(n)]
+        denominators = []
+        for i in my_range(n):
+            numerators, denominator = A.getIntegerRow(i)
+            rows[i][i] = denominator
+            denominators.append(numerators[i])
+        return Matrix.fromIntegerRows(rows, denominators)
+
+    if structure.kind == "permutation":
+        rows = [[0] * n for i in my_range(n)]
+        for i in my_range(n):
+            rows[structure.permutation[i]][i] = 1
+        return Matrix.fromIntegerRows(rows)
+
+    solver = __structured_solver(A, structure)
+    columns = []
+    for a in my_range(n):
+        e = [(0, 1) for i in my_range(n)]
+        e[a] = (1, 1)
+        columns.append(solver(e))
+    return Matrix([[columns[j][i] for j in my_range(n)]
+                   for i in my_range(n)], n, n)
+
+
+def __lcm(n, m):
+    """Calculate the least common multiple of n and m."""
+    return my_abs(n) // fast_gcd(n, m) * my_abs(m)
+
+
+def __bareiss(rows):
+    """Calculate the determinant of a square integer matrix given as rows.
+
+    Bareiss' fraction-free elimination keeps every intermediate value an
+    integer: after step k each entry is a (k+1)x(k+1) minor of the input, so the
+    coefficients never grow past the Hadamard bound. The rows are modified in
+    place. For more information, see for example
+    https://en.wikipedia.org/wiki/Bareiss_algorithm
+    """
+    n = len(rows)
+    sign = 1
+    previous = 1
+
+    for k in my_range(n - 1):
+        # Find a non-zero pivot. If there is none, the matrix is singular.
+        if rows[k][k] == 0:
+            swapWith = k
+            for i in my_range(k+1, n):
+                if rows[i][k] != 0:
+                    swapWith = i
+                    break
+            if swapWith == k:
+                return 0
+            rows[k], rows[swapWith] = rows[swapWith], rows[k]
+            sign = -sign
+
+        pivotRow = rows[k]
+        pivot = pivotRow[k]
+
+        for i in my_range(k+1, n):
+            row = rows[i]
+            factor = row[k]
+            for j in my_range(k+1, n):
+                # The division is always exact.
+                row[j] = (pivot * row[j] - factor * pivotRow[j]) // previous
+
+        previous = pivot
+
+    return sign * rows[n-1][n-1]
+
+
+def __exact_determinant(A, method, workers=1):
+    """Calculate the exact determinant of A as a reduced fraction.
+
+    Keyword arguments:
+    A       -- a square matrix
+    method  -- "auto" or "bareiss" for fraction-free elimination, "modular"
+               for multi-modular elimination and "lup" for the LUP
+               decomposition
+    workers -- the amount of processes for the fraction-free elimination,
+               1 for a serial one, see parallel.py
+
+    Return None if A does not consist of exact fractions or if method is "lup".
+    """
+    if method not in ["auto", "bareiss", "modular", "lup"]:
+        raise ValueError("Unknown determinant method: " + str(method))
+    if method == "lup":
+        return None
 
-            for k in my_range(j):
-                toAdd = frac_mult(L[i][k], U[k][j])
-                the_sum = frac_add(the_sum, toAdd)
+    # Reuse a determinant that is already known.
+    if method == "auto" and A.determinant is not None:
+        return A.determinant
+
+    # Sparse matrices use the sparse LU, which is exact as well.
+    # The exactness check looks at the stored non-zeros only, getIntegerRows
+    # would expand every row.
+    if method == "auto" and isinstance(A, SparseMatrix):
+        if not A.isExact():
+            return None
+        A.determinant = matrixFactorization(A).determinant()
+        return A.determinant
+
+    # Diagonal, triangular, permutation and banded matrices have cheaper
+    # algorithms.
+    if method == "auto":
+        structure = matrixStructure(A)
+        if structure is not None and structure.isSpecial():
+            A.determinant = __structured_determinant(A, structure)
+            return A.determinant
+
+    scaled = A.getIntegerRows()
+    if scaled is None:
+        return None
 
-            the_sum = frac_reduc(the_sum)
-            L[i][j] = frac_sub(Prod.getCell(i, j), the_sum)
-            L[i][j] = frac_div(L[i][j], U[j][j])
+    rows, denominator = scaled
+    if method == "modular":
+        det = modular_determinant(rows)
+    elif useParallel(len(rows), workers):
+        det = parallelBareiss(rows, workers)
+    else:
+        det = __bareiss(rows)
 
-    L = Matrix(L, n, n)
-    U = Matrix(U, n, n)
+    # Reduce with integer division only, the numerator may be huge.
+    syt = fast_gcd(det, denominator)
+    A.determinant = (det // syt, denominator // syt)
+    return A.determinant
 
-    return (L, U, P, mult)
 
+def __frac_to_number(frac):
+    """Convert a fraction to an int if possible, otherwise to a float.
 
-def matrixDeterminant(A):
-    """Calculate the determinant of matrix A."""
+    The int is exact however big it is. True division of integers rounds
+    correctly even if the numerator or denominator does not fit into a float.
+    """
+    if frac[1] == 1:
+        return frac[0]
+    try:
+        return frac[0] / frac[1]
+    except OverflowError:
+        if (frac[0] < 0) != (frac[1] < 0):
+            return float("-inf")
+        return float("inf")
+
+
+def matrixDeterminantFraction(A, method="auto", workers=1):
+    """Calculate the determinant of matrix A as a reduced fraction.
+
+    Return None if A is not square or does not consist of exact fractions. See
+    matrixDeterminant for the available methods and workers.
+    """
 
     # Determinant is undefined for non-square matrices.
     if A.getRowAmount() != A.getColAmount():
         return None
 
-    # Decompose the matrix. Return value is (L, U, P, mult).
-    decomposition = __LUP_decomposition(A)
+    return __exact_determinant(A, method, workers)
+
 
-    U = decomposition[1]
+def matrixDeterminantSign(A):
+    """Return the sign (1, -1 or 0) of the determinant of matrix A.
+
+    A certified floating-point filter decides the sign whenever its error
+    bound allows, and only otherwise the exact determinant is computed. Return
+    None if A is not square.
+    """
+    if A.getRowAmount() != A.getColAmount():
+        return None
+
+    # The filter works on dense rows; sparse matrices go straight to the
+    # sparse LU.
+    scaled = None
+    if not isinstance(A, SparseMatrix):
+        scaled = A.getIntegerRows()
+    if scaled is not None:
+        sign = certifiedSign(scaled[0])
+        if sign is not None:
+            return sign
+
+    det = matrixDeterminant(A)
+    if det > 0:
+        return 1
+    if det < 0:
+        return -1
+    return 0
+
+
+def matrixDeterminant(A, method="auto", workers=1):
+    """Calculate the determinant of matrix A.
+
+    Keyword arguments:
+    A       -- the matrix
+    method  -- "auto" or "bareiss" for fraction-free elimination, "modular"
+               for multi-modular elimination with Chinese remaindering and
+               "lup" for the LUP decomposition. Matrices that do not consist
+               of exact fractions always use the LUP decomposition.
+    workers -- the amount of processes sharing the fraction-free
+               elimination, 1 (the default) for none.
+               parallel.defaultWorkers() is one per core. Matrices smaller
+               than parallel.PARALLEL_MIN_SIZE are always eliminated serially.
+    """
+
+    # Determinant is undefined for non-square matrices.
+    if A.getRowAmount() != A.getColAmount():
+        return None
+
+    det = __exact_determinant(A, method, workers)
+    if det is not None:
+        return __frac_to_number(det)
+
+    # Inexact sparse matrices are decomposed densely.
+    if isinstance(A, SparseMatrix):
+        A = A.toMatrix()
+
+    # Decompose the matrix, or reuse the cached decomposition.
+    decomposition = matrixFactorization(A)
+
+    U = decomposition.U
 
     # The determinant is the product of U's diagonal values.
     ans = (1, 1)
     for i in my_range(U.getRowAmount()):
         ans = frac_mult(ans, U.getCell(i, i))
-        ans = frac_reduc(ans)
+        ans = frac_lazy_reduc(ans)
 
     # If the determinant is zero, ans[1] might also be zero so we treat this
     # case separately.
     if ans[1] == 0:
         return 0
 
-    det_of_P = decomposition[3]
-    det = ans[0] * det_of_P * 1.0 / ans[1]
+    det_of_P = decomposition.sign
+    ans = frac_reduc((ans[0] * det_of_P, ans[1]))
+    if _is_integer(ans[0]) and _is_integer(ans[1]):
+        return __frac_to_number(ans)
+
+    det = ans[0] * 1.0 / ans[1]
     if det // 1 == det:
         return int(det)
     return det
@@ -292,12 +1025,11 @@ def __forward_substitution(L):
 
             for i in my_range(x):
                 toAdd = frac_mult(L.getCell(x, i), xVector[i])
-                the_sum = frac_add(the_sum, toAdd)
+                the_sum = frac_lazy_reduc(frac_add(the_sum, toAdd))
 
-            the_sum = frac_reduc(the_sum)
             value = frac_sub(bVector[x], the_sum)
             value = frac_mult(value, L.getCell(x, x))
-            value = frac_reduc(value)
+            value = frac_lazy_reduc(value)
             xVector.append(value)
 
         # xVector is now the a:th column of L's inverse.
@@ -326,12 +1058,11 @@ def __backward_substitution(U):
 
             for i in my_reversed(my_range(x+1, m)):
                 toAdd = frac_mult(U.getCell(x, i), xVector[m-1 - i])
-                the_sum = frac_add(the_sum, toAdd)
+                the_sum = frac_lazy_reduc(frac_add(the_sum, toAdd))
 
-            the_sum = frac_reduc(the_sum)
             value = frac_sub(bVector[x], the_sum)
             value = frac_div(value, U.getCell(x, x))
-            value = frac_reduc(value)
+            value = frac_lazy_reduc(value)
             xVector.append(value)
 
         for i in my_range(m):
@@ -340,25 +1071,348 @@ def __backward_substitution(U):
     return Matrix(inverse, m, m)
 
 
+def __gauss_jordan_inverse(A):
+    """Invert the exact square matrix A with one fraction-free sweep.
+
+    With the integer rows M, A = D^-1 M for the diagonal D of the row
+    denominators, so A^-1 = adj(M) D / det(M). The adjugate and det(M) come
+    from integer_matrix.adjugate_determinant, and each row of the result is
+    reduced once. The determinant of A is cached on the way. Return None if
+    A is singular.
+    """
+    n = A.getRowAmount()
+    rows = []
+    denominators = []
+    for i in my_range(n):
+        numerators, denominator = A.getIntegerRow(i)
+        rows.append(numerators)
+        denominators.append(denominator)
+
+    adjugate, det = adjugate_determinant(rows)
+    denominator = 1
+    for d in denominators:
+        denominator *= d
+    A.determinant = frac_reduc((det, denominator))
+    if det == 0:
+        return None
+
+    return Matrix.fromIntegerRows(
+        [[x * d for x, d in zip(row, denominators)] for row in adjugate],
+        [det] * n)
+
+
 def matrixInverse(A):
-    """Invert matrix A."""
-    # Inverse not defined iff the determinant is zero.
-    if matrixDeterminant(A) == 0:
+    """Invert matrix A.
+
+    Exact matrices are inverted by a fraction-free Gauss-Jordan sweep that
+    gives the determinant too. Floats go through the LUP factorization, and
+    diagonal, triangular, permutation and banded matrices through the paths
+    of matrixStructure. The inverse is cached in A.inverse and a copy is
+    returned, so the cache can not be modified.
+    """
+    # Inverse only defined for square matrices.
+    if A.getRowAmount() != A.getColAmount():
+        return None
+
+    if not isinstance(A, SparseMatrix) and A.inverse is not None:
+        return A.inverse.copy()
+
+    structure = matrixStructure(A)
+    if structure is not None and structure.isSpecial():
+        if matrixDeterminantFraction(A)[0] == 0:
+            return None
+        A.inverse = __structured_inverse(A, structure)
+        return A.inverse.copy()
+
+    if not isinstance(A, SparseMatrix) and A.getIntegerRows() is not None:
+        if A.determinant is not None and A.determinant[0] == 0:
+            return None
+        A.inverse = __gauss_jordan_inverse(A)
+        if A.inverse is None:
+            return None
+        return A.inverse.copy()
+
+    # Inverse not defined iff the determinant is zero. This reuses the cached
+    # determinant or factorization when there is one.
+    if isSingular(A):
         return None
 
-    # Calculate the LUP decomposition of A. PA = LU
-    decomposition = __LUP_decomposition(A)
+    if isinstance(A, SparseMatrix):
+        decomposition = matrixFactorization(A)
+        if decomposition.inverse is None:
+            decomposition.inverse = __sparse_inverse(decomposition)
+        return decomposition.inverse.copy()
+
+    # Calculate the LUP decomposition of A, PA = LU, or reuse it.
+    decomposition = matrixFactorization(A)
 
     # Invert L using forward substitution.
-    L_inv = __forward_substitution(decomposition[0])
+    L_inv = __forward_substitution(decomposition.L)
     # Invert U using forward substitution.
-    U_inv = __backward_substitution(decomposition[1])
-
-    P = decomposition[2]
+    U_inv = __backward_substitution(decomposition.U)
 
     # PA = LU
     # -> (PA)^-1 = (LU)^-1
     # -> A^-1 * P^-1 = U^-1 * L^-1
     # -> A^-1 = U^-1 * L^-1 * P
     C = matrixMultiplication(U_inv, L_inv)
-    return matrixMultiplication(C, P)
+
+    # Multiplying by P moves column i of C to column perm[i].
+    perm = decomposition.permutation
+    inverse = []
+    for r in my_range(C.getRowAmount()):
+        row = C.getRow(r)
+        permuted = [None] * len(row)
+        for i in my_range(len(row)):
+            permuted[perm[i]] = row[i]
+        inverse.append(permuted)
+    A.inverse = Matrix(inverse, C.getRowAmount(), C.getColAmount())
+
+    return A.inverse.copy()
+
+
+def __LUP_solve(decomposition, b):
+    """Solve Ax = b for a vector b of fractions, given PA = LU.
+
+    Forward substitution solves Ly = Pb and backward substitution Ux = y.
+    """
+    L = decomposition.L
+    U = decomposition.U
+    n = L.getRowAmount()
+    perm = decomposition.permutation
+
+    y = []
+    for i in my_range(n):
+        rowOfL = L.getRow(i)
+        value = b[perm[i]]
+        for j in my_range(i):
+            if rowOfL[j][0] != 0 and y[j][0] != 0:
+                value = frac_sub(value, frac_mult(rowOfL[j], y[j]))
+        y.append(frac_lazy_reduc(value))
+
+    x = [(0, 1) for i in my_range(n)]
+    for i in my_reversed(my_range(n)):
+        rowOfU = U.getRow(i)
+        value = y[i]
+        for j in my_range(i+1, n):
+            if rowOfU[j][0] != 0 and x[j][0] != 0:
+                value = frac_sub(value, frac_mult(rowOfU[j], x[j]))
+        x[i] = frac_lazy_reduc(frac_div(value, rowOfU[i]))
+    return x
+
+
+def solve(A, B):
+    """Solve the linear system AX = B for X.
+
+    Every column of B is a right hand side. A is factored once (the cached
+    factorization is reused), and each column then costs one forward and one
+    backward substitution, so k right hand sides cost O(n^3 + k*n^2) instead
+    of a full inversion.
+
+    Diagonal, triangular, permutation and banded matrices (see
+    matrixStructure) are solved without the LUP factorization, a band matrix
+    in O(n * bandwidth^2 + k*n*bandwidth). A cached inverse, e.g. one kept
+    current by Matrix.replaceRow, is used instead of refactoring A:
+    X = A^-1 B costs O(k*n^2).
+
+    Return the exact solution X as a Matrix, or None if A is singular or the
+    sizes do not match.
+    """
+    n = A.getRowAmount()
+    if n != A.getColAmount() or B.getRowAmount() != n:
+        return None
+
+    structure = matrixStructure(A)
+    if structure is not None and structure.isSpecial():
+        solver = __structured_solver(A, structure)
+        if solver is None:
+            return None
+        columns = [solver(B.getCol(col)) for col in my_range(B.getColAmount())]
+        return Matrix([[column[i] for column in columns]
+                       for i in my_range(n)], n, B.getColAmount())
+
+    if not isinstance(A, SparseMatrix) and A.factorization is None and \
+            A.inverse is not None:
+        return matrixMultiplication(A.inverse, B)
+
+    decomposition = matrixFactorization(A)
+
+    # The pivots are chosen at every step, so a zero pivot means that A is
+    # singular.
+    if decomposition.isSingular():
+        return None
+
+    k = B.getColAmount()
+    X = [[(0, 1) for j in my_range(k)] for i in my_range(n)]
+    for col in my_range(k):
+        b = B.getCol(col)
+        if isinstance(A, SparseMatrix):
+            x = __sparse_solve(decomposition, b)
+        else:
+            x = __LUP_solve(decomposition, b)
+        for i in my_range(n):
+            X[i][col] = x[i]
+
+    return Matrix(X, n, k)
+
+
+def isSingular(A, probabilistic=False):
+    """Find out if the square matrix A is singular.
+
+    A certified floating-point filter answers first whenever its error bound
+    allows. Otherwise the determinant is computed modulo one random word-sized
+    prime. If it is non-zero, A is certainly nonsingular. Otherwise A is
+    probably singular: with probabilistic=True that answer is returned as is,
+    and otherwise the exact determinant decides. Return None if A is not
+    square.
+    """
+    if A.getRowAmount() != A.getColAmount():
+        return None
+
+    # Reuse what is already known about A.
+    if A.determinant is not None:
+        return A.determinant[0] == 0
+    if A.factorization is not None:
+        return A.factorization.isSingular()
+
+    structure = matrixStructure(A)
+    if structure is not None and structure.isSpecial():
+        return matrixDeterminantFraction(A)[0] == 0
+
+    # The sparse LU decides exactly, and often structurally.
+    if isinstance(A, SparseMatrix):
+        det = matrixDeterminantFraction(A)
+        if det is None:
+            return matrixDeterminant(A) == 0
+        return det[0] == 0
+
+    scaled = A.getIntegerRows()
+    if scaled is None:
+        return matrixDeterminant(A) == 0
+
+    rows = scaled[0]
+    sign = certifiedSign(rows)
+    if sign is not None:
+        return sign == 0
+
+    if not probably_singular(rows):
+        return False
+    if probabilistic:
+        return True
+    return modular_determinant(rows) == 0
+
+
+def __has_full_rank_modular(rows):
+    """Find out cheaply if an integer matrix certainly has full rank.
+
+    Only matrices with entries bigger than a machine word are checked modulo
+    a random prime: their exact elimination is slow because of the growing
+    integers, while the modular one is not. Return False if the matrix is
+    small or probably rank deficient.
+    """
+    if len(rows) == 0 or len(rows[0]) == 0:
+        return False
+    largest = max([max([my_abs(x) for x in row]) for row in rows])
+    if largest.bit_length() <= WORD_BITS:
+        return False
+    return not probably_rank_deficient(rows)
+
+
+def matrixRank(A):
+    """Calculate the rank of matrix A.
+
+    Works for any shape. Return None if A does not consist of exact fractions.
+    """
+    n = A.getRowAmount()
+
+    # A square matrix with a known non-zero determinant has full rank.
+    if n == A.getColAmount() and A.determinant is not None and \
+            A.determinant[0] != 0:
+        return n
+
+    scaled = A.getIntegerRows()
+    if scaled is None:
+        return None
+
+    # Scaling the rows by their denominators does not change the rank.
+    rows = scaled[0]
+    if __has_full_rank_modular(rows):
+        return min(n, A.getColAmount())
+    return len(echelon_basis(rows)[0])
+
+
+def isRankDeficient(A):
+    """Find out if A has less than full rank, i.e. rank < min(rows, columns).
+
+    For a square matrix this is the same as being singular. The shorter of the
+    row and column vectors are reduced one at a time, and the elimination
+    stops at the first vector that depends on the previous ones. Return None if
+    A does not consist of exact fractions.
+    """
+    scaled = A.getIntegerRows()
+    if scaled is None:
+        return None
+
+    vectors = scaled[0]
+    if __has_full_rank_modular(vectors):
+        return False
+    if A.getRowAmount() > A.getColAmount():
+        # Work on the columns instead, there are fewer of them.
+        vectors = [list(col) for col in zip(*vectors)]
+
+    return echelon_basis(vectors, True)[2]
+
+
+def rref(A):
+    """Calculate the reduced row echelon form of A.
+
+    Return a Matrix of the same size, or None if A does not consist of exact
+    fractions.
+    """
+    n = A.getRowAmount()
+    m = A.getColAmount()
+    scaled = A.getIntegerRows()
+    if scaled is None:
+        return None
+
+    basis, pivots = echelon_basis(scaled[0])[:2]
+    basis, pivots = reduced_basis(basis, pivots)
+
+    # Divide each row by its pivot, the remaining rows are zero.
+    rows = basis + [[0] * m for i in my_range(n - len(basis))]
+    denominators = [basis[i][pivots[i]] for i in my_range(len(basis))] + \
+        [1 for i in my_range(n - len(basis))]
+    return Matrix.fromIntegerRows(rows, denominators)
+
+
+def nullSpace(A):
+    """Calculate a basis of the null space of A, i.e. of the solutions Ax = 0.
+
+    Return a Matrix whose columns are the basis vectors, or None if the null
+    space is trivial or A does not consist of exact fractions.
+    """
+    m = A.getColAmount()
+    scaled = A.getIntegerRows()
+    if scaled is None:
+        return None
+
+    basis, pivots = echelon_basis(scaled[0])[:2]
+    basis, pivots = reduced_basis(basis, pivots)
+
+    free = [j for j in my_range(m) if j not in pivots]
+    if len(free) == 0:
+        return None
+
+    # For free column f: x_f = 1 and x_p = -b[f] / b[p] for each basis row b
+    # with pivot p.
+    columns = []
+    for f in free:
+        column = [(0, 1) for j in my_range(m)]
+        column[f] = (1, 1)
+        for i in my_range(len(basis)):
+            p = pivots[i]
+            column[p] = frac_reduc((-basis[i][f], basis[i][p]))
+        columns.append(column)
+
+    rows = [[columns[k][j] for k in my_range(len(free))] for j in my_range(m)]
+    return Matrix(rows, m, len(free))
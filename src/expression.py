@@ -0,0 +1,391 @@
+from .my_algorithms import my_range, fast_gcd, my_abs
+from .Matrix import Matrix, _is_integer
+from .integer_matrix import integer_product
+from .calculator import matrixAddition, matrixMultiplication, matrixTranspose
+
+
+def _lcm(n, m):
+    """Calculate the least common multiple of n and m."""
+    return my_abs(n) // fast_gcd(n, m) * my_abs(m)
+
+
+def _scalar(value):
+    """Turn a scalar into a (num, den) tuple, or return None if not a scalar."""
+    if isinstance(value, tuple) and len(value) == 2:
+        return value
+    if _is_integer(value) or isinstance(value, float):
+        return (value, 1)
+    return None
+
+
+def _frac_mult(frac_a, frac_b):
+    """Multiply two scalars, reducing them if they are exact."""
+    numerator = frac_a[0] * frac_b[0]
+    denominator = frac_a[1] * frac_b[1]
+    if not _is_integer(numerator) or not _is_integer(denominator):
+        return (numerator, denominator)
+    syt = fast_gcd(numerator, denominator)
+    if syt == 0:
+        syt = 1
+    return (numerator // syt, denominator // syt)
+
+
+def toExpression(value):
+    """Return value as an Expression, or None if it is not a matrix."""
+    if isinstance(value, Expression):
+        return value
+    if hasattr(value, "getIntegerRow"):
+        return Leaf(value)
+    return None
+
+
+class Expression(object):
+    """A lazily evaluated matrix expression.
+
+    The operators + - * @ and .T of Matrix and Expression build a tree of
+    Leaf, Sum and Product nodes instead of computing anything. On the way,
+    scalars are folded into the coefficients of sums, nested sums are merged
+    into one and transposes are pushed down to the leaves. evaluate() then
+    computes the whole expression over integer rows, with products reordered
+    by cost, and reduces each row of the result once.
+
+    For example (A + B) @ C - 2*D is the sum 1*((A + B) @ C) + (-2)*D.
+
+    A node defines evaluateEagerly(), which evaluates it with the matrix
+    functions of calculator, one at a time; this is the fallback for matrices
+    that are not exact. Nodes that can be computed over integer rows also
+    define rowForm().
+    """
+
+    __slots__ = ["rowAmount", "colAmount"]
+
+    def getRowAmount(self):
+        """Return the amount of rows of the result."""
+        return self.rowAmount
+
+    def getColAmount(self):
+        """Return the amount of columns of the result."""
+        return self.colAmount
+
+    def terms(self):
+        """Return the expression as a list of (coefficient, node) terms."""
+        return [((1, 1), self)]
+
+    def factors(self):
+        """Return the expression as a list of factors of a product."""
+        return [self]
+
+    def transposed(self):
+        """Return the transpose of the expression.
+
+        By default the expression is evaluated and its value transposed.
+        """
+        return Leaf(self.evaluate(), True)
+
+    @property
+    def T(self):
+        """The transpose of the expression."""
+        return self.transposed()
+
+    def __add__(self, other):
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        if self.rowAmount != other.rowAmount or \
+                self.colAmount != other.colAmount:
+            raise ValueError("cannot add a %dx%d and a %dx%d matrix" % (
+                self.rowAmount, self.colAmount, other.rowAmount,
+                other.colAmount))
+        return Sum(self.terms() + other.terms())
+
+    def __radd__(self, other):
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        return other.__add__(self)
+
+    def __neg__(self):
+        return self.scaled((-1, 1))
+
+    def __sub__(self, other):
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        return self.__add__(other.scaled((-1, 1)))
+
+    def __rsub__(self, other):
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        return other.__add__(self.scaled((-1, 1)))
+
+    def scaled(self, scalar):
+        """Return the expression multiplied by a (num, den) scalar."""
+        return Sum([(_frac_mult(scalar, coefficient), node)
+                    for coefficient, node in self.terms()])
+
+    def __mul__(self, other):
+        scalar = _scalar(other)
+        if scalar is not None:
+            return self.scaled(scalar)
+        return self.__matmul__(other)
+
+    def __rmul__(self, other):
+        scalar = _scalar(other)
+        if scalar is not None:
+            return self.scaled(scalar)
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        return other.__matmul__(self)
+
+    def __matmul__(self, other):
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        if self.colAmount != other.rowAmount:
+            raise ValueError("cannot multiply a %dx%d and a %dx%d matrix" % (
+                self.rowAmount, self.colAmount, other.rowAmount,
+                other.colAmount))
+
+        # Pull the scalars of single terms out of the product.
+        coefficient = (1, 1)
+        factors = []
+        for operand in (self, other):
+            terms = operand.terms()
+            if len(terms) == 1:
+                coefficient = _frac_mult(coefficient, terms[0][0])
+                factors.extend(terms[0][1].factors())
+            else:
+                factors.append(operand)
+
+        product = Product(factors)
+        if coefficient == (1, 1):
+            return product
+        return Sum([(coefficient, product)])
+
+    def __rmatmul__(self, other):
+        other = toExpression(other)
+        if other is None:
+            return NotImplemented
+        return other.__matmul__(self)
+
+    def rowForm(self):
+        """Evaluate into a tuple (rows, denominators) of integer rows.
+
+        Row i of the value is rows[i] / denominators[i]. The rows are not
+        reduced. Return None if some matrix is not exact, or by default, in
+        which case evaluate() uses evaluateEagerly().
+        """
+        return None
+
+    def evaluate(self):
+        """Compute the value of the expression as a new Matrix."""
+        form = self.rowForm()
+        if form is None:
+            return self.evaluateEagerly()
+        rows, denominators = form
+        if self.rowAmount == 0:
+            return Matrix.fromBuffers([], [], 0, self.colAmount)
+        return Matrix.fromIntegerRows(rows, denominators)
+
+    def __str__(self):
+        """Print the value of the expression."""
+        return self.evaluate().__str__()
+
+
+class Leaf(Expression):
+    """A matrix, possibly transposed, in an expression."""
+
+    __slots__ = ["matrix", "isTransposed"]
+
+    def __init__(self, matrix, isTransposed=False):
+        self.matrix = matrix
+        self.isTransposed = isTransposed
+        if isTransposed:
+            self.rowAmount = matrix.getColAmount()
+            self.colAmount = matrix.getRowAmount()
+        else:
+            self.rowAmount = matrix.getRowAmount()
+            self.colAmount = matrix.getColAmount()
+
+    def transposed(self):
+        return Leaf(self.matrix, not self.isTransposed)
+
+    def rowForm(self):
+        rows = []
+        denominators = []
+        for i in my_range(self.matrix.getRowAmount()):
+            integerRow = self.matrix.getIntegerRow(i)
+            if integerRow is None:
+                return None
+            rows.append(integerRow[0])
+            denominators.append(integerRow[1])
+
+        if not self.isTransposed:
+            return (rows, denominators)
+
+        # The columns need one common denominator to become rows.
+        common = 1
+        for denominator in denominators:
+            common = _lcm(common, denominator)
+        for i in my_range(len(rows)):
+            if denominators[i] != common:
+                mult = common // denominators[i]
+                rows[i] = [x * mult for x in rows[i]]
+        return ([list(col) for col in zip(*rows)], [common] * self.rowAmount)
+
+    def evaluateEagerly(self):
+        if self.isTransposed:
+            return matrixTranspose(self.matrix)
+        if isinstance(self.matrix, Matrix):
+            return self.matrix.copy()
+        # A view, see view.py.
+        return self.matrix.toMatrix()
+
+
+class Sum(Expression):
+    """A linear combination of expressions with (num, den) coefficients."""
+
+    __slots__ = ["sumTerms"]
+
+    def __init__(self, terms):
+        self.sumTerms = terms
+        self.rowAmount = terms[0][1].rowAmount
+        self.colAmount = terms[0][1].colAmount
+
+    def terms(self):
+        return self.sumTerms
+
+    def transposed(self):
+        return Sum([(coefficient, node.transposed())
+                    for coefficient, node in self.sumTerms])
+
+    def rowForm(self):
+        forms = []
+        for coefficient, node in self.sumTerms:
+            if not _is_integer(coefficient[0]) or \
+                    not _is_integer(coefficient[1]):
+                return None
+            form = node.rowForm()
+            if form is None:
+                return None
+            forms.append((coefficient, form))
+
+        # Row i is sum_t c_t * rows_t[i] / den_t[i] over a common denominator,
+        # computed without reducing anything.
+        rows = []
+        denominators = []
+        for i in my_range(self.rowAmount):
+            common = 1
+            for coefficient, form in forms:
+                common = _lcm(common, coefficient[1] * form[1][i])
+
+            row = [0] * self.colAmount
+            for coefficient, form in forms:
+                mult = coefficient[0] * (common // (coefficient[1] *
+                                                    form[1][i]))
+                if mult != 0:
+                    row = [x + mult * y for x, y in zip(row, form[0][i])]
+            rows.append(row)
+            denominators.append(common)
+        return (rows, denominators)
+
+    def evaluateEagerly(self):
+        result = None
+        for coefficient, node in self.sumTerms:
+            term = node.evaluateEagerly()
+            term.multiplyScalar(coefficient[0])
+            if coefficient[1] != 1:
+                term.multiplyScalar(1.0 / coefficient[1])
+            if result is None:
+                result = term
+            else:
+                result = matrixAddition(result, term)
+        return result
+
+
+class Product(Expression):
+    """A product of two or more expressions."""
+
+    __slots__ = ["productFactors"]
+
+    def __init__(self, factors):
+        self.productFactors = factors
+        self.rowAmount = factors[0].rowAmount
+        self.colAmount = factors[-1].colAmount
+
+    def factors(self):
+        return self.productFactors
+
+    def transposed(self):
+        return Product([factor.transposed()
+                        for factor in reversed(self.productFactors)])
+
+    def order(self):
+        """Find the cheapest order of the multiplications.
+
+        This is the classic matrix chain ordering by dynamic programming, the
+        cost of a product of an n x m and an m x p matrix being n*m*p. Return
+        split, where split[i][j] is the index after which the factors i..j
+        are best split in two.
+        """
+        factors = self.productFactors
+        k = len(factors)
+        dims = [factors[0].rowAmount] + [factor.colAmount
+                                         for factor in factors]
+
+        cost = [[0] * k for i in my_range(k)]
+        split = [[0] * k for i in my_range(k)]
+        for length in my_range(2, k + 1):
+            for i in my_range(k - length + 1):
+                j = i + length - 1
+                best = None
+                for s in my_range(i, j):
+                    c = cost[i][s] + cost[s + 1][j] + \
+                        dims[i] * dims[s + 1] * dims[j + 1]
+                    if best is None or c < best:
+                        best = c
+                        split[i][j] = s
+                cost[i][j] = best
+        return split
+
+    def rowForm(self):
+        forms = []
+        for factor in self.productFactors:
+            form = factor.rowForm()
+            if form is None:
+                return None
+            forms.append(form)
+
+        split = self.order()
+
+        def multiply(i, j):
+            if i == j:
+                return forms[i]
+            left = multiply(i, split[i][j])
+            right = multiply(split[i][j] + 1, j)
+
+            # See calculator.__compact_multiplication.
+            common = 1
+            for denominator in right[1]:
+                common = _lcm(common, denominator)
+            rowsOfRight = [row if denominator == common else
+                           [x * (common // denominator) for x in row]
+                           for row, denominator in zip(right[0], right[1])]
+            return (integer_product(left[0], rowsOfRight),
+                    [denominator * common for denominator in left[1]])
+
+        return multiply(0, len(forms) - 1)
+
+    def evaluateEagerly(self):
+        values = [factor.evaluateEagerly() for factor in self.productFactors]
+        split = self.order()
+
+        def multiply(i, j):
+            if i == j:
+                return values[i]
+            return matrixMultiplication(multiply(i, split[i][j]),
+                                        multiply(split[i][j] + 1, j))
+
+        return multiply(0, len(values) - 1)
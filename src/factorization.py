@@ -0,0 +1,116 @@
+from .my_algorithms import my_range, fast_gcd, permutation_sign
+
+
+class LUPFactorization(object):
+    """The LUP decomposition PA = LU of a square matrix.
+
+    A Matrix computes its factorization at most once and keeps it in
+    Matrix.factorization, so that the determinant, the inverse and the
+    solvers all share the same decomposition.
+    """
+
+    def __init__(self, L, U, permutation, sign):
+        """Construct a factorization.
+
+        Keyword arguments:
+        L           -- the unit lower triangular factor
+        U           -- the upper triangular factor
+        permutation -- P as a list: row i of PA is row permutation[i] of A
+        sign        -- the determinant of P, either 1 or -1
+        """
+        self.L = L
+        self.U = U
+        self.permutation = permutation
+        self.sign = sign
+
+    def scale(self, n):
+        """Update the factorization after the matrix was multiplied by n.
+
+        P(nA) = L(nU), so only the lazy scalar of U changes.
+        """
+        self.U.multiplyScalar(n)
+
+    def getPivots(self):
+        """Return the diagonal of U."""
+        return [self.U.getCell(i, i) for i in my_range(self.U.getRowAmount())]
+
+    def isSingular(self):
+        """Find out if some pivot of the factorization is zero."""
+        for pivot in self.getPivots():
+            if pivot[0] == 0:
+                return True
+        return False
+
+    def determinant(self):
+        """Return the determinant of the matrix as a reduced fraction."""
+        numerator = self.sign
+        denominator = 1
+        for pivot in self.getPivots():
+            numerator *= pivot[0]
+            denominator *= pivot[1]
+
+        if numerator == 0:
+            return (0, 1)
+
+        syt = fast_gcd(numerator, denominator)
+        return (numerator // syt, denominator // syt)
+
+
+class SparseLUFactorization(object):
+    """The sparse LU factorization PAQ = LU of a square SparseMatrix.
+
+    Step k eliminated the pivot (rowOrder[k], colOrder[k]). lower[k] maps every
+    row that was updated on that step to its multiplier and upper[k] is the
+    pivot row {column: (num, den)} at that time. If the elimination stopped
+    early, the matrix is singular.
+    """
+
+    def __init__(self, n, rowOrder, colOrder, lower, upper,
+                 structurallySingular=False):
+        """Construct a factorization.
+
+        Keyword arguments:
+        n                    -- the size of the matrix
+        rowOrder, colOrder   -- the pivot positions in elimination order
+        lower                -- the multipliers of each step
+        upper                -- the pivot rows of each step
+        structurallySingular -- True if the sparsity pattern alone already
+                                makes the matrix singular
+        """
+        self.n = n
+        self.rowOrder = rowOrder
+        self.colOrder = colOrder
+        self.lower = lower
+        self.upper = upper
+        self.structurallySingular = structurallySingular
+        self.inverse = None
+
+    def getPivots(self):
+        """Return the pivots in elimination order."""
+        return [self.upper[k][self.colOrder[k]]
+                for k in my_range(len(self.colOrder))]
+
+    def isSingular(self):
+        """Find out if the elimination stopped before the last step."""
+        return self.structurallySingular or len(self.rowOrder) < self.n
+
+    def getSign(self):
+        """Return the sign of the permutation rowOrder[k] -> colOrder[k]."""
+        target = [0 for i in my_range(self.n)]
+        for k in my_range(self.n):
+            target[self.rowOrder[k]] = self.colOrder[k]
+        return permutation_sign(target)
+
+    def determinant(self):
+        """Return the determinant of the matrix as a reduced fraction."""
+        if self.isSingular():
+            return (0, 1)
+
+        numerator = self.getSign()
+        denominator = 1
+        for pivot in self.getPivots():
+            numerator *= pivot[0]
+            denominator *= pivot[1]
+
+        syt = fast_gcd(numerator, denominator)
+        return (numerator // syt, denominator // syt)
@@ -0,0 +1,214 @@
+from __future__ import division
+from .my_algorithms import my_range
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Unit roundoff of IEEE double precision.
+UNIT_ROUNDOFF = 2.0 ** -53
+
+# Scaled values below this are too close to the subnormal range for the
+# relative error bounds to hold.
+SMALLEST_SAFE = 2.0 ** -960
+
+__statistics = {"calls": 0, "hits": 0}
+
+
+def filterStatistics():
+    """Return how often the filter has decided the sign by itself."""
+    calls = __statistics["calls"]
+    hits = __statistics["hits"]
+    rate = hits * 1.0 / calls if calls > 0 else 0.0
+    return {"calls": calls, "hits": hits, "hit_rate": rate}
+
+
+def resetFilterStatistics():
+    """Set the filter statistics back to zero."""
+    __statistics["calls"] = 0
+    __statistics["hits"] = 0
+
+
+def __scaled_rows(rows):
+    """Convert integer rows to floats, scaling every row by a power of two.
+
+    The largest value of every row is scaled into [0.5, 1], which does not
+    change the sign of the determinant. Each conversion is correctly rounded.
+    Return None if some value would lose its relative accuracy.
+    """
+    result = []
+    for row in rows:
+        bits = 0
+        for x in row:
+            if x < 0:
+                x = -x
+            if x.bit_length() > bits:
+                bits = x.bit_length()
+
+        # A zero row, the caller handles this.
+        if bits == 0:
+            return None
+
+        scale = 1 << bits
+        floatRow = []
+        for x in row:
+            value = x / scale
+            if x != 0 and abs(value) < SMALLEST_SAFE:
+                return None
+            floatRow.append(value)
+        result.append(floatRow)
+    return result
+
+
+def __lu_python(a):
+    """Factor the float matrix a with partial pivoting, in place.
+
+    Return a tuple (LU, sign, absLU) where LU holds the unit lower triangular
+    L below the diagonal and U on and above it, sign is the sign of the row
+    permutation and absLU is the matrix |L||U|. Return None on a zero pivot.
+    """
+    n = len(a)
+    sign = 1
+
+    for k in my_range(n):
+        swapWith = k
+        for i in my_range(k+1, n):
+            if abs(a[i][k]) > abs(a[swapWith][k]):
+                swapWith = i
+        if a[swapWith][k] == 0.0:
+            return None
+        if swapWith != k:
+            a[k], a[swapWith] = a[swapWith], a[k]
+            sign = -sign
+
+        pivotRow = a[k]
+        pivot = pivotRow[k]
+        for i in my_range(k+1, n):
+            row = a[i]
+            factor = row[k] / pivot
+            row[k] = factor
+            if factor != 0.0:
+                for j in my_range(k+1, n):
+                    row[j] -= factor * pivotRow[j]
+
+    absLU = [[0.0] * n for i in my_range(n)]
+    for i in my_range(n):
+        row = a[i]
+        target = absLU[i]
+        for k in my_range(i+1):
+            l = abs(row[k]) if k < i else 1.0
+            if l == 0.0:
+                continue
+            uRow = a[k]
+            for j in my_range(k, n):
+                target[j] += l * abs(uRow[j])
+
+    return (a, sign, absLU)
+
+
+def __lu_numpy(a):
+    """Like __lu_python, but vectorized with NumPy."""
+    a = numpy.array(a, dtype=float)
+    n = a.shape[0]
+    sign = 1
+
+    for k in range(n):
+        swapWith = k + int(numpy.argmax(numpy.abs(a[k:, k])))
+        if a[swapWith, k] == 0.0:
+            return None
+        if swapWith != k:
+            a[[k, swapWith]] = a[[swapWith, k]]
+            sign = -sign
+        a[k+1:, k] /= a[k, k]
+        a[k+1:, k+1:] -= numpy.outer(a[k+1:, k], a[k, k+1:])
+
+    L = numpy.tril(a, -1) + numpy.eye(n)
+    U = numpy.triu(a)
+    absLU = numpy.dot(numpy.abs(L), numpy.abs(U))
+    return (a.tolist(), sign, absLU.tolist())
+
+
+def certifiedSign(rows):
+    """Find the sign of the determinant of a square integer matrix.
+
+    The matrix is factored in floating point, PA + E = LU. By the standard
+    backward error analysis of Gaussian elimination and the correctly rounded
+    input conversion, |E| <= gamma_n |L||U| + u|A| entrywise, where u is the
+    unit roundoff and gamma_n = nu / (1 - nu). Expanding det(LU - E) column by
+    column and bounding every term with Hadamard's inequality gives
+
+        |det(PA) - prod(U_jj)| <= prod(c_j + e_j) - prod(c_j),
+
+    where c_j bounds the norm of column j of LU and e_j the one of E. The
+    floating-point evaluation of the bound is covered by a safety factor of 2.
+
+    Return 1, -1 or 0 if the sign is certain and None otherwise.
+    """
+    __statistics["calls"] += 1
+    sign = __certified_sign(rows)
+    if sign is not None:
+        __statistics["hits"] += 1
+    return sign
+
+
+def __certified_sign(rows):
+    """Implement certifiedSign without bookkeeping."""
+    n = len(rows)
+
+    # A zero row or column makes the matrix singular.
+    for row in rows:
+        if not any(row):
+            return 0
+    for j in my_range(n):
+        if not any([row[j] for row in rows]):
+            return 0
+
+    a = __scaled_rows(rows)
+    if a is None:
+        return None
+
+    # Column norms of the input, needed before the factorization overwrites a.
+    colNorms = [0.0] * n
+    for row in a:
+        for j in my_range(n):
+            colNorms[j] += row[j] * row[j]
+
+    if numpy is not None:
+        factored = __lu_numpy(a)
+    else:
+        factored = __lu_python([list(row) for row in a])
+    if factored is None:
+        return None
+    LU, sign, absLU = factored
+
+    u = UNIT_ROUNDOFF
+    gamma = n * u / (1 - n * u)
+
+    # Column norms of gamma_n |L||U| and u|A|.
+    luNorms = [0.0] * n
+    inputNorms = [0.0] * n
+    for i in my_range(n):
+        for j in my_range(n):
+            luNorms[j] += absLU[i][j] * absLU[i][j]
+    for j in my_range(n):
+        luNorms[j] = gamma * math.sqrt(luNorms[j])
+        inputNorms[j] = u / (1 - u) * math.sqrt(colNorms[j])
+
+    # ratio = prod(|U_jj| / c_j) and logSum = sum(log(1 + e_j / c_j)).
+    ratio = 1.0
+    logSum = 0.0
+    for j in my_range(n):
+        c = math.sqrt(colNorms[j]) + luNorms[j]
+        e = luNorms[j] + inputNorms[j]
+        pivot = LU[j][j]
+        if pivot < 0:
+            sign = -sign
+        ratio *= abs(pivot) / c
+        logSum += math.log1p(e / c)
+
+    errorBound = math.expm1(logSum)
+    if not ratio > 2.0 * errorBound:
+        return None
+    return sign
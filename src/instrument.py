@@ -0,0 +1,164 @@
+from . import calculator
+from . import my_algorithms
+from contextlib import contextmanager
+import sys
+import time
+
+# time.perf_counter does not exist in python2.
+__clock = getattr(time, "perf_counter", time.time)
+
+# The functions whose calls are counted, by module.
+COUNTED = [(calculator, "frac_add"), (calculator, "frac_sub"),
+           (calculator, "frac_mult"), (calculator, "frac_div"),
+           (calculator, "frac_reduc"), (my_algorithms, "my_gcd"),
+           (my_algorithms, "fast_gcd")]
+
+# The functions timed as phases, by phase name.
+PHASES = [("pivot", calculator, "__choose_pivot"),
+          ("decomposition", calculator, "__LUP_decomposition"),
+          ("sparse decomposition", calculator, "__sparse_LU_decomposition"),
+          ("forward substitution", calculator, "__forward_substitution"),
+          ("backward substitution", calculator, "__backward_substitution"),
+          ("solve", calculator, "__LUP_solve"),
+          ("inversion", calculator, "matrixInverse"),
+          ("gauss-jordan", calculator, "adjugate_determinant"),
+          ("structure scan", calculator, "matrixStructure"),
+          ("structured determinant", calculator,
+           "__structured_determinant"),
+          ("band factorization", calculator, "__band_factorization"),
+          ("structured inverse", calculator, "__structured_inverse"),
+          ("determinant", calculator, "matrixDeterminant"),
+          ("bareiss", calculator, "__bareiss"),
+          ("parallel bareiss", calculator, "parallelBareiss"),
+          ("modular determinant", calculator, "modular_determinant"),
+          ("float filter", calculator, "certifiedSign"),
+          ("multiplication", calculator, "matrixMultiplication"),
+          ("integer product", calculator, "integer_product")]
+
+# The one active profile, if any.
+__active = []
+
+
+class Profile(object):
+    """The counters and timings collected while profiling.
+
+    counts   -- calls of each counted function
+    maxBits  -- the biggest bit length of a numerator and of a denominator
+                returned by the frac_* functions
+    times    -- seconds spent in each phase, nested phases included
+    calls    -- calls of each phase
+    """
+
+    def __init__(self):
+        self.counts = dict([(name, 0) for module, name in COUNTED])
+        self.maxBits = {"numerator": 0, "denominator": 0}
+        self.times = dict([(phase, 0.0) for phase, module, name in PHASES])
+        self.calls = dict([(phase, 0) for phase, module, name in PHASES])
+
+    def report(self):
+        """Return the results as readable text."""
+        lines = ["calls:"]
+        for module, name in COUNTED:
+            lines.append("  %-22s %12d" % (name, self.counts[name]))
+        lines.append("max bits:")
+        lines.append("  %-22s %12d" % ("numerator",
+                                       self.maxBits["numerator"]))
+        lines.append("  %-22s %12d" % ("denominator",
+                                       self.maxBits["denominator"]))
+        lines.append("phases (nested phases included):")
+        for phase, module, name in PHASES:
+            if self.calls[phase] > 0:
+                lines.append("  %-22s %12d %12.6f s" % (
+                    phase, self.calls[phase], self.times[phase]))
+        return "\n".join(lines)
+
+
+def __counted(function, name, profile):
+    """Wrap a function so that its calls are counted."""
+    counts = profile.counts
+    maxBits = profile.maxBits
+
+    def wrapper(*args):
+        counts[name] += 1
+        result = function(*args)
+
+        # frac_* return (num, den) tuples, the gcds an integer.
+        if isinstance(result, tuple):
+            try:
+                bits = abs(result[0]).bit_length()
+                if bits > maxBits["numerator"]:
+                    maxBits["numerator"] = bits
+                bits = abs(result[1]).bit_length()
+                if bits > maxBits["denominator"]:
+                    maxBits["denominator"] = bits
+            except AttributeError:
+                # Floats have no bit length.
+                pass
+        return result
+    return wrapper
+
+
+def __timed(function, phase, profile):
+    """Wrap a function so that the time spent in it is added to a phase."""
+    times = profile.times
+    calls = profile.calls
+
+    def wrapper(*args, **kwargs):
+        calls[phase] += 1
+        start = __clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            times[phase] += __clock() - start
+    return wrapper
+
+
+def __replace(original, wrapper, replaced):
+    """Bind wrapper to every name of the package bound to original.
+
+    Functions are often imported with 'from ... import', so every module of
+    the package is searched. Each replacement is appended to replaced.
+    """
+    package = __name__.rsplit(".", 1)[0]
+    for moduleName, module in list(sys.modules.items()):
+        if module is None or (moduleName != package and
+                              not moduleName.startswith(package + ".")):
+            continue
+        for name, value in list(vars(module).items()):
+            if value is original:
+                setattr(module, name, wrapper)
+                replaced.append((module, name, original))
+
+
+@contextmanager
+def profile():
+    """Collect call counts, bit lengths and phase timings inside a with block.
+
+    Usage:
+
+        with profile() as p:
+            matrixInverse(A)
+        print(p.report())
+
+    The instrumented functions are swapped into the module globals only for
+    the duration of the block, so nothing is measured, and nothing costs
+    anything, outside of it. Profiles do not nest.
+    """
+    if __active:
+        raise RuntimeError("a profile is already active")
+
+    result = Profile()
+    replaced = []
+    __active.append(result)
+    try:
+        for module, name in COUNTED:
+            original = getattr(module, name)
+            __replace(original, __counted(original, name, result), replaced)
+        for phase, module, name in PHASES:
+            original = getattr(module, name)
+            __replace(original, __timed(original, phase, result), replaced)
+        yield result
+    finally:
+        for module, name, original in replaced:
+            setattr(module, name, original)
+        __active.pop()
@@ -0,0 +1,348 @@
+from .my_algorithms import my_range, fast_gcd, my_abs
+
+# Products whose smallest dimension is at most this use the blocked kernel.
+# Above it, Strassen-Winograd recursion takes over.
+STRASSEN_THRESHOLD = 128
+
+# The amount of rows of the right factor that the blocked kernel processes at
+# a time.
+BLOCK_SIZE = 64
+
+
+def __blocked_product(X, Y):
+    """Multiply integer matrices X and Y given as lists of rows.
+
+    Row i of the product is accumulated as sum_k X[i][k] * Y[k], one row of Y
+    at a time, which reads both matrices row by row. The rows of Y are taken
+    in blocks of BLOCK_SIZE, so the block stays hot while every row of X
+    uses it. Zeros of X are skipped.
+    """
+    n = len(X)
+    m = len(Y)
+    p = len(Y[0]) if m > 0 else 0
+
+    C = [[0] * p for i in my_range(n)]
+    start = 0
+    while start < m:
+        end = min(start + BLOCK_SIZE, m)
+        for i in my_range(n):
+            rowOfX = X[i]
+            result = C[i]
+            for k in my_range(start, end):
+                x = rowOfX[k]
+                if x != 0:
+                    result = [c + x * y for c, y in zip(result, Y[k])]
+            C[i] = result
+        start = end
+    return C
+
+
+def __add(X, Y):
+    """Add integer matrices X and Y."""
+    return [[x + y for x, y in zip(rowOfX, rowOfY)]
+            for rowOfX, rowOfY in zip(X, Y)]
+
+
+def __sub(X, Y):
+    """Substract integer matrix Y from X."""
+    return [[x - y for x, y in zip(rowOfX, rowOfY)]
+            for rowOfX, rowOfY in zip(X, Y)]
+
+
+def __split(X, rows, cols):
+    """Split X into quadrants at row index rows and column index cols."""
+    return ([row[:cols] for row in X[:rows]], [row[cols:] for row in X[:rows]],
+            [row[:cols] for row in X[rows:]], [row[cols:] for row in X[rows:]])
+
+
+def __pad(X, rows, cols):
+    """Pad X with zeros to the size rows x cols."""
+    width = len(X[0]) if len(X) > 0 else 0
+    padded = [row + [0] * (cols - width) for row in X]
+    for i in my_range(rows - len(X)):
+        padded.append([0] * cols)
+    return padded
+
+
+def __strassen_winograd(X, Y, threshold):
+    """Multiply X and Y with Winograd's variant of Strassen's algorithm.
+
+    The matrices are padded to even sizes and split into quadrants. Seven
+    products of quadrants and fifteen additions give the result, instead of
+    eight products. For more information, see for example
+    https://en.wikipedia.org/wiki/Strassen_algorithm
+    """
+    n = len(X)
+    m = len(Y)
+    p = len(Y[0])
+    if min(n, m, p) <= threshold:
+        return __blocked_product(X, Y)
+
+    # Pad to even sizes.
+    n2 = n + n % 2
+    m2 = m + m % 2
+    p2 = p + p % 2
+    if (n2, m2, p2) != (n, m, p):
+        X = __pad(X, n2, m2)
+        Y = __pad(Y, m2, p2)
+
+    A11, A12, A21, A22 = __split(X, n2 // 2, m2 // 2)
+    B11, B12, B21, B22 = __split(Y, m2 // 2, p2 // 2)
+
+    S1 = __add(A21, A22)
+    S2 = __sub(S1, A11)
+    S3 = __sub(A11, A21)
+    S4 = __sub(A12, S2)
+    T1 = __sub(B12, B11)
+    T2 = __sub(B22, T1)
+    T3 = __sub(B22, B12)
+    T4 = __sub(T2, B21)
+
+    P1 = __strassen_winograd(A11, B11, threshold)
+    P2 = __strassen_winograd(A12, B21, threshold)
+    P3 = __strassen_winograd(S4, B22, threshold)
+    P4 = __strassen_winograd(A22, T4, threshold)
+    P5 = __strassen_winograd(S1, T1, threshold)
+    P6 = __strassen_winograd(S2, T2, threshold)
+    P7 = __strassen_winograd(S3, T3, threshold)
+
+    U2 = __add(P1, P6)
+    U3 = __add(U2, P7)
+    U4 = __add(U2, P5)
+    C11 = __add(P1, P2)
+    C12 = __add(U4, P3)
+    C21 = __sub(U3, P4)
+    C22 = __add(U3, P5)
+
+    C = [rowOf11 + rowOf12 for rowOf11, rowOf12 in zip(C11, C12)] + \
+        [rowOf21 + rowOf22 for rowOf21, rowOf22 in zip(C21, C22)]
+
+    # Remove the padding.
+    if (n2, p2) != (n, p):
+        C = [row[:p] for row in C[:n]]
+    return C
+
+
+def integer_product(X, Y, threshold=None):
+    """Multiply integer matrices X (n x m) and Y (m x p) given as lists of rows.
+
+    Products of at most threshold (STRASSEN_THRESHOLD by default) in any
+    dimension use the blocked kernel, bigger ones Strassen-Winograd. Both give
+    the same exact result.
+    """
+    if threshold is None:
+        threshold = STRASSEN_THRESHOLD
+    if len(X) == 0 or len(Y) == 0 or len(Y[0]) == 0:
+        return [[0] * (len(Y[0]) if len(Y) > 0 else 0) for row in X]
+    return __strassen_winograd(X, Y, threshold)
+
+
+def primitive(v):
+    """Divide an integer vector by the greatest common divisor of its values."""
+    syt = 0
+    for x in v:
+        if x != 0:
+            syt = fast_gcd(syt, x)
+            if syt == 1 or syt == -1:
+                return v
+    syt = my_abs(syt)
+    if syt <= 1:
+        return v
+    return [x // syt for x in v]
+
+
+def echelon_basis(vectors, stopAtDependency=False):
+    """Reduce integer vectors one at a time into an echelon basis of their span.
+
+    Every new vector is reduced against the basis built so far, without
+    fractions: v = b[p] * v - v[p] * b for each basis vector b with pivot p,
+    keeping v primitive. A vector that reduces to zero depends on the earlier
+    ones. Each basis vector is zero at the pivots of the vectors before it.
+
+    Return a tuple (basis, pivots, dependent), where dependent tells if some
+    vector was dependent. With stopAtDependency=True the reduction stops at
+    the first dependent vector, so a dependency among the first vectors costs
+    only a few reductions.
+    """
+    basis = []
+    pivots = []
+    dependent = False
+
+    for vector in vectors:
+        v = list(vector)
+        for k in my_range(len(basis)):
+            p = pivots[k]
+            x = v[p]
+            if x != 0:
+                b = basis[k]
+                bp = b[p]
+                v = primitive([bp * vi - x * bi for vi, bi in zip(v, b)])
+
+        pivot = -1
+        for j in my_range(len(v)):
+            if v[j] != 0:
+                pivot = j
+                break
+
+        if pivot == -1:
+            dependent = True
+            if stopAtDependency:
+                break
+            continue
+
+        basis.append(v)
+        pivots.append(pivot)
+
+    return (basis, pivots, dependent)
+
+
+def reduced_basis(basis, pivots):
+    """Turn an echelon basis into a reduced one.
+
+    Return (basis, pivots) sorted by pivot, each vector being zero at the
+    pivots of all the other vectors.
+    """
+    order = sorted(my_range(len(pivots)), key=lambda k: pivots[k])
+    basis = [list(basis[k]) for k in order]
+    pivots = [pivots[k] for k in order]
+
+    for i in my_range(len(basis)):
+        p = pivots[i]
+        b = basis[i]
+        bp = b[p]
+        for k in my_range(len(basis)):
+            x = basis[k][p]
+            if k != i and x != 0:
+                basis[k] = primitive([bp * vk - x * bi
+                                      for vk, bi in zip(basis[k], b)])
+
+    return (basis, pivots)
+
+
+def banded_determinant(rows, lower, upper):
+    """Calculate the determinant of a square integer band matrix.
+
+    Every non-zero of row i lies in the columns i - lower ... i + upper. This
+    is Bareiss' fraction-free elimination restricted to the band: step k only
+    touches the rows k+1 ... k+lower and the columns up to the end of the
+    pivot row, so it costs O(n * lower * (lower + upper)) operations. A row
+    that step k does not touch would only be multiplied by pivot / previous;
+    that scaling is deferred until the row enters the band, where it is
+    applied at once, which is exact because every entry stays a minor. Row
+    swaps widen the upper band by at most lower. The rows are modified in
+    place.
+    """
+    n = len(rows)
+    if n == 0:
+        return 1
+
+    # end[i] is one past the last column of row i that may be non-zero and
+    # state[i] the last step row i was brought up to date with, pivots[t + 1]
+    # being the pivot of step t.
+    end = [min(n, i + upper + 1) for i in my_range(n)]
+    state = [-1] * n
+    pivots = [1]
+    sign = 1
+
+    def bringUpToDate(i, k):
+        """Apply the deferred scaling of row i before step k."""
+        if state[i] < k - 1:
+            row = rows[i]
+            factor = pivots[k]
+            divisor = pivots[state[i] + 1]
+            for j in my_range(k, end[i]):
+                row[j] = row[j] * factor // divisor
+            state[i] = k - 1
+
+    for k in my_range(n - 1):
+        last = min(n - 1, k + lower)
+        for i in my_range(k, last + 1):
+            bringUpToDate(i, k)
+
+        # Only the rows of the band can have a non-zero in column k.
+        if rows[k][k] == 0:
+            swapWith = k
+            for i in my_range(k + 1, last + 1):
+                if rows[i][k] != 0:
+                    swapWith = i
+                    break
+            if swapWith == k:
+                return 0
+            rows[k], rows[swapWith] = rows[swapWith], rows[k]
+            end[k], end[swapWith] = end[swapWith], end[k]
+            sign = -sign
+
+        pivotRow = rows[k]
+        pivot = pivotRow[k]
+        previous = pivots[k]
+        for i in my_range(k + 1, last + 1):
+            row = rows[i]
+            factor = row[k]
+            end[i] = max(end[i], end[k])
+            # The division is always exact.
+            if factor == 0:
+                for j in my_range(k + 1, end[i]):
+                    row[j] = pivot * row[j] // previous
+            else:
+                for j in my_range(k + 1, end[i]):
+                    row[j] = (pivot * row[j] - factor * pivotRow[j]) // \
+                        previous
+            state[i] = k
+        pivots.append(pivot)
+
+    bringUpToDate(n - 1, n - 1)
+    return sign * rows[n - 1][n - 1]
+
+
+def adjugate_determinant(rows):
+    """Calculate the adjugate and the determinant of a square integer matrix.
+
+    One fraction-free Gauss-Jordan sweep runs over the augmented matrix
+    [M | I]: step k eliminates column k from every other row, above the pivot
+    as well as below, with Bareiss' exact division by the previous pivot. In
+    the end the left half is det * I and the right half the adjugate, up to
+    the sign of the row swaps. Every intermediate value is a minor of
+    [M | I], so the coefficients stay bounded, and no gcd is taken at all.
+
+    Return a tuple (adjugate, det) with M * adjugate = det * I, or (None, 0)
+    if M is singular. The rows are not modified.
+    """
+    n = len(rows)
+    augmented = [list(rows[i]) + [int(i == j) for j in my_range(n)]
+                 for i in my_range(n)]
+    sign = 1
+    previous = 1
+
+    for k in my_range(n):
+        # Find a non-zero pivot. If there is none, the matrix is singular.
+        if augmented[k][k] == 0:
+            swapWith = k
+            for i in my_range(k+1, n):
+                if augmented[i][k] != 0:
+                    swapWith = i
+                    break
+            if swapWith == k:
+                return (None, 0)
+            augmented[k], augmented[swapWith] = \
+                augmented[swapWith], augmented[k]
+            sign = -sign
+
+        pivotRow = augmented[k]
+        pivot = pivotRow[k]
+        tail = pivotRow[k+1:]
+        for i in my_range(n):
+            if i == k:
+                continue
+            row = augmented[i]
+            factor = row[k]
+            # The divisions are always exact. Column k is not needed anymore.
+            if factor == 0:
+                row[k+1:] = [pivot * x // previous for x in row[k+1:]]
+            else:
+                row[k+1:] = [(pivot * x - factor * y) // previous
+                             for x, y in zip(row[k+1:], tail)]
+        previous = pivot
+
+    if sign == 1:
+        return ([row[n:] for row in augmented], previous)
+    return ([[-x for x in row[n:]] for row in augmented], -previous)
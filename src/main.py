@@ -1,5 +1,9 @@
 from .parser import parseMatrix, parseOperator, askToContinue
 from .calculator import *
+from . import batch
+from . import benchmark
+from . import instrument
+from . import server
 import sys
 
 # Make this module python2 compatible.
@@ -32,8 +36,39 @@ def __handle_operator(operator, matrix):
     return matrix
 
 
-def main():
-    """Wrap all things together."""
+def main(argv=None):
+    """Wrap all things together.
+
+    With --profile anywhere in argv, the call counts and phase timings of the
+    run are printed to stderr at the end (see instrument.py). In the batch
+    mode only the main process is profiled, so use --jobs 1 with it.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if "--profile" not in argv:
+        return __run(argv)
+
+    with instrument.profile() as profile:
+        try:
+            return __run([arg for arg in argv if arg != "--profile"])
+        finally:
+            sys.stderr.write(profile.report() + "\n")
+
+
+def __run(argv):
+    """Run the mode selected by argv."""
+    # Non-interactive batch mode.
+    if len(argv) > 0 and argv[0] == "batch":
+        return batch.main(argv[1:])
+
+    # Benchmarks.
+    if len(argv) > 0 and argv[0] == "bench":
+        return benchmark.main(argv[1:])
+
+    # Long-running JSON-lines server.
+    if len(argv) > 0 and argv[0] == "serve":
+        return server.main(argv[1:])
 
     # Ask 1st matrix.
     matrix = parseMatrix()
@@ -0,0 +1,185 @@
+from .my_algorithms import my_range
+import random
+
+# Every prime used here is below 2^31, so that all residues and their products
+# fit in a single machine word.
+WORD_BITS = 31
+
+
+def is_prime(n):
+    """Find out if n < 3215031751 is a prime using Miller-Rabin.
+
+    The bases 2, 3, 5 and 7 make the test deterministic for every n below
+    3215031751, which covers all word-sized primes used in this module.
+    """
+    if n < 2:
+        return False
+    for p in [2, 3, 5, 7]:
+        if n % p == 0:
+            return n == p
+
+    # Write n - 1 as d * 2^s, where d is odd.
+    d = n - 1
+    s = 0
+    while d & 1 == 0:
+        d >>= 1
+        s += 1
+
+    for a in [2, 3, 5, 7]:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for i in my_range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def word_primes():
+    """Generate the primes below 2^31 in decreasing order."""
+    n = (1 << WORD_BITS) - 1
+    while n > 2:
+        if is_prime(n):
+            yield n
+        n -= 2
+
+
+def random_word_prime():
+    """Return a random prime between 2^30 and 2^31."""
+    n = random.randrange(1 << (WORD_BITS - 1), 1 << WORD_BITS) | 1
+    while not is_prime(n):
+        n += 2
+    return n
+
+
+def hadamard_bound_squared(rows):
+    """Return the square of the Hadamard bound of an integer matrix.
+
+    The absolute value of every minor of the matrix is at most the product of
+    the Euclidean norms of its non-zero rows. The square is returned, so that
+    no square roots are needed.
+    """
+    bound = 1
+    for row in rows:
+        norm = 0
+        for x in row:
+            norm += x * x
+        if norm != 0:
+            bound *= norm
+    return bound
+
+
+def echelon_mod(rows, p, stopAtDependency=False):
+    """Eliminate an integer matrix modulo the prime p.
+
+    Return a tuple (rank, det) of the rank of the matrix modulo p and, for a
+    square matrix, its determinant modulo p. If stopAtDependency is True, the
+    elimination stops at the first column without a pivot, in which case the
+    returned rank is only a lower bound and det is 0.
+    """
+    n = len(rows)
+    m = len(rows[0])
+    M = [[x % p for x in row] for row in rows]
+
+    rank = 0
+    det = 1
+    for col in my_range(m):
+        if rank == n:
+            break
+
+        # Find a row with a non-zero value on this column.
+        swapWith = -1
+        for i in my_range(rank, n):
+            if M[i][col] != 0:
+                swapWith = i
+                break
+
+        # The column depends on the previous ones.
+        if swapWith == -1:
+            det = 0
+            if stopAtDependency:
+                break
+            continue
+
+        if swapWith != rank:
+            M[rank], M[swapWith] = M[swapWith], M[rank]
+            det = -det
+
+        pivotRow = M[rank]
+        pivot = pivotRow[col]
+        det = det * pivot % p
+        inverse = pow(pivot, p - 2, p)
+
+        for i in my_range(rank + 1, n):
+            row = M[i]
+            factor = row[col] * inverse % p
+            if factor == 0:
+                continue
+            for j in my_range(col + 1, m):
+                row[j] = (row[j] - factor * pivotRow[j]) % p
+
+        rank += 1
+
+    if n != m or rank != n:
+        det = 0
+    return (rank, det % p)
+
+
+def det_mod(rows, p):
+    """Calculate the determinant of a square integer matrix modulo p."""
+    return echelon_mod(rows, p, True)[1]
+
+
+def rank_mod(rows, p):
+    """Calculate the rank of an integer matrix modulo p."""
+    return echelon_mod(rows, p)[0]
+
+
+def modular_determinant(rows):
+    """Calculate the exact determinant of a square integer matrix.
+
+    The determinant is computed modulo word-sized primes and rebuilt with the
+    Chinese remainder theorem. As soon as the product of the primes exceeds
+    twice the Hadamard bound, the symmetric residue is the determinant.
+    """
+    bound = 4 * hadamard_bound_squared(rows)
+
+    modulus = 1
+    residue = 0
+    for p in word_primes():
+        r = det_mod(rows, p)
+
+        # Combine x == residue (mod modulus) and x == r (mod p).
+        t = (r - residue) * pow(modulus % p, p - 2, p) % p
+        residue += modulus * t
+        modulus *= p
+
+        # modulus > 2 * Hadamard bound.
+        if modulus * modulus > bound:
+            break
+
+    if residue > modulus // 2:
+        residue -= modulus
+    return residue
+
+
+def probably_singular(rows):
+    """Check a square integer matrix for singularity modulo one random prime.
+
+    Return False if the matrix is certainly nonsingular and True if it is
+    probably singular, i.e. its determinant is divisible by the prime.
+    """
+    return det_mod(rows, random_word_prime()) == 0
+
+
+def probably_rank_deficient(rows):
+    """Check an integer matrix for less than full rank modulo one random prime.
+
+    The rank modulo p never exceeds the true rank. Return False if the matrix
+    certainly has full rank and True if it probably has not, i.e. p divides
+    every non-zero minor of the maximal size.
+    """
+    return rank_mod(rows, random_word_prime()) < min(len(rows), len(rows[0]))
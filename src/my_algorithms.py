@@ -62,9 +62,13 @@ def my_gcd(n, m):
         m >>= 1
         exp += 1
 
-    # Remove possible leftover factors of 2 from n. Hence n will be odd.
+    # Remove possible leftover factors of 2 from n and m. Hence both will be
+    # odd. Otherwise an even m would make the loop below subtract m one step
+    # at a time.
     while n & 1 == 0:
         n >>= 1
+    while m & 1 == 0:
+        m >>= 1
 
     while n != 0:
         # Here we ensure that n is always the bigger of the two. Thus n will be
@@ -82,6 +86,26 @@ def my_gcd(n, m):
     return unit * (m << exp)
 
 
+# The gcd of the standard library is written in C and is much faster than
+# my_gcd on big integers. Python 2 and Python 3.4 do not have it.
+try:
+    from math import gcd as _math_gcd
+except ImportError:
+    _math_gcd = None
+
+
+def fast_gcd(n, m):
+    """Calculate the gcd of n and m with the fastest exact algorithm available.
+
+    The result, including its sign, is the same as the one of my_gcd.
+    """
+    if _math_gcd is None:
+        return my_gcd(n, m)
+    if m < 0:
+        return -_math_gcd(n, m)
+    return _math_gcd(n, m)
+
+
 def my_max(x, *args):
     """Return the maximum of the given numbers or a given list."""
 
@@ -219,3 +243,76 @@ def my_lower(s):
         result += char
 
     return result
+
+
+def bipartite_matching(adjacency, m):
+    """Find a maximum matching of a bipartite graph.
+
+    Keyword arguments:
+    adjacency -- adjacency[i] lists the right vertices (0, ..., m-1) adjacent
+                 to the left vertex i
+    m         -- the number of right vertices
+
+    Return a list match, where match[i] is the right vertex matched to the
+    left vertex i, or -1 if i is left unmatched. Augmenting paths are searched
+    iteratively, so deep paths do not hit the recursion limit.
+    """
+    n = len(adjacency)
+    matchLeft = [-1 for i in my_range(n)]
+    matchRight = [-1 for j in my_range(m)]
+
+    # Start with a greedy matching.
+    for u in my_range(n):
+        for v in adjacency[u]:
+            if matchRight[v] == -1:
+                matchLeft[u] = v
+                matchRight[v] = u
+                break
+
+    for u in my_range(n):
+        if matchLeft[u] != -1:
+            continue
+
+        # Search for an augmenting path starting from u. parent[v] is the
+        # left vertex through which the right vertex v was reached.
+        parent = {}
+        stack = [u]
+        found = -1
+        while stack and found == -1:
+            x = stack.pop()
+            for v in adjacency[x]:
+                if v in parent:
+                    continue
+                parent[v] = x
+                if matchRight[v] == -1:
+                    found = v
+                    break
+                stack.append(matchRight[v])
+
+        # Flip the matched and unmatched edges along the path.
+        v = found
+        while v != -1:
+            x = parent[v]
+            previous = matchLeft[x]
+            matchLeft[x] = v
+            matchRight[v] = x
+            v = previous
+
+    return matchLeft
+
+
+def permutation_sign(permutation):
+    """Return the sign, 1 or -1, of the permutation i -> permutation[i]."""
+    sign = 1
+    visited = [False] * len(permutation)
+    for start in my_range(len(permutation)):
+        # Every cycle of even length flips the sign.
+        length = 0
+        i = start
+        while not visited[i]:
+            visited[i] = True
+            i = permutation[i]
+            length += 1
+        if length > 0 and length % 2 == 0:
+            sign = -sign
+    return sign
@@ -0,0 +1,157 @@
+from .my_algorithms import my_range, permutation_sign
+import multiprocessing
+import os
+import pickle
+
+# Below this size starting the processes costs more than they save.
+PARALLEL_MIN_SIZE = 100
+
+
+def defaultWorkers():
+    """Return the amount of worker processes of parallelBareiss by default."""
+    try:
+        return os.cpu_count() or 1
+    except AttributeError:
+        # python2
+        return multiprocessing.cpu_count()
+
+
+def useParallel(n, workers):
+    """Find out if an n x n elimination should run on workers processes.
+
+    workers is None or 1 for the serial path, which is also used for small
+    matrices and inside daemonic processes, which may not start processes of
+    their own. Processes are only started when the caller asks for them, so
+    e.g. a threaded server does not fork on a big request.
+    """
+    return workers is not None and workers > 1 and n >= PARALLEL_MIN_SIZE and \
+        not multiprocessing.current_process().daemon
+
+
+def __candidate(rows, k):
+    """Find the next pivot candidate among rows {index: row}.
+
+    Return the smallest index whose row is non-zero on column k, or None if
+    there is none.
+    """
+    best = None
+    for index in rows:
+        if rows[index][k] != 0 and (best is None or index < best):
+            best = index
+    return best
+
+
+def __worker(connection, rows, n):
+    """Eliminate a block of rows {index: row}, one step per message.
+
+    A message is (k, pivot index), or None to stop. The worker owning the
+    pivot row sends its tail from column k on to the parent, which passes the
+    bytes on to the other workers. After each step the index of the next
+    pivot candidate of the block, or None, is sent back.
+    """
+    connection.send_bytes(pickle.dumps(__candidate(rows, 0), -1))
+    previous = 1
+    while True:
+        message = pickle.loads(connection.recv_bytes())
+        if message is None:
+            break
+        k, index = message
+        if index in rows:
+            pivotTail = rows.pop(index)[k:]
+            connection.send_bytes(pickle.dumps(pivotTail, -1))
+        else:
+            pivotTail = pickle.loads(connection.recv_bytes())
+
+        pivot = pivotTail[0]
+        for row in rows.values():
+            factor = row[k]
+            # The divisions are always exact, see calculator.__bareiss.
+            if factor == 0:
+                row[k+1:] = [pivot * x // previous for x in row[k+1:]]
+            else:
+                row[k+1:] = [(pivot * x - factor * y) // previous
+                             for x, y in zip(row[k+1:], pivotTail[1:])]
+        previous = pivot
+
+        connection.send_bytes(pickle.dumps(__candidate(rows, k + 1), -1))
+    connection.close()
+
+
+def parallelBareiss(rows, workers=None):
+    """Calculate the determinant of a square integer matrix on several cores.
+
+    This is the fraction-free Bareiss elimination of calculator.__bareiss,
+    the right-looking form of exact LU, split into cyclic row blocks. Every
+    worker process keeps its block in its own memory for the whole
+    elimination and updates it on each step. Only the index of each worker's
+    next pivot candidate comes back to the parent; the owner of the chosen
+    pivot sends its row, and the parent passes those bytes on to the other
+    workers without unpickling them. So the parent does O(workers) work per
+    step and the traffic stays one row per step.
+
+    The pivot of step k is the remaining row with the smallest index and a
+    non-zero column k. The determinant is unique, so the result is identical
+    to the serial one whatever the pivot order. The rows are not modified.
+    """
+    n = len(rows)
+    if workers is None:
+        workers = defaultWorkers()
+    workers = max(1, min(workers, n))
+
+    connections = []
+    processes = []
+    try:
+        for w in my_range(workers):
+            block = dict([(i, list(rows[i])) for i in range(w, n, workers)])
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=__worker,
+                                              args=(child, block, n))
+            process.daemon = True
+            process.start()
+            child.close()
+            connections.append(parent)
+            processes.append(process)
+
+        order = []
+        for k in my_range(n):
+            candidates = [pickle.loads(connection.recv_bytes())
+                          for connection in connections]
+            candidates = [c for c in candidates if c is not None]
+            if not candidates:
+                # No non-zero pivot left, so the matrix is singular.
+                return 0
+
+            # Row i belongs to the block of worker i % workers.
+            index = min(candidates)
+            order.append(index)
+            owner = connections[index % workers]
+            message = pickle.dumps((k, index), -1)
+
+            # The last pivot is the determinant up to the sign; only its
+            # owner has anything left to do.
+            if k == n - 1:
+                owner.send_bytes(message)
+                det = pickle.loads(owner.recv_bytes())[0]
+                return permutation_sign(order) * det
+
+            for connection in connections:
+                connection.send_bytes(message)
+            pivotTail = owner.recv_bytes()
+            for connection in connections:
+                if connection is not owner:
+                    connection.send_bytes(pivotTail)
+
+        # Only the empty matrix gets here.
+        return 1
+    finally:
+        stop = pickle.dumps(None, -1)
+        for connection in connections:
+            try:
+                connection.send_bytes(stop)
+            except (IOError, OSError):
+                pass
+            connection.close()
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
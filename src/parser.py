@@ -1,6 +1,7 @@
 from .my_algorithms import my_split, my_strip, my_lower
 from .calculator import frac_reduc
 from .Matrix import Matrix
+from .reader import parseRow, buildMatrix
 import sys
 
 # Make everything work with python2.
@@ -106,6 +107,27 @@ def __parse_values(row):
     return values
 
 
+def parseRows(rows, sparse=False):
+    """Parse a Matrix from a list of row strings without asking the user.
+
+    The values are converted with the bulk reader, so rows of plain integers
+    never go through the per-token parsing. If sparse is True, a SparseMatrix
+    is built directly. Return None if the list is empty, some value is invalid
+    or the rows are of different lengths.
+    """
+    integerRows = []
+    for row in rows:
+        integerRow = parseRow(row)
+        if integerRow is None or len(integerRow[0]) == 0:
+            return None
+        integerRows.append(integerRow)
+
+    try:
+        return buildMatrix(integerRows, sparse)
+    except ValueError:
+        return None
+
+
 def parseMatrix():
     """Ask user to input a matrix and return a new Matrix object."""
 
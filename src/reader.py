@@ -0,0 +1,368 @@
+from .my_algorithms import fast_gcd
+from .Matrix import Matrix, _reduce_row
+from .SparseMatrix import SparseMatrix, _reduce
+from .storage import loadBinary
+from array import array
+import re
+import sys
+
+# An integer or a decimal number with an optional exponent, e.g. -12,5 or
+# 1.5e-3. The decimal separator can be either '.' or ','.
+__DECIMAL = re.compile(
+    r"^([+-]?)([0-9]*)(?:[.,]([0-9]*))?(?:[eE]([+-]?[0-9]+))?$")
+
+
+def __parse_decimal(token):
+    """Parse an integer or a decimal number into a (num, den) tuple.
+
+    Return None if token is not a number.
+    """
+    match = __DECIMAL.match(token)
+    if match is None:
+        return None
+    sign, whole, decimals, exponent = match.groups()
+    if decimals is None:
+        decimals = ""
+    if not whole and not decimals:
+        return None
+
+    numerator = int(whole + decimals or "0")
+    denominator = 10 ** len(decimals)
+    if sign == "-":
+        numerator = -numerator
+    if exponent is not None:
+        exponent = int(exponent)
+        if exponent >= 0:
+            numerator *= 10 ** exponent
+        else:
+            denominator *= 10 ** -exponent
+    return (numerator, denominator)
+
+
+def __parse_token(token):
+    """Parse a number into a (num, den) tuple with a positive denominator.
+
+    The fraction is not reduced. Return None if the token is not a number.
+    """
+    try:
+        return (int(token), 1)
+    except ValueError:
+        pass
+
+    parts = token.split("/")
+    if len(parts) == 1:
+        return __parse_decimal(token)
+    if len(parts) != 2:
+        return None
+
+    frac_1 = __parse_decimal(parts[0])
+    frac_2 = __parse_decimal(parts[1])
+    if frac_1 is None or frac_2 is None or frac_2[0] == 0:
+        return None
+    if frac_2[0] < 0:
+        return (-frac_1[0] * frac_2[1], -frac_1[1] * frac_2[0])
+    return (frac_1[0] * frac_2[1], frac_1[1] * frac_2[0])
+
+
+def parseNumber(token):
+    """Parse an integer, a decimal or a fraction into a reduced (num, den) tuple.
+
+    Accepts the syntax of the interactive mode, e.g. 3, -1,5, 2/3 and
+    1.3/3,7, and decimal exponents like 1.5e-3. Return None if the token is
+    not a number.
+    """
+    frac = __parse_token(token)
+    if frac is None:
+        return None
+    return _reduce(frac[0], frac[1])
+
+
+def parseRow(line, delimiter=None):
+    """Parse a row of numbers into a tuple (numerators, denominator).
+
+    The values are separated by whitespace, or by delimiter if one is given.
+    Rows of plain integers are converted in one go. Otherwise the values are
+    scaled to their least common denominator, which is only recomputed when a
+    value does not divide it already. Return None if some value is not a
+    number.
+    """
+    tokens = line.split(delimiter)
+    if delimiter is not None:
+        tokens = [token.strip() for token in tokens]
+
+    try:
+        return (list(map(int, tokens)), 1)
+    except ValueError:
+        pass
+
+    # Values repeat a lot in practice, so each distinct token is parsed once.
+    parsed = {}
+    fracs = []
+    common = 1
+    for token in tokens:
+        frac = parsed.get(token)
+        if frac is None:
+            frac = __parse_token(token)
+            if frac is None:
+                return None
+            parsed[token] = frac
+        fracs.append(frac)
+        if common % frac[1] != 0:
+            common = common // fast_gcd(common, frac[1]) * frac[1]
+
+    return ([frac[0] * (common // frac[1]) for frac in fracs], common)
+
+
+def __new_buffer():
+    """Return an empty buffer for __append.
+
+    Python 2 has no 'q' arrays; like Matrix._buffer, fall back to a list.
+    """
+    try:
+        return array("q")
+    except ValueError:
+        return []
+
+
+def __append(buffer, values):
+    """Append values to buffer, return the buffer.
+
+    The values go into the array of machine integers while they fit, after
+    that the buffer is turned into a list.
+    """
+    if isinstance(buffer, array):
+        try:
+            buffer.extend(array("q", values))
+            return buffer
+        except OverflowError:
+            buffer = buffer.tolist()
+    buffer.extend(values)
+    return buffer
+
+
+def buildMatrix(integerRows, sparse=False):
+    """Build a matrix from an iterable of (numerators, denominator) rows.
+
+    The rows are packed straight into the compact buffers of Matrix, without
+    going through (num, den) tuples. With sparse=True a SparseMatrix is built
+    instead. Return None if there are no rows; raise ValueError if the rows
+    are of different lengths.
+    """
+    numerators = __new_buffer()
+    denominators = __new_buffer()
+    sparseRows = []
+    width = -1
+    n = 0
+
+    for rowNumerators, denominator in integerRows:
+        if width == -1:
+            width = len(rowNumerators)
+        elif len(rowNumerators) != width:
+            raise ValueError("row %d has %d values instead of %d"
+                             % (n + 1, len(rowNumerators), width))
+        n += 1
+
+        if sparse:
+            sparseRows.append(dict([
+                (j, _reduce(rowNumerators[j], denominator))
+                for j in range(width) if rowNumerators[j] != 0]))
+            continue
+
+        if denominator != 1:
+            rowNumerators, denominator = _reduce_row(rowNumerators,
+                                                     denominator)
+        numerators = __append(numerators, rowNumerators)
+        denominators = __append(denominators, [denominator])
+
+    if n == 0:
+        return None
+    if sparse:
+        return SparseMatrix(sparseRows, n, width)
+    return Matrix.fromBuffers(numerators, denominators, n, width)
+
+
+def __dense_rows(lines, delimiter):
+    """Parse the rows of a whitespace or CSV matrix.
+
+    Lines starting with '#' are skipped and a blank line after the first row
+    ends the matrix. Yield (numerators, denominator) tuples.
+    """
+    started = False
+    for number, line in lines:
+        line = line.strip()
+        if line.startswith("#"):
+            continue
+        if not line:
+            if started:
+                return
+            continue
+
+        started = True
+        row = parseRow(line, delimiter)
+        if row is None:
+            raise ValueError("line %d: invalid value in '%s'"
+                             % (number, line[:40]))
+        yield row
+
+
+def __matrix_market(header, lines, sparse):
+    """Read a matrix in Matrix Market format, header being the first line.
+
+    Supports the coordinate and array formats with integer, real or pattern
+    values and general, symmetric or skew-symmetric symmetry. For the format,
+    see https://math.nist.gov/MatrixMarket/formats.html
+    """
+    words = header.lower().split()
+    if len(words) != 5 or words[1] != "matrix":
+        raise ValueError("invalid Matrix Market header '%s'" % header.strip())
+    layout, field, symmetry = words[2:]
+    if layout not in ("coordinate", "array") or \
+            field not in ("integer", "real", "double", "pattern") or \
+            symmetry not in ("general", "symmetric", "skew-symmetric") or \
+            (field == "pattern" and layout == "array"):
+        raise ValueError("unsupported Matrix Market type '%s %s %s'"
+                         % (layout, field, symmetry))
+
+    def entries():
+        """Yield (line number, tokens) of the non-comment lines."""
+        for number, line in lines:
+            tokens = line.split()
+            if tokens and not tokens[0].startswith("%"):
+                yield (number, tokens)
+
+    def value(number, token):
+        frac = parseNumber(token)
+        if frac is None:
+            raise ValueError("line %d: invalid value '%s'" % (number, token))
+        return frac
+
+    entryIterator = entries()
+    try:
+        number, size = next(entryIterator)
+        n = int(size[0])
+        m = int(size[1])
+    except (StopIteration, IndexError, ValueError):
+        raise ValueError("missing or invalid Matrix Market size line")
+
+    rows = [{} for i in range(n)]
+
+    def store(i, j, frac):
+        if frac[0] == 0:
+            return
+        rows[i][j] = frac
+        if i != j and symmetry == "symmetric":
+            rows[j][i] = frac
+        elif i != j and symmetry == "skew-symmetric":
+            rows[j][i] = (-frac[0], frac[1])
+
+    if layout == "coordinate":
+        for number, tokens in entryIterator:
+            try:
+                i = int(tokens[0]) - 1
+                j = int(tokens[1]) - 1
+            except (IndexError, ValueError):
+                raise ValueError("line %d: invalid entry" % number)
+            if not (0 <= i < n and 0 <= j < m):
+                raise ValueError("line %d: entry out of range" % number)
+            if field == "pattern":
+                store(i, j, (1, 1))
+            else:
+                store(i, j, value(number, tokens[2]))
+    else:
+        # Column-major, for symmetric matrices only the lower triangle.
+        # The diagonal of a skew-symmetric matrix is zero and not stored.
+        if symmetry == "general":
+            positions = ((i, j) for j in range(m) for i in range(n))
+        elif symmetry == "symmetric":
+            positions = ((i, j) for j in range(m) for i in range(j, n))
+        else:
+            positions = ((i, j) for j in range(m) for i in range(j + 1, n))
+        for number, tokens in entryIterator:
+            for token in tokens:
+                try:
+                    i, j = next(positions)
+                except StopIteration:
+                    raise ValueError("line %d: too many values" % number)
+                store(i, j, value(number, token))
+
+    if sparse:
+        return SparseMatrix(rows, n, m)
+
+    def integerRows():
+        for row in rows:
+            common = 1
+            for j in row:
+                common = common // fast_gcd(common, row[j][1]) * row[j][1]
+            numerators = [0] * m
+            for j in row:
+                numerators[j] = row[j][0] * (common // row[j][1])
+            yield (numerators, common)
+
+    return buildMatrix(integerRows(), False)
+
+
+def readMatrix(stream, format="auto", sparse=False):
+    """Read one matrix from a text stream in a single pass.
+
+    Keyword arguments:
+    stream -- a file object, e.g. sys.stdin
+    format -- "text" for rows of whitespace separated values (the syntax of
+              the interactive mode), "csv" for comma separated values, "mtx"
+              for Matrix Market, or "auto" to recognise Matrix Market from its
+              header and read text otherwise
+    sparse -- if True, return a SparseMatrix
+
+    A text or CSV matrix ends at a blank line, so several matrices can be read
+    from one stream one after another. Return None at the end of the stream
+    and raise ValueError if the input is invalid.
+    """
+    if format not in ("auto", "text", "csv", "mtx"):
+        raise ValueError("unknown format '%s'" % format)
+
+    lines = enumerate(stream, 1)
+
+    # Look at the first line to recognise Matrix Market.
+    first = None
+    for number, line in lines:
+        if line.strip():
+            first = (number, line)
+            break
+    if first is None:
+        return None
+
+    if format == "mtx" or \
+            (format == "auto" and first[1].startswith("%%MatrixMarket")):
+        return __matrix_market(first[1], lines, sparse)
+
+    def chained():
+        yield first
+        for item in lines:
+            yield item
+
+    delimiter = "," if format == "csv" else None
+    return buildMatrix(__dense_rows(chained(), delimiter), sparse)
+
+
+def loadMatrix(path, format="auto", sparse=False):
+    """Read a matrix from the file at path, '-' meaning stdin.
+
+    With format="auto", files ending with .mtx are read as Matrix Market,
+    files ending with .csv as CSV and files ending with .smat as binary matrix
+    files (see storage.loadBinary). See readMatrix.
+    """
+    if format == "auto":
+        if path.endswith(".smat"):
+            return loadBinary(path)
+        if path.endswith(".mtx"):
+            format = "mtx"
+        elif path.endswith(".csv"):
+            format = "csv"
+
+    if path == "-":
+        return readMatrix(sys.stdin, format, sparse)
+
+    stream = open(path)
+    try:
+        return readMatrix(stream, format, sparse)
+    finally:
+        stream.close()
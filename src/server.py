@@ -0,0 +1,477 @@
+from .my_algorithms import my_range
+from .calculator import matrixDeterminantFraction, matrixInverse, \
+    matrixMultiplication, matrixRank, matrixStructure, solve
+from .reader import parseRow, buildMatrix
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+
+# The operations of a request and how many matrices each takes, None meaning
+# one or more.
+OPERATIONS = {"det": 1, "inverse": 1, "rank": 1, "solve": 2,
+              "multiply": None, "structure": 1, "put": None, "drop": None}
+
+
+class RequestError(Exception):
+    """An invalid request, reported back to the client as an error."""
+    pass
+
+
+class PendingMatrix(object):
+    """The result matrix of a request that is still being computed.
+
+    A name given by "store" refers to one of these from the moment the
+    request is prepared until its result is known, so later requests can use
+    the name right away and wait for the matrix in their worker thread.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.matrix = None
+        self.error = None
+
+    def finish(self, matrix, error=None):
+        """Set the result matrix, or the error if there is none."""
+        self.matrix = matrix
+        self.error = error
+        self.done.set()
+
+    def wait(self):
+        """Wait for the result matrix and return it.
+
+        Raise RequestError if the request computing it failed.
+        """
+        self.done.wait()
+        if self.error is not None:
+            raise RequestError(self.error)
+        return self.matrix
+
+
+class MatrixCache(object):
+    """Matrices kept by name between requests.
+
+    A Matrix caches its own determinant, factorization and inverse, so keeping
+    the Matrix keeps them warm too. Every name has a lock, held while a
+    request works on the matrix, so that concurrent requests on the same
+    matrix compute its factorization once instead of racing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.matrices = {}
+        self.locks = {}
+
+    def get(self, name):
+        """Return the matrix named name, a PendingMatrix or None."""
+        with self.lock:
+            return self.matrices.get(name)
+
+    def put(self, name, matrix):
+        """Keep matrix under name, replacing any matrix of the same name.
+
+        matrix may be a PendingMatrix, see finish.
+        """
+        with self.lock:
+            self.matrices[name] = matrix
+            if name not in self.locks:
+                self.locks[name] = threading.Lock()
+
+    def finish(self, name, pending, matrix, error=None):
+        """Replace the PendingMatrix pending under name by its result.
+
+        Later requests waiting on pending get the matrix, or the error if
+        there is none. If name has been dropped or given another matrix in
+        the meantime, the cache is left as it is.
+        """
+        with self.lock:
+            if self.matrices.get(name) is pending:
+                if matrix is None:
+                    self.locks.pop(name, None)
+                    del self.matrices[name]
+                else:
+                    self.matrices[name] = matrix
+        pending.finish(matrix, error)
+
+    def drop(self, name):
+        """Forget the matrix named name. Return False if there was none."""
+        with self.lock:
+            self.locks.pop(name, None)
+            return self.matrices.pop(name, None) is not None
+
+    def lockFor(self, name):
+        """Return the lock of the matrix named name, or None."""
+        with self.lock:
+            return self.locks.get(name)
+
+
+def __parse_matrix(spec):
+    """Build a Matrix from the rows of a matrix in a request.
+
+    Each row is either a string in the syntax of the interactive mode, e.g.
+    "1 -2/3 0.5", or a list of JSON numbers and such strings.
+    """
+    rows = spec.get("rows")
+    if not isinstance(rows, list) or not rows:
+        raise RequestError("a matrix needs a non-empty list of rows")
+
+    integerRows = []
+    for row in rows:
+        if isinstance(row, list):
+            row = " ".join([str(value) for value in row])
+        if not isinstance(row, str):
+            raise RequestError("a row must be a string or a list")
+        integerRow = parseRow(row)
+        if integerRow is None:
+            raise RequestError("invalid value in row '%s'" % row[:40])
+        integerRows.append(integerRow)
+
+    try:
+        return buildMatrix(integerRows, bool(spec.get("sparse", False)))
+    except ValueError as e:
+        raise RequestError(str(e))
+
+
+def __resolve(specs, cache):
+    """Return the matrices of a request and the names of the cached ones.
+
+    A matrix with rows is parsed, and kept in the cache if it has a name. A
+    matrix with only a name refers to a cached matrix, which may still be a
+    PendingMatrix.
+    """
+    if not isinstance(specs, list):
+        raise RequestError("matrices must be a list")
+
+    matrices = []
+    names = []
+    for spec in specs:
+        if not isinstance(spec, dict):
+            raise RequestError("a matrix must be an object")
+        name = spec.get("name")
+        if "rows" in spec:
+            matrix = __parse_matrix(spec)
+            if name is not None:
+                cache.put(name, matrix)
+        elif name is None:
+            raise RequestError("a matrix needs rows or a name")
+        else:
+            matrix = cache.get(name)
+            if matrix is None:
+                raise RequestError("unknown matrix '%s'" % name)
+        matrices.append(matrix)
+        if name is not None and name not in names:
+            names.append(name)
+    return (matrices, names)
+
+
+def __format_frac(frac):
+    """Format a fraction exactly as 'numerator/denominator'."""
+    if frac[1] < 0:
+        frac = (-frac[0], -frac[1])
+    if frac[1] == 1:
+        return str(frac[0])
+    return str(frac[0]) + "/" + str(frac[1])
+
+
+def __format_matrix(A):
+    """Format a matrix as a list of rows of exact fraction strings."""
+    if A is None:
+        return None
+    return [[__format_frac(cell) for cell in A.getRow(i)]
+            for i in my_range(A.getRowAmount())]
+
+
+def __compute(operation, matrices):
+    """Run an operation on its matrices. Return (result, matrix or None).
+
+    The matrix is the result matrix, if the operation produces one.
+    """
+    A = matrices[0]
+
+    if operation == "det":
+        det = matrixDeterminantFraction(A)
+        if det is None:
+            raise RequestError("the determinant needs a square matrix")
+        return (__format_frac(det), None)
+
+    if operation == "rank":
+        return (matrixRank(A), None)
+
+    if operation == "structure":
+        structure = matrixStructure(A)
+        if structure is None:
+            return (None, None)
+        return ({"kind": structure.kind, "lower": structure.lower,
+                 "upper": structure.upper}, None)
+
+    if operation == "inverse":
+        if A.getRowAmount() != A.getColAmount():
+            raise RequestError("the inverse needs a square matrix")
+        B = matrixInverse(A)
+        return (__format_matrix(B), B)
+
+    if operation == "solve":
+        B = matrices[1]
+        if A.getRowAmount() != A.getColAmount() or \
+                B.getRowAmount() != A.getRowAmount():
+            raise RequestError("solve needs a square matrix and a right hand "
+                               "side with as many rows")
+        X = solve(A, B)
+        return (__format_matrix(X), X)
+
+    if operation == "multiply":
+        C = A
+        for B in matrices[1:]:
+            if C.getColAmount() != B.getRowAmount():
+                raise RequestError("cannot multiply a %dx%d and a %dx%d "
+                                   "matrix" % (C.getRowAmount(),
+                                               C.getColAmount(),
+                                               B.getRowAmount(),
+                                               B.getColAmount()))
+            C = matrixMultiplication(C, B)
+        return (__format_matrix(C), C)
+
+    # put only parses and caches the matrices.
+    return (len(matrices), None)
+
+
+def prepareRequest(request, cache):
+    """Check a decoded request and resolve its matrices.
+
+    A request is an object with the keys
+    id       -- anything, echoed in the response to match it to the request
+    op       -- one of OPERATIONS
+    matrices -- the operands, each {"rows": [...]} or {"name": ...} or both
+    store    -- optionally, a name to cache the result matrix under
+
+    Matrices with rows are parsed and named ones cached here, so requests are
+    prepared one at a time in input order. The name of a stored result is
+    cached here too, as a PendingMatrix until the result is computed. A name
+    given by an earlier request is then always known to a later one. The op
+    "drop" forgets the named matrices right away.
+
+    Return a tuple (response, job). The response dict is complete if job is
+    None; otherwise runRequest(job, response, cache) completes it.
+    """
+    response = {"id": request.get("id")}
+    try:
+        operation = request.get("op")
+        if operation not in OPERATIONS:
+            raise RequestError("unknown op '%s'" % operation)
+        specs = request.get("matrices", [])
+
+        if operation == "drop":
+            if not isinstance(specs, list):
+                raise RequestError("matrices must be a list")
+            response["result"] = len([spec for spec in specs
+                                      if isinstance(spec, dict) and
+                                      cache.drop(spec.get("name"))])
+            return (response, None)
+
+        expected = OPERATIONS[operation]
+        if not isinstance(specs, list) or len(specs) == 0 or \
+                (expected is not None and len(specs) != expected):
+            raise RequestError("op '%s' takes %s matrices" % (
+                operation, "one or more" if expected is None else expected))
+
+        matrices, names = __resolve(specs, cache)
+        store = request.get("store")
+        pending = None
+        if store is not None:
+            pending = PendingMatrix()
+            cache.put(store, pending)
+        return (response, (operation, matrices, names, store, pending))
+    except RequestError as e:
+        response["error"] = str(e)
+    except Exception as e:
+        response["error"] = "%s: %s" % (type(e).__name__, e)
+    return (response, None)
+
+
+def runRequest(job, response, cache):
+    """Compute the result of a prepared request into response, return it.
+
+    Results are exact: fractions are strings like "-2/3" and matrices lists
+    of rows of them. The inverse or solution of a singular matrix is null.
+    Operands still computed by earlier requests are waited for first. A
+    stored result replaces the PendingMatrix of its name in the cache.
+    """
+    operation, matrices, names, store, pending = job
+    matrix = None
+    try:
+        matrices = [operand.wait() if isinstance(operand, PendingMatrix)
+                    else operand for operand in matrices]
+
+        # Lock the named matrices in a fixed order, so that requests sharing
+        # them can not deadlock.
+        locks = [cache.lockFor(name) for name in sorted(names)]
+        locks = [lock for lock in locks if lock is not None]
+        for lock in locks:
+            lock.acquire()
+        try:
+            result, matrix = __compute(operation, matrices)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        if store is not None and matrix is None:
+            raise RequestError("op '%s' has no matrix to store" % operation)
+        response["result"] = result
+    except RequestError as e:
+        response["error"] = str(e)
+    except Exception as e:
+        response["error"] = "%s: %s" % (type(e).__name__, e)
+
+    if pending is not None:
+        if "error" in response:
+            cache.finish(store, pending, None, "matrix '%s' was not stored: %s"
+                         % (store, response["error"]))
+        else:
+            cache.finish(store, pending, matrix)
+    return response
+
+
+def handleRequest(request, cache):
+    """Handle one decoded request and return the response as a dict.
+
+    See prepareRequest and runRequest.
+    """
+    response, job = prepareRequest(request, cache)
+    if job is None:
+        return response
+    return runRequest(job, response, cache)
+
+
+class Server(object):
+    """Handle JSON-lines requests concurrently on a bounded pool of threads.
+
+    Responses are written as soon as they are ready, so they can come back in
+    a different order than the requests; use the id to match them. At most
+    2 * workers requests are queued or running, after that reading the input
+    waits. The threads share the MatrixCache. Because of the global
+    interpreter lock they mainly keep cheap requests from waiting behind
+    expensive ones rather than adding processor time.
+    """
+
+    def __init__(self, workers=4):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.cache = MatrixCache()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.Semaphore(2 * workers)
+
+    def __process(self, job, response, respond):
+        """Compute a prepared request in a worker thread."""
+        try:
+            respond(runRequest(job, response, self.cache))
+        finally:
+            self.slots.release()
+
+    def submit(self, line, respond):
+        """Decode and prepare a request line, then queue its computation.
+
+        respond is called with the response dict, from a worker thread unless
+        the request was answered while preparing it.
+        """
+        line = line.strip()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be an object")
+        except ValueError as e:
+            respond({"id": None, "error": "invalid JSON: %s" % e})
+            return
+
+        response, job = prepareRequest(request, self.cache)
+        if job is None:
+            respond(response)
+            return
+
+        self.slots.acquire()
+        try:
+            self.executor.submit(self.__process, job, response, respond)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def serveStream(self, inStream, outStream):
+        """Answer the requests of inStream on outStream until it ends."""
+        writeLock = threading.Lock()
+
+        def respond(response):
+            with writeLock:
+                outStream.write(json.dumps(response) + "\n")
+                outStream.flush()
+
+        for line in inStream:
+            self.submit(line, respond)
+
+    def serveSocket(self, path):
+        """Accept connections on a Unix socket at path, forever.
+
+        Every connection is a stream of requests and responses like stdin and
+        stdout; the cache and the workers are shared by all connections.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(16)
+        try:
+            while True:
+                connection = listener.accept()[0]
+                thread = threading.Thread(target=self.__connection,
+                                          args=(connection,))
+                thread.daemon = True
+                thread.start()
+        finally:
+            listener.close()
+            os.unlink(path)
+
+    def __connection(self, connection):
+        """Serve one socket connection until the client closes it."""
+        inStream = connection.makefile("r")
+        outStream = connection.makefile("w")
+        try:
+            self.serveStream(inStream, outStream)
+        except (IOError, OSError):
+            # The client went away.
+            pass
+        finally:
+            inStream.close()
+            connection.close()
+
+    def shutdown(self):
+        """Wait for the queued requests and stop the workers."""
+        self.executor.shutdown(wait=True)
+
+
+def main(argv):
+    """Run the server mode with command line arguments argv."""
+    argParser = argparse.ArgumentParser(
+        prog="serve",
+        description="Answer JSON-lines requests (det, inverse, rank, solve, "
+                    "multiply) from stdin or a Unix socket, keeping named "
+                    "matrices and their factorizations cached.")
+    argParser.add_argument("--socket",
+                           help="listen on a Unix socket at this path "
+                                "instead of reading stdin")
+    argParser.add_argument("-w", "--workers", type=int, default=4,
+                           help="amount of worker threads")
+    args = argParser.parse_args(argv)
+
+    server = Server(max(1, args.workers))
+    try:
+        if args.socket:
+            server.serveSocket(args.socket)
+        else:
+            server.serveStream(sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
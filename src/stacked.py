@@ -0,0 +1,483 @@
+from .my_algorithms import my_range, fast_gcd, my_abs
+from .Matrix import _is_integer
+from .calculator import frac_reduc
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Integer stacks whose intermediate values stay below this are computed with
+# machine integers, larger ones with Python integers.
+INT64_LIMIT = 2 ** 63
+
+# Primes below 2^31, so that the product of two residues and the difference
+# of two such products fit into 63 bits.
+PRIMES = [2147483647, 2147483629]
+
+# Systems up to this size use a closed-form expansion.
+CLOSED_FORM_SIZE = 4
+
+
+# The closed forms work on anything indexable as a[i][j] that supports + - *:
+# the rows of one system, or, for a stack, the rows of entries a[i][j] that
+# are NumPy arrays holding cell (i, j) of every system.
+
+def __det0(a):
+    return 1
+
+
+def __det1(a):
+    return a[0][0]
+
+
+def __det2(a):
+    return a[0][0] * a[1][1] - a[0][1] * a[1][0]
+
+
+def __det3(a):
+    return a[0][0] * (a[1][1] * a[2][2] - a[1][2] * a[2][1]) - \
+        a[0][1] * (a[1][0] * a[2][2] - a[1][2] * a[2][0]) + \
+        a[0][2] * (a[1][0] * a[2][1] - a[1][1] * a[2][0])
+
+
+def __det4(a):
+    # Laplace expansion along the first two rows: every 2x2 minor of rows 0
+    # and 1 times its complementary minor of rows 2 and 3.
+    s0 = a[0][0] * a[1][1] - a[1][0] * a[0][1]
+    s1 = a[0][0] * a[1][2] - a[1][0] * a[0][2]
+    s2 = a[0][0] * a[1][3] - a[1][0] * a[0][3]
+    s3 = a[0][1] * a[1][2] - a[1][1] * a[0][2]
+    s4 = a[0][1] * a[1][3] - a[1][1] * a[0][3]
+    s5 = a[0][2] * a[1][3] - a[1][2] * a[0][3]
+    c5 = a[2][2] * a[3][3] - a[3][2] * a[2][3]
+    c4 = a[2][1] * a[3][3] - a[3][1] * a[2][3]
+    c3 = a[2][1] * a[3][2] - a[3][1] * a[2][2]
+    c2 = a[2][0] * a[3][3] - a[3][0] * a[2][3]
+    c1 = a[2][0] * a[3][2] - a[3][0] * a[2][2]
+    c0 = a[2][0] * a[3][1] - a[3][0] * a[2][1]
+    return s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+
+
+__CLOSED_FORMS = [__det0, __det1, __det2, __det3, __det4]
+
+
+def __bareiss(rows):
+    """Calculate the determinant of a square integer matrix.
+
+    Fraction-free Bareiss elimination on a copy of rows, see
+    calculator.__bareiss.
+    """
+    a = [list(row) for row in rows]
+    n = len(a)
+    sign = 1
+    previous = 1
+    for k in my_range(n - 1):
+        if a[k][k] == 0:
+            for i in my_range(k + 1, n):
+                if a[i][k] != 0:
+                    a[k], a[i] = a[i], a[k]
+                    sign = -sign
+                    break
+            else:
+                return 0
+
+        pivotRow = a[k]
+        pivot = pivotRow[k]
+        for i in my_range(k + 1, n):
+            row = a[i]
+            factor = row[k]
+            row[k+1:] = [(pivot * x - factor * y) // previous
+                         for x, y in zip(row[k+1:], pivotRow[k+1:])]
+        previous = pivot
+    return sign * a[n-1][n-1]
+
+
+def __float_elimination(rows):
+    """Calculate the determinant of a square float matrix.
+
+    Gaussian elimination with partial pivoting on a copy of rows.
+    """
+    a = [list(row) for row in rows]
+    n = len(a)
+    det = 1.0
+    for k in my_range(n):
+        swapWith = k
+        for i in my_range(k + 1, n):
+            if abs(a[i][k]) > abs(a[swapWith][k]):
+                swapWith = i
+        if a[swapWith][k] == 0.0:
+            return 0.0
+        if swapWith != k:
+            a[k], a[swapWith] = a[swapWith], a[k]
+            det = -det
+
+        pivotRow = a[k]
+        pivot = pivotRow[k]
+        det *= pivot
+        for i in my_range(k + 1, n):
+            row = a[i]
+            factor = row[k] / pivot
+            if factor != 0.0:
+                row[k+1:] = [x - factor * y
+                             for x, y in zip(row[k+1:], pivotRow[k+1:])]
+    return det
+
+
+def __determinant(rows, inexact):
+    """Calculate the determinant of one integer or float matrix."""
+    n = len(rows)
+    if n <= CLOSED_FORM_SIZE:
+        return __CLOSED_FORMS[n](rows)
+    if inexact:
+        return __float_elimination(rows)
+    return __bareiss(rows)
+
+
+def __closed_form_fits(n, largest):
+    """Find out if the closed form of size n is exact in 64 bits.
+
+    largest bounds the absolute values of the entries. The closed forms sum
+    at most n! products of n entries.
+    """
+    bound = 1
+    for k in my_range(2, n + 1):
+        bound *= k
+    return bound * largest ** n < INT64_LIMIT
+
+
+def __primes_needed(n, largest):
+    """Return how many of PRIMES determine an n x n determinant, or None.
+
+    By Hadamard's inequality |det| <= (sqrt(n) * largest)^n =: H, so the
+    residues modulo primes whose product M exceeds 2H determine it. Return
+    None if all of PRIMES are not enough.
+    """
+    # Compare squares, (2H)^2 = 4 (n largest^2)^n, to stay in integers.
+    squaredBound = 4 * (n * largest * largest) ** n
+    modulus = 1
+    for count in my_range(1, len(PRIMES) + 1):
+        modulus *= PRIMES[count - 1]
+        if squaredBound < modulus * modulus:
+            return count
+    return None
+
+
+def __largest_fitting(fits):
+    """Return the biggest entry bound L with fits(L), by bisection."""
+    low = 0
+    high = INT64_LIMIT
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def __reduce_mod(x, p):
+    """Reduce an int64 array of non-negative values modulo p, in place.
+
+    NumPy divides by a constant much faster than it takes the remainder,
+    especially of negative values, so the residues are always kept
+    non-negative.
+    """
+    x -= x // p * p
+    return x
+
+
+def __power_mod(base, exponent, p):
+    """Raise every value of an int64 array of residues mod p to exponent."""
+    result = numpy.ones_like(base)
+    while exponent > 0:
+        if exponent & 1:
+            result = __reduce_mod(result * base, p)
+        base = __reduce_mod(base * base, p)
+        exponent >>= 1
+    return result
+
+
+def __stack_determinants_mod(stack, p):
+    """Calculate the determinants of an int64 stack modulo the prime p.
+
+    Gaussian elimination without divisions: the rows below the pivot row
+    are multiplied by the pivot before the pivot row is subtracted, which
+    multiplies the determinant by pivot^(rows below). The product of the
+    pivots is divided by these factors with one modular inverse per system
+    at the end. A system without a non-zero pivot modulo p has a
+    determinant divisible by p; it gets a pivot of 1 so that the step stays
+    valid for the others.
+
+    The entries must be smaller than p in absolute value. The stack is
+    rearranged to shape (n, n, k), so that every cell of all the systems is
+    one contiguous vector.
+    """
+    k, n = stack.shape[0], stack.shape[1]
+    a = __reduce_mod(numpy.ascontiguousarray(stack.transpose(1, 2, 0)) + p, p)
+    systems = numpy.arange(k)
+    det = numpy.ones(k, dtype=numpy.int64)
+    factors = numpy.ones(k, dtype=numpy.int64)
+    zero = numpy.zeros(k, dtype=bool)
+
+    for c in range(n):
+        nonzero = a[c:, c] != 0
+        zero |= ~nonzero.any(axis=0)
+        pivots = c + nonzero.argmax(axis=0)
+
+        swap = systems[pivots != c]
+        if swap.size > 0:
+            other = pivots[swap]
+            rows = a[c, :, swap]
+            a[c, :, swap] = a[other, :, swap]
+            a[other, :, swap] = rows
+            det[swap] = p - det[swap]
+        a[c, c, zero] = 1
+
+        pivot = a[c, c].copy()
+        det = __reduce_mod(det * pivot, p)
+        if c < n - 1:
+            # pivot * x - factor * y, kept non-negative as
+            # pivot * x + factor * (p - y) < 2p^2 < 2^63.
+            block = a[c+1:, c+1:]
+            block *= pivot
+            block += a[c+1:, c, None] * (p - a[c, None, c+1:])
+            __reduce_mod(block, p)
+            factors = __reduce_mod(factors * __power_mod(pivot, n - 1 - c, p),
+                                   p)
+
+    det = __reduce_mod(det * __power_mod(factors, p - 2, p), p)
+    det[zero] = 0
+    return det
+
+
+def __stack_modular(stack, count):
+    """Calculate the determinants of an int64 stack exactly.
+
+    The determinants are computed modulo the first count PRIMES and
+    combined by Chinese remaindering into the symmetric range; count comes
+    from __primes_needed, so the result is exact and fits into 63 bits.
+    """
+    p = PRIMES[0]
+    det = __stack_determinants_mod(stack, p)
+    modulus = p
+    if count > 1:
+        q = PRIMES[1]
+        residues = __stack_determinants_mod(stack, q)
+        inverse = pow(p % q, q - 2, q)
+        t = __reduce_mod((residues - det + q) * inverse, q)
+        det = det + p * t
+        modulus = p * q
+    return numpy.where(det > modulus // 2, det - modulus, det)
+
+
+def __stack_closed_form(stack):
+    """Calculate the determinants of a stack with the closed forms."""
+    n = stack.shape[1]
+    cells = [[stack[:, i, j] for j in range(n)] for i in range(n)]
+    return __CLOSED_FORMS[n](cells)
+
+
+def __stack_bareiss(a):
+    """Calculate the determinants of an integer stack of shape (k, n, n).
+
+    The Bareiss elimination of __bareiss, one step for all systems at once.
+    Each system takes its first non-zero entry of the column as pivot. A
+    system without one is singular; it gets a pivot of 1 so that the step
+    stays valid for the others, and its determinant is set to 0 at the end.
+    a is overwritten.
+    """
+    k, n = a.shape[0], a.shape[1]
+    systems = numpy.arange(k)
+    sign = numpy.ones(k, dtype=a.dtype)
+    singular = numpy.zeros(k, dtype=bool)
+    previous = numpy.ones(k, dtype=a.dtype)
+
+    for c in range(n - 1):
+        nonzero = a[:, c:, c] != 0
+        singular |= ~nonzero.any(axis=1)
+        pivots = c + nonzero.argmax(axis=1)
+
+        swap = systems[pivots != c]
+        if swap.size > 0:
+            other = pivots[swap]
+            rows = a[swap, c].copy()
+            a[swap, c] = a[swap, other]
+            a[swap, other] = rows
+            sign[swap] = -sign[swap]
+        a[singular, c, c] = 1
+
+        pivot = a[:, c, c]
+        a[:, c+1:, c+1:] = (pivot[:, None, None] * a[:, c+1:, c+1:] -
+                            a[:, c+1:, c, None] * a[:, c, None, c+1:]) // \
+            previous[:, None, None]
+        previous = pivot.copy()
+
+    dets = sign * a[:, n-1, n-1]
+    dets[singular] = 0
+    return dets
+
+
+def __stack_determinants(stack):
+    """Calculate the determinants of a NumPy stack of shape (k, n, n).
+
+    Integer stacks are exact. The systems whose entries are small enough
+    for the closed forms, or the modular elimination of __stack_modular, to
+    stay within 64 bits are computed in machine integers, the others in
+    Python integers. Other stacks are computed in floating point.
+    """
+    k, n = stack.shape[0], stack.shape[1]
+    if k == 0:
+        return numpy.zeros(0, dtype=stack.dtype)
+    inexact = stack.dtype.kind not in "biuO"
+    if n == 0:
+        return numpy.ones(k, dtype=float if inexact else numpy.int64)
+
+    if inexact:
+        if n > CLOSED_FORM_SIZE:
+            return numpy.linalg.det(stack.astype(float))
+        return __stack_closed_form(stack.astype(float))
+
+    # The bound of every system; negative if abs overflowed at -2^63.
+    largest = numpy.abs(stack).max(axis=(1, 2))
+    if n <= CLOSED_FORM_SIZE:
+        limit = __largest_fitting(lambda L: __closed_form_fits(n, L))
+    else:
+        limit = __largest_fitting(lambda L: __primes_needed(n, L) is not None)
+    fits = (largest >= 0) & (largest <= limit)
+
+    def machine(systems):
+        if n <= CLOSED_FORM_SIZE:
+            return __stack_closed_form(systems)
+        return __stack_modular(systems,
+                               __primes_needed(n, int(largest[fits].max())))
+
+    if fits.all():
+        return machine(stack.astype(numpy.int64))
+
+    dets = numpy.empty(k, dtype=object)
+    if fits.any():
+        dets[fits] = machine(stack[fits].astype(numpy.int64))
+    rest = stack[~fits].astype(object)
+    if n <= CLOSED_FORM_SIZE:
+        dets[~fits] = __stack_closed_form(rest)
+    else:
+        dets[~fits] = __stack_bareiss(rest)
+    return dets
+
+
+def __integer_system(rows):
+    """Scale a system of ints, floats and (num, den) tuples to integers.
+
+    Return a tuple (integer rows, product of the row denominators, whether
+    there is a fraction), or None if the system holds a float.
+    """
+    integerRows = []
+    denominator = 1
+    fractional = False
+    for row in rows:
+        common = 1
+        for cell in row:
+            if isinstance(cell, tuple):
+                if not _is_integer(cell[0]) or not _is_integer(cell[1]):
+                    return None
+                fractional = True
+                common = common // fast_gcd(common, cell[1]) * my_abs(cell[1])
+            elif not _is_integer(cell):
+                return None
+        integerRows.append([cell[0] * (common // cell[1])
+                            if isinstance(cell, tuple) else cell * common
+                            for cell in row])
+        denominator *= common
+    return (integerRows, denominator, fractional)
+
+
+def __float_system(rows):
+    """Convert a system of ints, floats and (num, den) tuples to floats."""
+    return [[cell[0] * 1.0 / cell[1] if isinstance(cell, tuple)
+             else cell * 1.0 for cell in row] for row in rows]
+
+
+def __check_shape(systems):
+    """Raise a ValueError unless systems holds square systems of one size."""
+    if not systems:
+        return
+    n = len(systems[0])
+    for rows in systems:
+        if len(rows) != n:
+            raise ValueError("all systems must have the same size")
+        for row in rows:
+            if len(row) != n:
+                raise ValueError("the systems must be square")
+
+
+def __list_determinants(systems):
+    """Calculate the determinants of a list of systems given as row lists."""
+    __check_shape(systems)
+    exact = [__integer_system(rows) for rows in systems]
+
+    # Like a Matrix, a stack with a float in it is computed in floating point.
+    for system in exact:
+        if system is None:
+            return [__determinant(__float_system(rows), True)
+                    for rows in systems]
+
+    if numpy is not None and systems:
+        n = len(systems[0])
+        stack = numpy.empty((len(systems), n, n), dtype=object)
+        for index, system in enumerate(exact):
+            stack[index] = system[0]
+        integerDets = __stack_determinants(stack).tolist()
+    else:
+        integerDets = [__determinant(system[0], False) for system in exact]
+
+    # Plain integers stay integers, fractions become (num, den) tuples.
+    return [frac_reduc((det, system[1])) if system[2] else det
+            for det, system in zip(integerDets, exact)]
+
+
+def batchDeterminants(systems):
+    """Calculate the determinants of a stack of small square systems at once.
+
+    systems is a NumPy array of shape (k, n, n), or a list of k systems,
+    each a list of n rows of n cells. The cells are ints, floats or
+    (num, den) fraction tuples.
+
+    Unlike the Matrix functions, no objects are built per system: sizes up
+    to CLOSED_FORM_SIZE use closed-form expansions, larger ones elimination,
+    and with NumPy both run for all systems at once. Integer systems are
+    exact. They use machine integers when the entries are small enough for
+    no intermediate value to overflow, or for the Hadamard bound to fit
+    below the product of two primes modulo which they are eliminated, and
+    Python integers otherwise.
+    Fractions are scaled to integers row by row first. A stack with a float
+    in it is computed in floating point.
+
+    Return a tuple (determinants, singular). For a NumPy array both are
+    arrays of length k, otherwise lists. Determinants of exact systems with
+    fractions are (num, den) tuples. singular[i] is True if determinant i is
+    zero; for floats this is not certain, use isSingular for that.
+    """
+    if numpy is not None and isinstance(systems, numpy.ndarray):
+        if systems.ndim != 3 or systems.shape[1] != systems.shape[2]:
+            raise ValueError("expected a stack of shape (k, n, n)")
+        dets = __stack_determinants(systems)
+        return (dets, dets == 0)
+
+    if numpy is not None:
+        stack = None
+        try:
+            stack = numpy.array(systems)
+        except (ValueError, TypeError):
+            # Ragged, or mixed fraction tuples and numbers.
+            pass
+        if stack is not None and stack.ndim == 3 and \
+                stack.dtype.kind in "biuf":
+            if stack.shape[1] != stack.shape[2]:
+                raise ValueError("the systems must be square")
+            dets = __stack_determinants(stack).tolist()
+            return (dets, [det == 0 for det in dets])
+
+    dets = __list_determinants(list(systems))
+    return (dets, [(det[0] if isinstance(det, tuple) else det) == 0
+                   for det in dets])
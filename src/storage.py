@@ -0,0 +1,235 @@
+from .my_algorithms import my_range
+from .Matrix import Matrix, _is_integer
+from array import array
+import mmap
+import struct
+import sys
+
+# Layout of a binary matrix file, all integers little-endian:
+#
+#   header      -- HEADER_FORMAT: magic, version, flags, rows n, columns m and
+#                  the offsets of the numerator, denominator and scalar
+#                  sections, and the length of the scalar
+#   numerators  -- the n * m row-major numerators
+#   denominators-- the n row denominators
+#   scalar      -- the scalar as a signed integer of scalar length bytes
+#
+# A section is either fixed-width, n int64 values, or variable-width if some
+# value does not fit into 64 bits: n + 1 int64 offsets followed by the values
+# as signed integers of offset[k + 1] - offset[k] bytes. The sections start at
+# multiples of 8, so that they can be read in place from a memory map.
+#
+# Unlike the rest of the calculator this module needs Python 3: reading in
+# place relies on memoryview.cast and big integers on int.to_bytes.
+MAGIC = b"SGLRMAT\0"
+VERSION = 1
+HEADER_FORMAT = "<8sIIqqqqqq"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Flags telling which sections are variable-width.
+VARIABLE_NUMERATORS = 1
+VARIABLE_DENOMINATORS = 2
+
+__LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class VariableSection(object):
+    """A read-only sequence of big integers in a variable-width section.
+
+    The values are decoded one at a time when they are indexed, so a matrix
+    loaded from a file only reads the cells that are used.
+    """
+
+    __slots__ = ["offsets", "data"]
+
+    def __init__(self, offsets, data):
+        """Construct a section from the offsets and the bytes of the values."""
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        """Return the amount of values."""
+        return len(self.offsets) - 1
+
+    def __value(self, k):
+        """Decode the k:th value."""
+        return int.from_bytes(self.data[self.offsets[k]:self.offsets[k + 1]],
+                              "little", signed=True)
+
+    def __getitem__(self, k):
+        """Return a value, or a list of values for a slice."""
+        if isinstance(k, slice):
+            # my_range does not take a step.
+            return [self.__value(i) for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("section index out of range")
+        return self.__value(k)
+
+    def __iter__(self):
+        """Iterate over the values."""
+        for k in my_range(len(self)):
+            yield self.__value(k)
+
+
+def __require_python3():
+    """Raise RuntimeError on Python 2, see the comment at the top."""
+    if sys.version_info[0] < 3:
+        raise RuntimeError("binary matrix files need Python 3")
+
+
+def __is_exact(values):
+    """Find out if every value of a numerator buffer is an integer."""
+    if isinstance(values, array):
+        return values.typecode == "q"
+    if isinstance(values, VariableSection):
+        return True
+    for x in values:
+        if not _is_integer(x):
+            return False
+    return True
+
+
+def __int_bytes(n):
+    """Encode n as a signed little-endian integer of as few bytes as possible."""
+    return n.to_bytes(n.bit_length() // 8 + 1, "little", signed=True)
+
+
+def __encode_section(values):
+    """Encode a section. Return a tuple (bytes, variable)."""
+    try:
+        fixed = array("q", values)
+        if not __LITTLE_ENDIAN:
+            fixed.byteswap()
+        return (fixed.tobytes(), False)
+    except OverflowError:
+        pass
+
+    encoded = [__int_bytes(x) for x in values]
+    offsets = array("q", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    if not __LITTLE_ENDIAN:
+        offsets.byteswap()
+    return (offsets.tobytes() + b"".join(encoded), True)
+
+
+def __padding(length):
+    """Return the zero bytes needed to reach the next multiple of 8."""
+    return b"\0" * (-length % 8)
+
+
+def saveBinary(A, path):
+    """Save matrix A into a binary file at path.
+
+    A has to consist of exact fractions with an integer scalar; raise
+    ValueError otherwise. The scalar is stored as is, so no cell is touched.
+    """
+    __require_python3()
+    if isinstance(A, Matrix):
+        numerators = A.numerators
+        denominators = A.denominators
+        scalar = A.getScalar()
+        # A single float anywhere in the numerators makes the matrix inexact.
+        if not _is_integer(scalar) or not __is_exact(numerators):
+            raise ValueError("only matrices of exact fractions can be saved")
+    else:
+        # Any other matrix type is saved through its integer rows.
+        numerators = []
+        denominators = []
+        for i in my_range(A.getRowAmount()):
+            integerRow = A.getIntegerRow(i)
+            if integerRow is None:
+                raise ValueError("only matrices of exact fractions can be "
+                                 "saved")
+            numerators.extend(integerRow[0])
+            denominators.append(integerRow[1])
+        scalar = 1
+
+    numeratorBytes, variableNumerators = __encode_section(numerators)
+    denominatorBytes, variableDenominators = __encode_section(denominators)
+    scalarBytes = __int_bytes(scalar)
+
+    flags = 0
+    if variableNumerators:
+        flags |= VARIABLE_NUMERATORS
+    if variableDenominators:
+        flags |= VARIABLE_DENOMINATORS
+
+    numeratorOffset = HEADER_SIZE
+    denominatorOffset = numeratorOffset + len(numeratorBytes) + \
+        len(__padding(len(numeratorBytes)))
+    scalarOffset = denominatorOffset + len(denominatorBytes) + \
+        len(__padding(len(denominatorBytes)))
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, flags,
+                         A.getRowAmount(), A.getColAmount(), numeratorOffset,
+                         denominatorOffset, scalarOffset, len(scalarBytes))
+
+    stream = open(path, "wb")
+    try:
+        stream.write(header)
+        stream.write(numeratorBytes)
+        stream.write(__padding(len(numeratorBytes)))
+        stream.write(denominatorBytes)
+        stream.write(__padding(len(denominatorBytes)))
+        stream.write(scalarBytes)
+    finally:
+        stream.close()
+
+
+def __section(view, offset, count, variable):
+    """Return the section of count values at offset of the memory view."""
+    if variable:
+        end = offset + 8 * (count + 1)
+        offsets = view[offset:end].cast("q")
+        if not __LITTLE_ENDIAN:
+            offsets = array("q", offsets)
+            offsets.byteswap()
+        return VariableSection(offsets, view[end:])
+
+    section = view[offset:offset + 8 * count].cast("q")
+    if not __LITTLE_ENDIAN:
+        # Swapping the bytes needs a copy in memory.
+        section = array("q", section)
+        section.byteswap()
+    return section
+
+
+def loadBinary(path):
+    """Load a matrix saved by saveBinary.
+
+    The file is memory-mapped and the returned Matrix reads its cells straight
+    from the map, so loading takes no time and processes that load the same
+    file share one copy of it in the page cache. Raise ValueError if the file
+    is not a binary matrix file.
+    """
+    __require_python3()
+    stream = open(path, "rb")
+    try:
+        size = len(stream.read(HEADER_SIZE))
+        if size < HEADER_SIZE:
+            raise ValueError("'%s' is not a binary matrix file" % path)
+        fileMap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        stream.close()
+
+    view = memoryview(fileMap)
+    magic, version, flags, n, m, numeratorOffset, denominatorOffset, \
+        scalarOffset, scalarLength = struct.unpack(HEADER_FORMAT,
+                                                   view[:HEADER_SIZE])
+    if magic != MAGIC:
+        raise ValueError("'%s' is not a binary matrix file" % path)
+    if version != VERSION:
+        raise ValueError("unsupported binary matrix version %d" % version)
+
+    numerators = __section(view, numeratorOffset, n * m,
+                           flags & VARIABLE_NUMERATORS)
+    denominators = __section(view, denominatorOffset, n,
+                             flags & VARIABLE_DENOMINATORS)
+
+    A = Matrix.fromBuffers(numerators, denominators, n, m)
+    A.scalar = int.from_bytes(
+        view[scalarOffset:scalarOffset + scalarLength], "little", signed=True)
+    return A
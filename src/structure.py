@@ -0,0 +1,88 @@
+from .my_algorithms import my_range
+
+# Matrices whose non-zeros lie within this many diagonals below and above the
+# main diagonal count as banded, if they have more than 2 * BAND_LIMIT rows.
+# Smaller matrices always fit into such a band, and the general algorithms
+# are faster on them.
+BAND_LIMIT = 5
+
+
+class Structure(object):
+    """The shape of the non-zeros of a square matrix.
+
+    kind  -- "diagonal", "permutation", "upper" or "lower" triangular,
+             "banded" or "general", the first one that applies
+    lower -- the lower bandwidth: every non-zero (i, j) has i - j <= lower
+    upper -- the upper bandwidth: every non-zero (i, j) has j - i <= upper
+    permutation -- for a permutation matrix, the column of the one of each
+                   row, otherwise None
+    """
+
+    __slots__ = ["kind", "lower", "upper", "permutation"]
+
+    def __init__(self, kind, lower, upper, permutation=None):
+        self.kind = kind
+        self.lower = lower
+        self.upper = upper
+        self.permutation = permutation
+
+    def isSpecial(self):
+        """Find out if a specialised algorithm applies."""
+        return self.kind != "general"
+
+    def __str__(self):
+        """Describe the structure, e.g. 'banded (lower 1, upper 2)'."""
+        if self.kind in ("banded", "general"):
+            return "%s (lower %d, upper %d)" % (self.kind, self.lower,
+                                                self.upper)
+        return self.kind
+
+
+def scanStructure(A):
+    """Find the structure of the square exact matrix A in one pass.
+
+    Return a Structure, or None if A is not square or not exact.
+    """
+    n = A.getRowAmount()
+    if n != A.getColAmount():
+        return None
+
+    lower = 0
+    upper = 0
+    permutation = []
+    usedColumns = set()
+    for i in my_range(n):
+        integerRow = A.getIntegerRow(i)
+        if integerRow is None:
+            return None
+        numerators, denominator = integerRow
+
+        nonzeros = [j for j in my_range(n) if numerators[j] != 0]
+        if not nonzeros:
+            permutation = None
+            continue
+        lower = max(lower, i - nonzeros[0])
+        upper = max(upper, nonzeros[-1] - i)
+
+        # A row of a permutation matrix is a single one in a new column.
+        if permutation is not None:
+            j = nonzeros[0]
+            if len(nonzeros) == 1 and numerators[j] == denominator and \
+                    j not in usedColumns:
+                permutation.append(j)
+                usedColumns.add(j)
+            else:
+                permutation = None
+
+    if lower == 0 and upper == 0:
+        return Structure("diagonal", 0, 0)
+    if permutation is not None:
+        return Structure("permutation", lower, upper, permutation)
+    if lower == 0:
+        return Structure("upper", lower, upper)
+    if upper == 0:
+        return Structure("lower", lower, upper)
+    if n > 2 * BAND_LIMIT and lower <= BAND_LIMIT and upper <= BAND_LIMIT \
+            and lower + upper < n - 1:
+        return Structure("banded", lower, upper)
+    return Structure("general", lower, upper)
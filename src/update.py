@@ -0,0 +1,189 @@
+from .my_algorithms import my_range, fast_gcd, my_abs
+from .Matrix import Matrix, _is_integer
+from .calculator import frac_add, frac_sub, frac_mult, frac_div, frac_reduc, \
+    solve
+
+# Editing a row, a column or a cell of A changes it by a rank-one matrix
+# u v^T. With B = A^-1 and s = 1 + v^T B u,
+#
+#   det(A + u v^T) = s * det(A)                  (matrix determinant lemma)
+#   (A + u v^T)^-1 = B - (B u)(v^T B) / s        (Sherman-Morrison)
+#
+# so the cached determinant and inverse can be kept current in O(n^2). Only the
+# caches that exist are updated: without an inverse, B u comes from the cached
+# factorization, and without either the determinant is dropped, as finding s
+# would cost as much as a new determinant. If s is zero, the edited matrix is
+# singular: its determinant is 0 and the inverse is dropped.
+
+
+def __forget(A):
+    """Drop the cached determinant and inverse of A."""
+    A.determinant = None
+    A.inverse = None
+
+
+def __is_exact(fracs):
+    """Find out if every value is an exact fraction."""
+    for frac in fracs:
+        if not _is_integer(frac[0]) or not _is_integer(frac[1]):
+            return False
+    return True
+
+
+def __integer_vector(entries, n):
+    """Scale a sparse vector {index: (num, den)} of size n to integers.
+
+    Return a tuple (numerators, denominator).
+    """
+    common = 1
+    for frac in entries.values():
+        common = common // fast_gcd(common, frac[1]) * my_abs(frac[1])
+    numerators = [0] * n
+    for k, frac in entries.items():
+        numerators[k] = frac[0] * (common // frac[1])
+    return (numerators, common)
+
+
+def __inverse_rows(A):
+    """Return the rows of the cached inverse of A as (numerators, denominator).
+
+    Return None if no exact inverse is cached.
+    """
+    if A.inverse is None:
+        return None
+
+    rows = []
+    for k in my_range(A.getRowAmount()):
+        integerRow = A.inverse.getIntegerRow(k)
+        if integerRow is None:
+            return None
+        rows.append(integerRow)
+    return rows
+
+
+def __update_determinant(A, u, v):
+    """Update the cached determinant of A for A + u v^T, without an inverse.
+
+    B u is solved with the cached factorization of A in O(n^2). Without a
+    factorization, or if A is singular, the determinant is dropped.
+    """
+    if A.determinant is None or A.determinant[0] == 0 or \
+            A.factorization is None:
+        __forget(A)
+        return
+
+    n = A.getRowAmount()
+    w = solve(A, Matrix([[u.get(i, (0, 1))] for i in my_range(n)], n, 1))
+    s = (1, 1)
+    for k, frac in v.items():
+        s = frac_add(s, frac_mult(frac, w.getCell(k, 0)))
+    A.determinant = frac_reduc(frac_mult(A.determinant, frac_reduc(s)))
+
+
+def __rank_one(A, u, v):
+    """Update the cached determinant and inverse of A for A + u v^T.
+
+    Call this before A itself is changed. u and v are the non-zero entries
+    as dicts {index: (num, den)}.
+    """
+    n = A.getRowAmount()
+    if n != A.getColAmount() or not __is_exact(u.values()) or \
+            not __is_exact(v.values()):
+        __forget(A)
+        return
+
+    rows = __inverse_rows(A)
+    if rows is None:
+        __update_determinant(A, u, v)
+        return
+
+    # w = B u, one integer dot product per row.
+    uNumerators, uDenominator = __integer_vector(u, n)
+    w = []
+    for numerators, denominator in rows:
+        dot = 0
+        for k in u:
+            dot += numerators[k] * uNumerators[k]
+        w.append(frac_reduc((dot, denominator * uDenominator)))
+
+    s = (1, 1)
+    for k, frac in v.items():
+        s = frac_add(s, frac_mult(frac, w[k]))
+    s = frac_reduc(s)
+
+    if s[0] == 0:
+        A.determinant = (0, 1)
+        A.inverse = None
+        return
+    if A.determinant is not None:
+        A.determinant = frac_reduc(frac_mult(A.determinant, s))
+
+    # z = v^T B over one common denominator.
+    zDenominator = 1
+    for k, frac in v.items():
+        d = frac[1] * rows[k][1]
+        zDenominator = zDenominator // fast_gcd(zDenominator, d) * my_abs(d)
+    z = [0] * n
+    for k, frac in v.items():
+        mult = frac[0] * (zDenominator // (frac[1] * rows[k][1]))
+        z = [x + mult * y for x, y in zip(z, rows[k][0])]
+
+    # Row r of the new inverse is B[r] - (w[r] / s) * z.
+    newRows = []
+    newDenominators = []
+    for r in my_range(n):
+        numerators, denominator = rows[r]
+        c = frac_reduc(frac_div(w[r], s))
+        if c[0] == 0:
+            newRows.append(numerators)
+            newDenominators.append(denominator)
+            continue
+        d = c[1] * zDenominator
+        common = denominator // fast_gcd(denominator, d) * my_abs(d)
+        a = common // denominator
+        b = c[0] * (common // d)
+        newRows.append([a * x - b * y for x, y in zip(numerators, z)])
+        newDenominators.append(common)
+
+    A.inverse = Matrix.fromIntegerRows(newRows, newDenominators)
+
+
+def updateCell(A, row, col, value):
+    """Update the caches of A for setting cell (row, col) to value.
+
+    Here u = e_row and v = (value - A[row][col]) e_col.
+    """
+    delta = frac_reduc(frac_sub(value, A.getCell(row, col)))
+    if delta[0] == 0:
+        return
+    __rank_one(A, {row: (1, 1)}, {col: delta})
+
+
+def updateRow(A, row, values):
+    """Update the caches of A for replacing a row with values.
+
+    Here u = e_row and v = values - A[row].
+    """
+    v = {}
+    old = A.getRow(row)
+    for j in my_range(A.getColAmount()):
+        delta = frac_reduc(frac_sub(values[j], old[j]))
+        if delta[0] != 0:
+            v[j] = delta
+    if v:
+        __rank_one(A, {row: (1, 1)}, v)
+
+
+def updateColumn(A, col, values):
+    """Update the caches of A for replacing a column with values.
+
+    Here u = values - A[:, col] and v = e_col.
+    """
+    u = {}
+    old = A.getCol(col)
+    for i in my_range(A.getRowAmount()):
+        delta = frac_reduc(frac_sub(values[i], old[i]))
+        if delta[0] != 0:
+            u[i] = delta
+    if u:
+        __rank_one(A, u, {col: (1, 1)})
@@ -0,0 +1,332 @@
+from .my_algorithms import my_range, fast_gcd, my_abs
+from .Matrix import Matrix, _is_integer
+from .SparseMatrix import _reduce
+
+
+def _caches(view):
+    """Return the dict of the caches of a view.
+
+    The caches are dropped as soon as the viewed matrix has changed, so a
+    view never returns a result computed from the old cells.
+    """
+    if view.seen != view.matrix.version:
+        view.caches = {}
+        view.seen = view.matrix.version
+    return view.caches
+
+
+def _cache(name):
+    """A cache of a view like Matrix.determinant, with the same name."""
+    def get(self):
+        return _caches(self).get(name)
+
+    def set(self, value):
+        _caches(self)[name] = value
+
+    return property(get, set)
+
+
+class MatrixView(object):
+    """A read-only view of a part of a Matrix, possibly transposed or scaled.
+
+    The view shares the storage of the matrix and resolves its indices
+    lazily: cell (i, j) of the view is scalar times cell (rows[i], cols[j])
+    of the matrix, or cell (rows[j], cols[i]) if transposed is True. Only the
+    index lists are stored, so building a view is O(n + m) however big the
+    matrix is. The getters are the same as the ones of Matrix, so the
+    calculator functions accept views anywhere they accept a Matrix.
+
+    Use transposeView, sliceView, minorView and scaledView to build views;
+    they also take views, and a view of a view looks straight into the
+    matrix. Changes of the matrix show through its views.
+    """
+
+    __slots__ = ["matrix", "rows", "cols", "transposed", "scalar", "caches",
+                 "seen"]
+
+    def __init__(self, matrix, rows, cols, transposed=False, scalar=1):
+        """Construct a view.
+
+        Keyword arguments:
+        matrix     -- the viewed Matrix
+        rows       -- the list of the viewed row indices of the matrix
+        cols       -- the list of the viewed column indices of the matrix
+        transposed -- if True, the rows of the view are the columns
+        scalar     -- a factor of every cell on top of the matrix's scalar
+        """
+        if not isinstance(matrix, Matrix):
+            raise TypeError("views need a Matrix")
+        self.matrix = matrix
+        self.rows = rows
+        self.cols = cols
+        self.transposed = transposed
+        self.scalar = scalar
+        self.caches = {}
+        self.seen = matrix.version
+
+    determinant = _cache("determinant")
+    factorization = _cache("factorization")
+    inverse = _cache("inverse")
+    structure = _cache("structure")
+
+    def copy(self):
+        """Return a new view of the same cells, without the caches."""
+        return MatrixView(self.matrix, self.rows, self.cols, self.transposed,
+                          self.scalar)
+
+    def toMatrix(self):
+        """Return a Matrix with the same cells that does not share storage."""
+        n = self.getRowAmount()
+        rows = []
+        denominators = []
+        for i in my_range(n):
+            integerRow = self.getIntegerRow(i)
+            if integerRow is None:
+                return Matrix(self.getRowArray(), n, self.getColAmount())
+            rows.append(integerRow[0])
+            denominators.append(integerRow[1])
+        return Matrix.fromIntegerRows(rows, denominators)
+
+    def __str__(self):
+        """Print the matrix in a readable format"""
+        return self.toMatrix().__str__()
+
+    # The operators build lazy expressions like the ones of Matrix, see
+    # expression.py. Use evaluate() on the result to get a Matrix.
+
+    def __add__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__add__(other)
+
+    def __radd__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__radd__(other)
+
+    def __sub__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__sub__(other)
+
+    def __rsub__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__rsub__(other)
+
+    def __neg__(self):
+        from .expression import Leaf
+        return Leaf(self).__neg__()
+
+    def __mul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__mul__(other)
+
+    def __rmul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__rmul__(other)
+
+    def __matmul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__matmul__(other)
+
+    def __rmatmul__(self, other):
+        from .expression import Leaf
+        return Leaf(self).__rmatmul__(other)
+
+    @property
+    def T(self):
+        """The transpose of the view as a lazy expression."""
+        from .expression import Leaf
+        return Leaf(self, True)
+
+    def multiplyScalar(self, n):
+        """Multiply the scalar of the view, the matrix is not changed.
+
+        The caches of the view are dropped.
+        """
+        self.scalar *= n
+        self.caches = {}
+        self.seen = self.matrix.version
+
+    def __scalar(self):
+        """Return the factor of every stored numerator of the matrix."""
+        return self.matrix.scalar * self.scalar
+
+    def __cell(self, numerator, denominator):
+        """Return a reduced (num, den) tuple of a stored matrix cell."""
+        numerator = self.__scalar() * numerator
+        if not _is_integer(numerator):
+            return (numerator, denominator)
+        return _reduce(numerator, denominator)
+
+    def __column_scaling(self):
+        """Return the common denominator of the viewed rows of the matrix.
+
+        A row of a transposed view is a column of the matrix, whose cells
+        have no common denominator. Return a tuple (denominator, multipliers)
+        where the cell of viewed row k is multiplied by multipliers[k] to
+        have the denominator. It is cached until the matrix changes.
+        """
+        caches = _caches(self)
+        scaling = caches.get("scaling")
+        if scaling is None:
+            denominators = [self.matrix.denominators[r] for r in self.rows]
+            common = 1
+            for d in denominators:
+                common = common // fast_gcd(common, d) * my_abs(d)
+            scaling = (common, [common // d for d in denominators])
+            caches["scaling"] = scaling
+        return scaling
+
+    def getRowAmount(self):
+        """Return the amount of rows."""
+        return len(self.cols) if self.transposed else len(self.rows)
+
+    def getColAmount(self):
+        """Return the amount of columns."""
+        return len(self.rows) if self.transposed else len(self.cols)
+
+    def getScalar(self):
+        """Return the scalar value of the cells."""
+        return self.__scalar()
+
+    def getCell(self, row, col):
+        """Return the content of the requested cell"""
+        if self.transposed:
+            row, col = col, row
+        r = self.rows[row]
+        return self.__cell(
+            self.matrix.numerators[r * self.matrix.colAmount + self.cols[col]],
+            self.matrix.denominators[r])
+
+    def getRow(self, row):
+        """Return the requested row."""
+        if self.transposed:
+            return self.__line(self.cols[row], self.rows, False)
+        return self.__line(self.rows[row], self.cols, True)
+
+    def getCol(self, col):
+        """Return the requested column of the matrix."""
+        if self.transposed:
+            return self.__line(self.rows[col], self.cols, True)
+        return self.__line(self.cols[col], self.rows, False)
+
+    def __line(self, index, others, isRow):
+        """Return the cells of matrix row (or column) index at others."""
+        numerators = self.matrix.numerators
+        denominators = self.matrix.denominators
+        m = self.matrix.colAmount
+        if isRow:
+            start = index * m
+            denominator = denominators[index]
+            return [self.__cell(numerators[start + c], denominator)
+                    for c in others]
+        return [self.__cell(numerators[r * m + index], denominators[r])
+                for r in others]
+
+    def getRowArray(self):
+        """Return the row array."""
+        return [self.getRow(i) for i in my_range(self.getRowAmount())]
+
+    def getColArray(self):
+        """Return the column array."""
+        return [self.getCol(j) for j in my_range(self.getColAmount())]
+
+    def getIntegerRow(self, row):
+        """Return the requested row as a tuple (numerators, denominator).
+
+        The numerators are a new list of integers with the scalar applied.
+        Return None if the matrix does not consist of exact fractions.
+        """
+        scalar = self.__scalar()
+        if not _is_integer(scalar):
+            return None
+
+        numerators = self.matrix.numerators
+        m = self.matrix.colAmount
+        if self.transposed:
+            col = self.cols[row]
+            denominator, multipliers = self.__column_scaling()
+            result = [numerators[r * m + col] * mult
+                      for r, mult in zip(self.rows, multipliers)]
+        else:
+            r = self.rows[row]
+            start = r * m
+            denominator = self.matrix.denominators[r]
+            result = [numerators[start + c] for c in self.cols]
+
+        if len(result) > 0 and not _is_integer(result[0]):
+            return None
+        if scalar != 1:
+            result = [scalar * x for x in result]
+        return (result, denominator)
+
+    def getIntegerRows(self):
+        """Scale every row to integers by the row's common denominator.
+
+        Return a tuple (rows, denominator) so that the view equals
+        rows / denominator, or None if the matrix does not consist of exact
+        fractions (e.g. it has a float scalar).
+        """
+        rows = []
+        denominator = 1
+        for i in my_range(self.getRowAmount()):
+            integerRow = self.getIntegerRow(i)
+            if integerRow is None:
+                return None
+            rows.append(integerRow[0])
+            denominator *= integerRow[1]
+        return (rows, denominator)
+
+
+def __as_view(A):
+    """Return a view of all of A, or A itself if it is a view."""
+    if isinstance(A, MatrixView):
+        return A
+    if not isinstance(A, Matrix):
+        raise TypeError("views need a Matrix")
+    return MatrixView(A, my_range(A.getRowAmount()),
+                      my_range(A.getColAmount()))
+
+
+def __select(indices, selection):
+    """Pick the indices chosen by a selection.
+
+    selection is None for all of them, a slice or a list of positions.
+    """
+    if selection is None:
+        return indices
+    if isinstance(selection, slice):
+        return indices[selection]
+    return [indices[k] for k in selection]
+
+
+def transposeView(A):
+    """Return a view of the transpose of the Matrix or view A."""
+    V = __as_view(A)
+    return MatrixView(V.matrix, V.rows, V.cols, not V.transposed, V.scalar)
+
+
+def sliceView(A, rows=None, cols=None):
+    """Return a view of some rows and columns of the Matrix or view A.
+
+    rows and cols are each None for all of them, a slice like slice(2, 5) or
+    a list of indices, e.g. the blocks of a block algorithm.
+    """
+    V = __as_view(A)
+    if V.transposed:
+        return MatrixView(V.matrix, __select(V.rows, cols),
+                          __select(V.cols, rows), True, V.scalar)
+    return MatrixView(V.matrix, __select(V.rows, rows),
+                      __select(V.cols, cols), False, V.scalar)
+
+
+def minorView(A, row, col):
+    """Return a view of the Matrix or view A without a row and a column."""
+    return sliceView(A,
+                     [i for i in my_range(A.getRowAmount()) if i != row],
+                     [j for j in my_range(A.getColAmount()) if j != col])
+
+
+def scaledView(A, scalar):
+    """Return a view of the Matrix or view A multiplied by scalar."""
+    V = __as_view(A)
+    return MatrixView(V.matrix, V.rows, V.cols, V.transposed,
+                      V.scalar * scalar)
@@ -0,0 +1,105 @@
+from .my_algorithms import my_range
+from .Matrix import _is_integer
+import sys
+
+# The output is collected into pieces of about this many characters before
+# it is written, so big matrices take few write calls and little memory.
+CHUNK_SIZE = 1 << 16
+
+
+def __format_exact(cell, digits):
+    """Format a cell exactly as 'numerator/denominator'."""
+    numerator, denominator = cell
+    if not _is_integer(numerator) or not _is_integer(denominator):
+        return repr(numerator * 1.0 / denominator)
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    if denominator == 1:
+        return str(numerator)
+    return str(numerator) + "/" + str(denominator)
+
+
+def __format_decimal(cell, digits):
+    """Format a cell as a decimal number with digits decimals.
+
+    Exact fractions are rounded half away from zero in integer arithmetic,
+    so they neither lose digits nor overflow however big they are.
+    """
+    numerator, denominator = cell
+    if not _is_integer(numerator) or not _is_integer(denominator):
+        return "%.*f" % (digits, numerator * 1.0 / denominator)
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+
+    sign = "-" if numerator < 0 else ""
+    unit = 10 ** digits
+    scaled = (2 * abs(numerator) * unit + denominator) // (2 * denominator)
+    if scaled == 0:
+        sign = ""
+    whole, decimals = divmod(scaled, unit)
+    if digits == 0:
+        return sign + str(whole)
+    return "%s%d.%0*d" % (sign, whole, digits, decimals)
+
+
+__FORMATS = {"exact": (__format_exact, " "),
+             "decimal": (__format_decimal, " "),
+             "csv": (__format_exact, ",")}
+
+
+def writeMatrix(A, stream, format="exact", digits=6):
+    """Write a matrix to a text stream, one row per line.
+
+    Keyword arguments:
+    A      -- a Matrix or a SparseMatrix
+    stream -- a file object, e.g. sys.stdout
+    format -- "exact" for whitespace separated fractions like -2/3, "decimal"
+              for whitespace separated decimals with digits decimals, or
+              "csv" for comma separated fractions
+    digits -- the amount of decimals of the "decimal" format
+
+    The output of "exact" and "csv" is read back by reader.readMatrix as the
+    same matrix. The rows are formatted one at a time, with the scalar of A
+    applied cell by cell, and written in chunks of about CHUNK_SIZE
+    characters, so the extra memory does not depend on the amount of rows.
+    """
+    if format not in __FORMATS:
+        raise ValueError("unknown format '%s'" % format)
+    formatCell, separator = __FORMATS[format]
+
+    pieces = []
+    size = 0
+    for i in my_range(A.getRowAmount()):
+        line = separator.join([formatCell(cell, digits)
+                               for cell in A.getRow(i)]) + "\n"
+        pieces.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            stream.write("".join(pieces))
+            pieces = []
+            size = 0
+
+    if pieces:
+        stream.write("".join(pieces))
+
+
+def saveMatrix(A, path, format="auto", digits=6):
+    """Write a matrix to the file at path, '-' meaning stdout.
+
+    With format="auto", files ending with .csv are written as CSV and other
+    files as exact text. See writeMatrix.
+    """
+    if format == "auto":
+        format = "csv" if path.endswith(".csv") else "exact"
+    if format not in __FORMATS:
+        raise ValueError("unknown format '%s'" % format)
+
+    if path == "-":
+        writeMatrix(A, sys.stdout, format, digits)
+        return
+
+    stream = open(path, "w")
+    try:
+        writeMatrix(A, stream, format, digits)
+    finally:
+        stream.close()
@@ -0,0 +1,143 @@
+"""Reference results for the tests, computed naively with fractions.Fraction.
+
+Every test compares the calculator with these slow but obviously correct
+implementations on random matrices, so the random generator is seeded by the
+tests themselves.
+"""
+from fractions import Fraction
+import sys
+import os
+
+# The tests import the calculator as the package src, like __main__.py does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from src.Matrix import Matrix
+
+
+def toFractions(A):
+    """Return the cells of a Matrix (or any matrix type) as Fraction rows."""
+    return [[Fraction(cell[0], cell[1]) for cell in A.getRow(i)]
+            for i in range(A.getRowAmount())]
+
+
+def toMatrix(rows):
+    """Build a Matrix from rows of ints or Fractions."""
+    cells = [[(Fraction(x).numerator, Fraction(x).denominator) for x in row]
+             for row in rows]
+    return Matrix(cells, len(rows), len(rows[0]) if rows else 0)
+
+
+def toNumber(x):
+    """Convert a result of matrixDeterminant to a Fraction."""
+    if isinstance(x, tuple):
+        return Fraction(x[0], x[1])
+    return Fraction(x)
+
+
+def randomRows(rng, n, m, bits=8, density=1.0, rational=False):
+    """Return n rows of m random ints (or Fractions) of at most bits bits.
+
+    A cell is non-zero with probability density.
+    """
+    limit = 2 ** bits
+
+    def cell():
+        if rng.random() >= density:
+            return 0
+        value = rng.randint(-limit, limit)
+        if rational:
+            return Fraction(value, rng.randint(1, limit))
+        return value
+
+    return [[cell() for j in range(m)] for i in range(n)]
+
+
+def makeDependent(rng, rows):
+    """Replace the last row by a combination of two others, in place."""
+    if len(rows) >= 3:
+        a, b = rng.randint(-3, 3), rng.randint(-3, 3)
+        rows[-1] = [a * x + b * y for x, y in zip(rows[0], rows[1])]
+    elif rows:
+        rows[-1] = [0] * len(rows[-1])
+    return rows
+
+
+def __echelon(rows):
+    """Eliminate Fraction copies of rows. Return (echelon rows, swaps)."""
+    M = [[Fraction(x) for x in row] for row in rows]
+    n = len(M)
+    m = len(M[0]) if n > 0 else 0
+    r = 0
+    swaps = 0
+    for c in range(m):
+        pivot = None
+        for i in range(r, n):
+            if M[i][c] != 0:
+                pivot = i
+                break
+        if pivot is None:
+            continue
+        if pivot != r:
+            M[r], M[pivot] = M[pivot], M[r]
+            swaps += 1
+        for i in range(r + 1, n):
+            factor = M[i][c] / M[r][c]
+            if factor != 0:
+                M[i] = [x - factor * y for x, y in zip(M[i], M[r])]
+        r += 1
+    return M[:r], swaps, M
+
+
+def determinant(rows):
+    """Return the determinant of square rows as a Fraction."""
+    n = len(rows)
+    if n == 0:
+        return Fraction(1)
+    basis, swaps, M = __echelon(rows)
+    if len(basis) < n:
+        return Fraction(0)
+    det = Fraction(-1 if swaps % 2 else 1)
+    for i in range(n):
+        det *= M[i][i]
+    return det
+
+
+def rank(rows):
+    """Return the rank of rows."""
+    return len(__echelon(rows)[0])
+
+
+def product(X, Y):
+    """Return the product of two matrices given as rows."""
+    columns = list(zip(*Y))
+    return [[sum([Fraction(x) * y for x, y in zip(row, col)], Fraction(0))
+             for col in columns] for row in X]
+
+
+def inverse(rows):
+    """Return the inverse of square rows as Fraction rows, None if singular."""
+    n = len(rows)
+    M = [[Fraction(x) for x in row] + [Fraction(int(i == j))
+                                       for j in range(n)]
+         for i, row in enumerate(rows)]
+    for c in range(n):
+        pivot = None
+        for i in range(c, n):
+            if M[i][c] != 0:
+                pivot = i
+                break
+        if pivot is None:
+            return None
+        M[c], M[pivot] = M[pivot], M[c]
+        M[c] = [x / M[c][c] for x in M[c]]
+        for i in range(n):
+            if i != c and M[i][c] != 0:
+                factor = M[i][c]
+                M[i] = [x - factor * y for x, y in zip(M[i], M[c])]
+    return [row[n:] for row in M]
+
+
+def transpose(rows):
+    """Return the transpose of a matrix given as rows."""
+    return [list(col) for col in zip(*rows)]
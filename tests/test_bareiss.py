@@ -0,0 +1,46 @@
+import random
+
+from reference import determinant, makeDependent, randomRows, toMatrix, \
+    toNumber
+from src.calculator import isSingular, matrixDeterminant, \
+    matrixDeterminantFraction
+
+
+def test_integer_determinants_match_fractions():
+    rng = random.Random(1)
+    for n in range(1, 9):
+        for bits in (2, 16, 80):
+            rows = randomRows(rng, n, n, bits)
+            A = toMatrix(rows)
+            assert toNumber(matrixDeterminant(A, "bareiss")) == \
+                determinant(rows)
+
+
+def test_rational_determinants_are_reduced_fractions():
+    rng = random.Random(2)
+    for n in range(1, 7):
+        rows = randomRows(rng, n, n, 6, rational=True)
+        det = matrixDeterminantFraction(toMatrix(rows), "bareiss")
+        expected = determinant(rows)
+        assert det == (expected.numerator, expected.denominator)
+
+
+def test_zero_pivots_and_singular_matrices():
+    rng = random.Random(3)
+    for n in range(2, 8):
+        rows = randomRows(rng, n, n, 8, density=0.4)
+        assert toNumber(matrixDeterminant(toMatrix(rows), "bareiss")) == \
+            determinant(rows)
+
+        makeDependent(rng, rows)
+        A = toMatrix(rows)
+        assert matrixDeterminant(A, "bareiss") == 0
+        assert isSingular(toMatrix(rows))
+
+
+def test_methods_agree():
+    rng = random.Random(4)
+    rows = randomRows(rng, 7, 7, 30)
+    expected = determinant(rows)
+    for method in ("auto", "bareiss", "modular", "lup"):
+        assert toNumber(matrixDeterminant(toMatrix(rows), method)) == expected
@@ -0,0 +1,59 @@
+import io
+from fractions import Fraction
+
+from reference import determinant, inverse
+from src import batch
+from src.batch import checkSystems, readMatrices
+
+SYSTEMS = [
+    [[2, 1], [1, 1]],
+    [[1, 2, 3], [4, 5, 6], [7, 8, 9]],
+    "1 2\n3 x",
+    [[Fraction(1, 2), Fraction(-3, 4)], [5, Fraction(2, 3)]],
+    "1 2 3\n4 5 6",
+    [[0, 0, 1], [0, 2, 0], [3, 0, 0]],
+]
+
+
+def __text(system):
+    if isinstance(system, str):
+        return system
+    return "\n".join([" ".join([str(x) for x in row]) for row in system])
+
+
+def __expected(system, withInverse=False):
+    """Return the expected result line of checkSystem, or its status."""
+    if isinstance(system, str):
+        return "invalid" if "x" in system else "nonsquare"
+    det = determinant(system)
+    if det == 0:
+        return "singular 0"
+    line = "nonsingular " + str(det)
+    if withInverse:
+        line += " " + "; ".join([" ".join([str(x) for x in row])
+                                 for row in inverse(system)])
+    return line
+
+
+def test_main(tmp_path, capsys):
+    source = tmp_path / "systems.txt"
+    target = tmp_path / "results.txt"
+    source.write_text("# systems\n" + "\n\n".join(map(__text, SYSTEMS)) +
+                      "\n")
+    for options in ([], ["--inverse"], ["--sparse"], ["-j", "2",
+                                                      "--chunk-size", "2"]):
+        assert batch.main([str(source), "-o", str(target)] + options) == 0
+        lines = target.read_text().splitlines()
+        assert lines == ["%d %s" % (i + 1, __expected(system,
+                                                      "--inverse" in options))
+                         for i, system in enumerate(SYSTEMS)]
+        assert "6 systems (1 singular)" in capsys.readouterr().err
+
+
+def test_singular_only():
+    matrices = readMatrices(io.StringIO("\n\n".join(map(__text, SYSTEMS))))
+    results = list(checkSystems(matrices, withDeterminant=False))
+    assert [status for status, det, inverse in results] == \
+        [__expected(system).split()[0] for system in SYSTEMS]
+    assert all([det == "" and inverse == "" for status, det, inverse in
+                results])
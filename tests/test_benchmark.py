@@ -0,0 +1,46 @@
+from fractions import Fraction
+
+from reference import determinant
+from src.benchmark import compareResults, generateRows, measure
+
+
+def __result(operation, seconds, size=10, family="integer8"):
+    result = {"family": family, "size": size, "operation": operation,
+              "seconds": seconds}
+    if seconds is None:
+        result["error"] = "ZeroDivisionError: division by zero"
+    return result
+
+
+def test_agreeing_results():
+    baseline = [__result("determinant", 0.5), __result("inverse", 0.2)]
+    assert compareResults(baseline, baseline) == []
+    # Faster, within the threshold or within the noise is no regression.
+    results = [__result("determinant", 0.6), __result("inverse", 0.1),
+               __result("transpose", 9.0)]
+    assert compareResults(baseline, results) == []
+    assert compareResults([__result("parser", 0.0001)],
+                          [__result("parser", 0.0005)]) == []
+
+
+def test_mismatching_results():
+    baseline = [__result("determinant", 0.5), __result("inverse", 0.2),
+                __result("parser", None)]
+    results = [__result("determinant", 1.0), __result("inverse", None),
+               __result("parser", 5.0)]
+    regressions = compareResults(baseline, results)
+    assert [(before["operation"], after["operation"], ratio)
+            for before, after, ratio in regressions] == \
+        [("determinant", "determinant", 2.0), ("inverse", "inverse", None)]
+    assert compareResults(baseline, results, threshold=3.0)[0][2] is None
+
+
+def test_measured_results_compare():
+    rows = generateRows("rational", 6)
+    assert generateRows("rational", 6) == rows
+    report = measure("rational", 6, "determinant", repeat=1, memory=False)
+    det = determinant([[Fraction(*cell) for cell in row] for row in rows])
+    assert report["output_bits"] == max(abs(det.numerator).bit_length(),
+                                        det.denominator.bit_length())
+    assert report["seconds"] >= 0
+    assert compareResults([report], [report]) == []
@@ -0,0 +1,54 @@
+import random
+
+from reference import product, randomRows, toFractions, toMatrix, transpose
+from src.expression import Expression
+
+
+def __sum(X, Y, a=1, b=1):
+    return [[a * x + b * y for x, y in zip(rowX, rowY)]
+            for rowX, rowY in zip(X, Y)]
+
+
+def test_expressions_match_fractions():
+    rng = random.Random(1)
+    for n in (1, 3, 6):
+        A, B, C, D = [randomRows(rng, n, n, 8, 0.8, rational=True)
+                      for k in range(4)]
+        a, b, c, d = [toMatrix(rows) for rows in (A, B, C, D)]
+
+        assert toFractions(((a + b) @ c - 2 * d).evaluate()) == \
+            __sum(product(__sum(A, B), C), D, 1, -2)
+        assert toFractions((a.T @ b * c).evaluate()) == \
+            product(product(transpose(A), B), C)
+        assert toFractions((-(a - b).T).evaluate()) == \
+            transpose(__sum(A, B, -1, 1))
+
+
+def test_inexact_matrices_are_evaluated_eagerly():
+    A = toMatrix([[1, 2], [3, 4]])
+    A.multiplyScalar(0.5)
+    B = toMatrix([[1, 0], [0, 1]])
+    result = (A @ B + B).evaluate().getRowArray()
+    assert [[x[0] / x[1] for x in row] for row in result] == \
+        [[1.5, 1.0], [1.5, 3.0]]
+
+
+def test_default_transpose_and_row_form():
+    # A node with only evaluateEagerly works through the base defaults.
+    class Eager(Expression):
+        __slots__ = ["matrix"]
+
+        def __init__(self, matrix):
+            self.matrix = matrix
+            self.rowAmount = matrix.getRowAmount()
+            self.colAmount = matrix.getColAmount()
+
+        def evaluateEagerly(self):
+            return self.matrix.copy()
+
+    rows = [[1, 2, 3], [4, 5, 6]]
+    node = Eager(toMatrix(rows))
+    assert toFractions(node.evaluate()) == rows
+    assert toFractions(node.T.evaluate()) == transpose(rows)
+    assert toFractions((node.T @ toMatrix(rows)).evaluate()) == \
+        product(transpose(rows), rows)
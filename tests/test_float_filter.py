@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from reference import determinant, makeDependent, randomRows, toMatrix
+from src import float_filter
+from src.calculator import matrixDeterminantSign
+from src.float_filter import certifiedSign
+
+
+def __sign(x):
+    return (x > 0) - (x < 0)
+
+
+def __near_singular(rng, n, bits):
+    """Return a matrix with big entries and determinant 1.
+
+    It is the product of a lower and an upper triangular matrix with unit
+    diagonals, so its rows are nearly dependent in floating point.
+    """
+    L = [[rng.randint(-2 ** bits, 2 ** bits) if j < i else int(i == j)
+          for j in range(n)] for i in range(n)]
+    U = [[rng.randint(-2 ** bits, 2 ** bits) if j > i else int(i == j)
+          for j in range(n)] for i in range(n)]
+    return [[sum([L[i][k] * U[k][j] for k in range(n)]) for j in range(n)]
+            for i in range(n)]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def filterPath(request, monkeypatch):
+    """Run a test with and without the NumPy factorization."""
+    if request.param == "numpy":
+        if float_filter.numpy is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(float_filter, "numpy", None)
+    return request.param
+
+
+def test_certified_signs_are_never_wrong(filterPath):
+    rng = random.Random(1)
+    for n in range(1, 9):
+        for bits in (3, 30, 300):
+            rows = randomRows(rng, n, n, bits)
+            sign = certifiedSign(rows)
+            assert sign is None or sign == __sign(determinant(rows))
+
+            makeDependent(rng, rows)
+            assert certifiedSign(rows) in (None, 0)
+
+
+def test_well_conditioned_matrices_are_decided(filterPath):
+    rng = random.Random(2)
+    for n in range(1, 9):
+        rows = [[rng.randint(-9, 9) + 100 * (i == j) for j in range(n)]
+                for i in range(n)]
+        assert certifiedSign(rows) == __sign(determinant(rows))
+
+
+def test_ill_conditioned_matrices(filterPath):
+    rng = random.Random(3)
+    for n in range(2, 7):
+        for bits in (20, 40, 60):
+            rows = __near_singular(rng, n, bits)
+            assert determinant(rows) == 1
+            assert certifiedSign(rows) in (None, 1)
+            assert matrixDeterminantSign(toMatrix(rows)) == 1
+
+
+def test_zero_rows_and_columns():
+    assert certifiedSign([[0, 0], [1, 2]]) == 0
+    assert certifiedSign([[0, 1], [0, 2]]) == 0
+
+
+def test_determinant_sign_matches_fractions(filterPath):
+    rng = random.Random(4)
+    for n in range(1, 7):
+        rows = randomRows(rng, n, n, 12, density=0.5)
+        assert matrixDeterminantSign(toMatrix(rows)) == \
+            __sign(determinant(rows))
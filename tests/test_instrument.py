@@ -0,0 +1,69 @@
+import sys
+from fractions import Fraction
+
+import pytest
+
+from reference import determinant, inverse, toFractions, toMatrix
+from src import calculator
+from src.instrument import COUNTED, PHASES, profile
+
+
+def __functions():
+    """Return every function bound in a module of the package, by name."""
+    bound = {}
+    for moduleName, module in list(sys.modules.items()):
+        if module is not None and (moduleName == "src" or
+                                   moduleName.startswith("src.")):
+            for name, value in vars(module).items():
+                if callable(value):
+                    bound[(moduleName, name)] = value
+    return bound
+
+
+ROWS = [[Fraction(1, i + j + 1) for j in range(7)] for i in range(7)]
+
+
+def test_counters_and_phases():
+    before = __functions()
+    with profile() as p:
+        assert toFractions(calculator.matrixInverse(toMatrix(ROWS))) == \
+            inverse(ROWS)
+        A = toMatrix(ROWS)
+        A.multiplyScalar(1.0)
+        det = calculator.matrixDeterminant(A)
+        assert calculator.frac_add((1, 2), (1, 3)) == (5, 6)
+
+    assert abs(det - float(determinant(ROWS))) <= 1e-6 * abs(det)
+    assert p.calls["inversion"] == 1
+    assert p.calls["decomposition"] == 1
+    assert p.calls["pivot"] == 7
+    assert p.times["inversion"] > 0
+    assert p.counts["frac_add"] >= 1
+    assert p.counts["frac_mult"] > 0 and p.counts["frac_div"] > 0
+    assert p.maxBits["numerator"] > 0
+    assert "inversion" in p.report() and "frac_mult" in p.report()
+    assert __functions() == before
+
+
+def test_nothing_is_recorded_outside():
+    with profile() as p:
+        pass
+    calculator.matrixInverse(toMatrix(ROWS))
+    assert all([count == 0 for count in p.counts.values()])
+    assert all([calls == 0 for calls in p.calls.values()])
+    for module, name in COUNTED:
+        assert getattr(module, name).__name__ == name
+    for phase, module, name in PHASES:
+        assert getattr(module, name).__name__ == name
+
+
+def test_restored_after_errors():
+    before = __functions()
+    with pytest.raises(ZeroDivisionError):
+        with profile():
+            1 // 0
+    with profile():
+        with pytest.raises(RuntimeError):
+            with profile():
+                pass
+    assert __functions() == before
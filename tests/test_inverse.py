@@ -0,0 +1,43 @@
+import random
+from fractions import Fraction
+
+from reference import determinant, inverse, makeDependent, randomRows, \
+    toFractions, toMatrix
+from src.calculator import matrixDeterminantFraction, matrixInverse
+
+
+def test_inverses_match_fractions():
+    rng = random.Random(1)
+    for n in range(1, 10):
+        for rational in (False, True):
+            rows = randomRows(rng, n, n, 12, 0.8, rational)
+            expected = inverse(rows)
+            A = toMatrix(rows)
+            if expected is None:
+                assert matrixInverse(A) is None
+                continue
+            assert toFractions(matrixInverse(A)) == expected
+            # The sweep gives the determinant too.
+            assert Fraction(*A.determinant) == determinant(rows)
+            assert Fraction(*matrixDeterminantFraction(A)) == \
+                determinant(rows)
+
+
+def test_hilbert_matrix():
+    n = 12
+    rows = [[Fraction(1, i + j + 1) for j in range(n)] for i in range(n)]
+    assert toFractions(matrixInverse(toMatrix(rows))) == inverse(rows)
+
+
+def test_singular_matrices():
+    rng = random.Random(2)
+    for n in range(1, 8):
+        rows = makeDependent(rng, randomRows(rng, n, n, 8))
+        assert matrixInverse(toMatrix(rows)) is None
+
+
+def test_the_cached_inverse_is_not_shared():
+    A = toMatrix([[2, 1], [1, 1]])
+    B = matrixInverse(A)
+    B.setCell(0, 0, (7, 1))
+    assert toFractions(matrixInverse(A)) == [[1, -1], [-1, 2]]
@@ -0,0 +1,68 @@
+import random
+
+from reference import determinant, makeDependent, randomRows, rank, toMatrix
+from src.calculator import isRankDeficient, isSingular, matrixRank
+from src.modular import det_mod, hadamard_bound_squared, modular_determinant, \
+    probably_rank_deficient, word_primes
+
+
+def __hadamard(n):
+    """Return the Sylvester Hadamard matrix of size n, a power of two."""
+    H = [[1]]
+    while len(H) < n:
+        H = [row + row for row in H] + [row + [-x for x in row] for row in H]
+    return H
+
+
+def test_determinants_match_fractions():
+    rng = random.Random(1)
+    for n in range(1, 9):
+        for bits in (4, 40, 200):
+            rows = randomRows(rng, n, n, bits)
+            assert modular_determinant(rows) == determinant(rows)
+
+
+def test_determinant_on_the_hadamard_bound():
+    # |det| of a Hadamard matrix is exactly its Hadamard bound, so the
+    # reconstruction needs every prime the bound asks for. The sign is
+    # checked by swapping two rows.
+    for scale in (1, 2 ** 40, 3 ** 50):
+        rows = [[scale * x for x in row] for row in __hadamard(8)]
+        det = modular_determinant(rows)
+        assert det * det == hadamard_bound_squared(rows)
+        assert det == determinant(rows)
+        rows[0], rows[1] = rows[1], rows[0]
+        assert modular_determinant(rows) == -det
+
+
+def test_residues():
+    rng = random.Random(2)
+    rows = randomRows(rng, 6, 6, 100)
+    det = determinant(rows)
+    primes = word_primes()
+    for k in range(3):
+        p = next(primes)
+        assert det_mod(rows, p) == det % p
+
+
+def test_singular_matrices():
+    rng = random.Random(3)
+    for n in range(2, 8):
+        rows = makeDependent(rng, randomRows(rng, n, n, 64))
+        assert modular_determinant(rows) == 0
+        assert isSingular(toMatrix(rows))
+        assert isSingular(toMatrix(rows), True)
+
+
+def test_rank_of_big_entries():
+    # Entries of more than a machine word take the modular full-rank check.
+    rng = random.Random(4)
+    for n, m in ((5, 5), (4, 7), (7, 3)):
+        rows = randomRows(rng, n, m, 100)
+        assert not probably_rank_deficient(rows)
+        assert matrixRank(toMatrix(rows)) == rank(rows) == min(n, m)
+        assert not isRankDeficient(toMatrix(rows))
+
+        makeDependent(rng, rows)
+        assert matrixRank(toMatrix(rows)) == rank(rows)
+        assert isRankDeficient(toMatrix(rows)) == (rank(rows) < min(n, m))
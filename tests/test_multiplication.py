@@ -0,0 +1,32 @@
+import random
+
+from reference import product, randomRows, toFractions, toMatrix
+from src.calculator import matrixMultiplication
+from src.integer_matrix import integer_product
+
+
+def test_strassen_winograd_matches_fractions():
+    # Small thresholds recurse down to 1x1 blocks, odd sizes need padding.
+    rng = random.Random(1)
+    for n, m, p in ((1, 1, 1), (2, 3, 4), (5, 5, 5), (7, 3, 9), (16, 16, 16),
+                    (17, 12, 5)):
+        X = randomRows(rng, n, m, 30)
+        Y = randomRows(rng, m, p, 30)
+        expected = product(X, Y)
+        for threshold in (1, 2, 3, 8, None):
+            assert integer_product(X, Y, threshold) == expected
+
+
+def test_empty_products():
+    assert integer_product([], [[1, 2]]) == []
+    assert integer_product([[1, 2]], [[3], [4]], 1) == [[11]]
+    assert integer_product([[]], []) == [[]]
+
+
+def test_rational_products_match_fractions():
+    rng = random.Random(2)
+    for n, m, p in ((3, 4, 2), (9, 9, 9), (20, 13, 7)):
+        X = randomRows(rng, n, m, 10, 0.7, rational=True)
+        Y = randomRows(rng, m, p, 10, 0.7, rational=True)
+        C = matrixMultiplication(toMatrix(X), toMatrix(Y))
+        assert toFractions(C) == product(X, Y)
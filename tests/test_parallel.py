@@ -0,0 +1,45 @@
+import random
+
+from reference import determinant, randomRows, toMatrix
+from src import calculator
+from src.calculator import matrixDeterminant
+from src.parallel import PARALLEL_MIN_SIZE, parallelBareiss, useParallel
+
+
+def test_serial_unless_workers_are_given(monkeypatch):
+    assert not useParallel(PARALLEL_MIN_SIZE, None)
+    assert not useParallel(PARALLEL_MIN_SIZE, 1)
+    assert not useParallel(PARALLEL_MIN_SIZE - 1, 4)
+    assert useParallel(PARALLEL_MIN_SIZE, 4)
+
+    def forbidden(rows, workers=None):
+        raise AssertionError("processes started without workers")
+
+    monkeypatch.setattr(calculator, "parallelBareiss", forbidden)
+    rng = random.Random(1)
+    rows = randomRows(rng, PARALLEL_MIN_SIZE, PARALLEL_MIN_SIZE, 3)
+    assert matrixDeterminant(toMatrix(rows)) is not None
+
+
+def test_parallel_determinants_match_fractions():
+    rng = random.Random(2)
+    assert parallelBareiss([], 2) == 1
+    for n, workers in ((1, 2), (5, 3), (12, 2), (30, 4), (3, 8)):
+        rows = randomRows(rng, n, n, 4, 0.6)
+        assert parallelBareiss(rows, workers) == determinant(rows)
+        if n > 1:
+            # The first pivot is not in the first row.
+            rows[0][0] = 0
+            assert parallelBareiss(rows, workers) == determinant(rows)
+            rows[-1] = list(rows[0])
+            assert parallelBareiss(rows, workers) == 0
+
+    # Too big for the reference, the serial elimination is checked in
+    # test_bareiss.py.
+    rows = randomRows(rng, PARALLEL_MIN_SIZE, PARALLEL_MIN_SIZE, 8)
+    assert matrixDeterminant(toMatrix(rows), workers=2) == \
+        matrixDeterminant(toMatrix(rows))
+
+    rows = randomRows(rng, PARALLEL_MIN_SIZE, PARALLEL_MIN_SIZE, 2)
+    rows[-1] = list(rows[0])
+    assert matrixDeterminant(toMatrix(rows), workers=2) == 0
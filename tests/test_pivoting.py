@@ -0,0 +1,75 @@
+import random
+from fractions import Fraction
+
+from reference import determinant, product, randomRows, toFractions, toMatrix
+from src.calculator import matrixDeterminantFraction, matrixFactorization
+from src.my_algorithms import permutation_sign
+
+
+def __check(rows):
+    """Check PA = LU and the sign of P, return the permutation."""
+    factorization = matrixFactorization(toMatrix(rows))
+    perm = factorization.permutation
+    assert sorted(perm) == list(range(len(rows)))
+    assert product([rows[i] for i in perm],
+                   [[1 if i == j else 0 for j in range(len(rows))]
+                    for i in range(len(rows))]) == \
+        product(toFractions(factorization.L), toFractions(factorization.U))
+    assert factorization.sign == permutation_sign(perm)
+    assert Fraction(*factorization.determinant()) == determinant(rows)
+    return perm
+
+
+def test_zero_leading_pivots_swap_rows():
+    assert __check([[0, 1], [1, 0]]) == [1, 0]
+    assert __check([[0, 0, 1], [0, 2, 0], [3, 0, 0]])[0] == 2
+    perm = __check([[0, 2, 1, 1], [0, 0, 3, 1], [4, 1, 0, 2], [1, 1, 1, 1]])
+    assert perm[0] in (2, 3)
+    # A zero column leaves a zero pivot instead of failing.
+    factorization = matrixFactorization(toMatrix([[0, 1], [0, 2]]))
+    assert factorization.isSingular()
+
+
+def test_exact_pivots_prefer_few_bits():
+    rows = [[Fraction(7, 2 ** 40), 1, 1], [3, 1, 2], [2 ** 50, 0, 1]]
+    assert __check(rows)[0] == 1
+
+
+def test_random_matrices_match_fractions():
+    rng = random.Random(1)
+    for n in range(1, 9):
+        for rational in (False, True):
+            rows = randomRows(rng, n, n, 10, 0.6, rational)
+            __check(rows)
+            assert Fraction(*matrixDeterminantFraction(toMatrix(rows),
+                                                       "bareiss")) == \
+                determinant(rows)
+
+
+def test_tiny_float_pivot_swaps_rows():
+    # Without the swap, 1 - 1 / 1e-20 loses the 1 entirely. The exact cells
+    # of the column are ranked by magnitude too.
+    A = toMatrix([[1, 1], [1, 2]])
+    A.setCell(0, 0, (1e-20, 1))
+    factorization = matrixFactorization(A)
+    assert factorization.permutation == [1, 0]
+    assert factorization.sign == permutation_sign([1, 0]) == -1
+
+    L = [[x[0] / x[1] for x in row] for row in
+         factorization.L.getRowArray()]
+    U = [[x[0] / x[1] for x in row] for row in
+         factorization.U.getRowArray()]
+    PA = [[1.0, 2.0], [1e-20, 1.0]]
+    for i in range(2):
+        for j in range(2):
+            value = sum([L[i][k] * U[k][j] for k in range(2)])
+            assert abs(value - PA[i][j]) <= 1e-15
+
+
+def test_float_pivots_prefer_large_magnitudes():
+    rows = [[1, 2, 3], [-8, 1, 1], [4, 0, 5]]
+    A = toMatrix(rows)
+    A.multiplyScalar(0.5)
+    factorization = matrixFactorization(A)
+    assert factorization.permutation[0] == 1
+    assert factorization.sign == permutation_sign(factorization.permutation)
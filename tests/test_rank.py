@@ -0,0 +1,91 @@
+import random
+from fractions import Fraction
+
+from reference import makeDependent, product, randomRows, rank, toFractions, \
+    toMatrix, transpose
+from src.calculator import isRankDeficient, matrixRank, nullSpace, rref
+
+
+def __rref(rows):
+    """Return the reduced row echelon form of rows, with Fractions."""
+    M = [[Fraction(x) for x in row] for row in rows]
+    r = 0
+    for c in range(len(M[0])):
+        pivot = None
+        for i in range(r, len(M)):
+            if M[i][c] != 0:
+                pivot = i
+                break
+        if pivot is None:
+            continue
+        M[r], M[pivot] = M[pivot], M[r]
+        M[r] = [x / M[r][c] for x in M[r]]
+        for i in range(len(M)):
+            if i != r and M[i][c] != 0:
+                factor = M[i][c]
+                M[i] = [x - factor * y for x, y in zip(M[i], M[r])]
+        r += 1
+    return M
+
+
+def __inputs(rng):
+    """Yield rectangular, rank deficient and rational random rows."""
+    for n, m in ((1, 1), (1, 4), (4, 1), (3, 5), (5, 3), (6, 6), (4, 7),
+                 (8, 5)):
+        yield randomRows(rng, n, m, 6)
+        yield randomRows(rng, n, m, 6, 0.5, rational=True)
+        yield makeDependent(rng, randomRows(rng, n, m, 6))
+        yield transpose(makeDependent(rng, randomRows(rng, m, n, 4,
+                                                      rational=True)))
+        yield [[0] * m for i in range(n)]
+
+
+def test_rank_matches_fractions():
+    rng = random.Random(1)
+    for rows in __inputs(rng):
+        A = toMatrix(rows)
+        expected = rank(rows)
+        assert matrixRank(A) == expected
+        assert isRankDeficient(A) == (expected < min(len(rows), len(rows[0])))
+
+
+def test_big_entries():
+    rng = random.Random(2)
+    for n, m in ((6, 6), (5, 8), (8, 5)):
+        rows = randomRows(rng, n, m, 100)
+        assert matrixRank(toMatrix(rows)) == min(n, m)
+        assert not isRankDeficient(toMatrix(rows))
+        rows = makeDependent(rng, rows)
+        assert matrixRank(toMatrix(rows)) == rank(rows)
+        assert isRankDeficient(toMatrix(rows)) == (rank(rows) < min(n, m))
+
+
+def test_rref_matches_fractions():
+    rng = random.Random(3)
+    for rows in __inputs(rng):
+        assert toFractions(rref(toMatrix(rows))) == __rref(rows)
+
+
+def test_null_space():
+    rng = random.Random(4)
+    for rows in __inputs(rng):
+        m = len(rows[0])
+        N = nullSpace(toMatrix(rows))
+        nullity = m - rank(rows)
+        if nullity == 0:
+            assert N is None
+            continue
+        basis = toFractions(N)
+        assert (len(basis), len(basis[0])) == (m, nullity)
+        assert product(rows, basis) == [[0] * nullity for row in rows]
+        # The basis vectors are independent, so rank + nullity = m.
+        assert rank(basis) == nullity
+
+
+def test_inexact_matrices():
+    A = toMatrix([[1, 2], [3, 4]])
+    A.multiplyScalar(0.5)
+    assert matrixRank(A) is None
+    assert isRankDeficient(A) is None
+    assert rref(A) is None
+    assert nullSpace(A) is None
@@ -0,0 +1,87 @@
+import io
+import random
+from fractions import Fraction
+
+import pytest
+
+from reference import randomRows, toFractions
+from src import reader
+from src.SparseMatrix import SparseMatrix
+from src.parser import parseRows
+from src.reader import buildMatrix, parseNumber, parseRow, readMatrix
+
+
+def __text(rows, delimiter=" "):
+    """Write Fraction rows the way a user would, as ints and a/b."""
+    return "\n".join([delimiter.join([str(x) for x in row]) for row in rows])
+
+
+def __read(text, format="auto", sparse=False):
+    return readMatrix(io.StringIO(text), format, sparse)
+
+
+def test_whitespace_and_csv_match_fractions():
+    rng = random.Random(1)
+    for rational in (False, True):
+        for bits in (4, 70):
+            rows = randomRows(rng, 6, 4, bits, 0.7, rational)
+            assert toFractions(__read(__text(rows))) == rows
+            assert toFractions(__read(__text(rows, ", "), "csv")) == rows
+            sparse = __read(__text(rows, "\t"), sparse=True)
+            assert isinstance(sparse, SparseMatrix)
+            assert toFractions(sparse) == rows
+
+
+def test_numbers():
+    assert parseNumber("-0,5") == (-1, 2)
+    assert parseNumber("-0.5") == (-1, 2)
+    assert parseNumber("+12,25") == (49, 4)
+    assert parseNumber(",5") == (1, 2)
+    assert parseNumber("1.5e-3") == (3, 2000)
+    assert parseNumber("2E3") == (2000, 1)
+    assert parseNumber("-4/6") == (-2, 3)
+    assert parseNumber("1,3/3.7") == (13, 37)
+    assert parseNumber("1/-2") == (-1, 2)
+    for token in ("", "-", ",", "1/0", "1/2/3", "1,2,3", "e5", "x", "1..2"):
+        assert parseNumber(token) is None
+
+
+def test_decimal_commas():
+    text = "-0,5 1,25 3\n2 -1/3 0,1\n"
+    assert toFractions(__read(text)) == \
+        [[Fraction(-1, 2), Fraction(5, 4), 3],
+         [2, Fraction(-1, 3), Fraction(1, 10)]]
+    # In CSV the comma separates the values.
+    assert toFractions(__read("-0.5, 1/4\n2,-3\n", "csv")) == \
+        [[Fraction(-1, 2), Fraction(1, 4)], [2, -3]]
+
+
+def test_comments_and_blank_lines():
+    stream = io.StringIO("\n# first\n1 2\n3 4\n\n# second\n5\n\n\n")
+    assert toFractions(readMatrix(stream)) == [[1, 2], [3, 4]]
+    assert toFractions(readMatrix(stream)) == [[5]]
+    assert readMatrix(stream) is None
+
+
+def test_malformed_rows():
+    assert parseRow("1 x 3") is None
+    assert parseRow("1;2", ",") is None
+    with pytest.raises(ValueError):
+        __read("1 2\n3 x\n")
+    with pytest.raises(ValueError):
+        __read("1 2\n3 4 5\n")
+    with pytest.raises(ValueError):
+        __read("1, 2\n3,\n", "csv")
+    with pytest.raises(ValueError):
+        __read("1 2", "xml")
+    assert parseRows(["1 2", "3 4 5"]) is None
+    assert parseRows(["1 2", "3 1/0"]) is None
+
+
+def test_list_buffers(monkeypatch):
+    # Python 2 has no 'q' arrays, the buffers are lists there.
+    monkeypatch.setattr(reader, "__new_buffer", list)
+    rows = [[1, Fraction(-1, 2)], [2 ** 70, 3]]
+    A = buildMatrix([parseRow("1 -0,5"), parseRow("%d 3" % 2 ** 70)])
+    assert toFractions(A) == rows
+    assert toFractions(parseRows(["1 -0,5", "%d 3" % 2 ** 70])) == rows
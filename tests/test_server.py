@@ -0,0 +1,67 @@
+import io
+import json
+from fractions import Fraction
+
+from reference import determinant, inverse
+from src.server import MatrixCache, Server, handleRequest
+
+
+def __serve(requests, workers=4):
+    """Run requests through a Server, return the responses by id."""
+    server = Server(workers)
+    output = io.StringIO()
+    lines = "".join([json.dumps(request) + "\n" for request in requests])
+    server.serveStream(io.StringIO(lines), output)
+    server.shutdown()
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    return dict([(response["id"], response) for response in responses])
+
+
+def __rows(n):
+    return [[(7 * i + j * j) % 13 + 40 * (i == j) for j in range(n)]
+            for i in range(n)]
+
+
+def test_results_match_fractions():
+    rows = __rows(6)
+    cache = MatrixCache()
+    response = handleRequest({"id": 1, "op": "det", "matrices": [
+        {"name": "A", "rows": [" ".join(map(str, row)) for row in rows]}]},
+        cache)
+    assert Fraction(response["result"]) == determinant(rows)
+
+    response = handleRequest({"id": 2, "op": "inverse",
+                              "matrices": [{"name": "A"}]}, cache)
+    assert [[Fraction(x) for x in row] for row in response["result"]] == \
+        inverse(rows)
+
+
+def test_stored_names_can_be_used_at_once():
+    # Request 2 is prepared before request 1 is computed; it has to wait
+    # for B instead of failing with an unknown matrix.
+    rows = __rows(40)
+    expected = inverse(rows)
+    responses = __serve([
+        {"id": 1, "op": "inverse", "store": "B",
+         "matrices": [{"name": "A", "rows": rows}]},
+        {"id": 2, "op": "det", "matrices": [{"name": "B"}]},
+        {"id": 3, "op": "inverse", "store": "B",
+         "matrices": [{"name": "B"}]},
+        {"id": 4, "op": "det", "matrices": [{"name": "B"}]},
+    ])
+    assert "error" not in responses[2]
+    assert Fraction(responses[2]["result"]) == determinant(expected)
+    assert [[Fraction(x) for x in row] for row in responses[3]["result"]] == \
+        rows
+    assert Fraction(responses[4]["result"]) == determinant(rows)
+
+
+def test_failed_store_is_reported_to_waiting_requests():
+    responses = __serve([
+        {"id": 1, "op": "inverse", "store": "C",
+         "matrices": [{"rows": ["1 2", "2 4"]}]},
+        {"id": 2, "op": "rank", "matrices": [{"name": "C"}]},
+    ], 1)
+    assert "error" in responses[1]
+    assert "not stored" in responses[2]["error"] or \
+        "unknown matrix" in responses[2]["error"]
@@ -0,0 +1,71 @@
+import random
+
+from reference import inverse, makeDependent, product, randomRows, \
+    toFractions, toMatrix
+from src.calculator import matrixFactorization, matrixInverse, solve
+
+
+def __dense(rng, n, rational=False):
+    """Return random dense rows, so matrixStructure finds nothing special."""
+    rows = randomRows(rng, n, n, 10, rational=rational)
+    for i in range(n):
+        for j in range(n):
+            if rows[i][j] == 0:
+                rows[i][j] = 1
+    return rows
+
+
+def test_solutions_match_fractions():
+    rng = random.Random(1)
+    for n in range(1, 9):
+        for rational in (False, True):
+            rows = __dense(rng, n, rational)
+            expected = inverse(rows)
+            for k in (1, 3):
+                B = randomRows(rng, n, k, 12, rational=not rational)
+                X = solve(toMatrix(rows), toMatrix(B))
+                if expected is None:
+                    assert X is None
+                else:
+                    assert toFractions(X) == product(expected, B)
+
+
+def test_singular_systems():
+    rng = random.Random(2)
+    for n in range(1, 8):
+        rows = makeDependent(rng, __dense(rng, n))
+        B = randomRows(rng, n, 2, 5)
+        assert solve(toMatrix(rows), toMatrix(B)) is None
+
+
+def test_shapes():
+    A = toMatrix([[1, 2], [3, 4]])
+    assert solve(A, toMatrix([[1], [2], [3]])) is None
+    assert solve(A, toMatrix([[1, 2, 3]])) is None
+    assert solve(toMatrix([[1, 2, 3], [4, 5, 6]]), toMatrix([[1], [2]])) \
+        is None
+
+
+def test_the_cached_factorization_is_reused():
+    rng = random.Random(3)
+    rows = __dense(rng, 6, True)
+    A = toMatrix(rows)
+    expected = inverse(rows)
+    factorization = matrixFactorization(A)
+    for k in (1, 2, 4):
+        B = randomRows(rng, 6, k, 8)
+        assert toFractions(solve(A, toMatrix(B))) == product(expected, B)
+        assert A.factorization is factorization
+    # The inverse is built from the same factorization.
+    assert toFractions(matrixInverse(A)) == expected
+    assert A.factorization is factorization
+
+
+def test_the_cached_inverse_is_used():
+    rows = [[2, 1, 1], [1, 3, 2], [1, 0, 0]]
+    A = toMatrix(rows)
+    matrixInverse(A)
+    assert A.factorization is None
+    B = [[1, 0], [2, 1], [3, -1]]
+    assert toFractions(solve(A, toMatrix(B))) == product(inverse(rows), B)
+    assert A.factorization is None
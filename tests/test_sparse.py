@@ -0,0 +1,98 @@
+import random
+
+from reference import determinant, inverse, makeDependent, product, \
+    randomRows, toFractions, toMatrix
+from src.SparseMatrix import SparseMatrix
+from src.calculator import isSingular, matrixDeterminant, \
+    matrixDeterminantFraction, matrixFactorization, matrixInverse, solve
+
+
+def __sparse(rows):
+    return SparseMatrix.fromMatrix(toMatrix(rows))
+
+
+def __random_sparse_rows(rng, n, density, rational=False):
+    """Return a sparse random matrix, nonsingular more often than not."""
+    rows = randomRows(rng, n, n, 6, density, rational)
+    for i in range(n):
+        if rng.random() < 0.8:
+            rows[i][rng.randrange(n)] = rng.randint(1, 9)
+    return rows
+
+
+def test_factorization_determinant_matches_fractions():
+    rng = random.Random(1)
+    for n in range(1, 16):
+        for density in (0.1, 0.3, 0.8):
+            rows = __random_sparse_rows(rng, n, density, n % 2 == 0)
+            det = matrixFactorization(__sparse(rows)).determinant()
+            expected = determinant(rows)
+            assert det == (expected.numerator, expected.denominator)
+            assert matrixDeterminantFraction(__sparse(rows)) == det
+
+
+def test_solve_and_inverse_match_fractions():
+    rng = random.Random(2)
+    for n in range(1, 13):
+        rows = __random_sparse_rows(rng, n, 0.25)
+        B = randomRows(rng, n, 2, 4)
+        A = __sparse(rows)
+        expected = inverse(rows)
+        if expected is None:
+            assert solve(A, toMatrix(B)) is None
+            assert isSingular(__sparse(rows))
+            continue
+        assert toFractions(solve(A, toMatrix(B))) == product(expected, B)
+        assert toFractions(matrixInverse(__sparse(rows))) == expected
+
+
+def test_singular_sparse_matrices():
+    rng = random.Random(3)
+    for n in range(2, 12):
+        rows = makeDependent(rng, __random_sparse_rows(rng, n, 0.3))
+        assert matrixFactorization(__sparse(rows)).isSingular()
+        assert matrixDeterminantFraction(__sparse(rows))[0] == 0
+
+
+def __close(x, expected):
+    return abs(x - float(expected)) <= 1e-9 * max(1.0, abs(float(expected)))
+
+
+def test_float_scalar():
+    # Float pivots have no bit size; the Markowitz tie-break must still work.
+    rng = random.Random(4)
+    for n in range(2, 12):
+        rows = __random_sparse_rows(rng, n, 0.4)
+        expected = inverse(rows)
+        if expected is None:
+            continue
+        A = __sparse(rows)
+        A.multiplyScalar(0.5)
+        assert __close(matrixDeterminant(A), determinant(rows) * 0.5 ** n)
+
+        B = randomRows(rng, n, 1, 4)
+        X = solve(A, toMatrix(B)).getRowArray()
+        for row, expectedRow in zip(X, product(expected, B)):
+            assert __close(row[0][0] / row[0][1], 2 * expectedRow[0])
+
+        Y = matrixInverse(A).getRowArray()
+        for row, expectedRow in zip(Y, expected):
+            for cell, x in zip(row, expectedRow):
+                assert __close(cell[0] / cell[1], 2 * x)
+
+
+def test_tridiagonal_stays_sparse(monkeypatch):
+    # Neither the exactness check nor the pivot choice may expand the rows.
+    def dense(self):
+        raise AssertionError("getIntegerRows called on a SparseMatrix")
+    monkeypatch.setattr(SparseMatrix, "getIntegerRows", dense)
+
+    n = 2000
+    rows = [dict([(j, (2 if i == j else -1, 1)) for j in (i - 1, i, i + 1)
+                  if 0 <= j < n]) for i in range(n)]
+    assert matrixDeterminantFraction(SparseMatrix(rows, n, n)) == (n + 1, 1)
+    assert not isSingular(SparseMatrix(rows, n, n))
+
+    small = [[(2 if i == j else -1 if abs(i - j) == 1 else 0)
+              for j in range(30)] for i in range(30)]
+    assert toFractions(matrixInverse(__sparse(small))) == inverse(small)
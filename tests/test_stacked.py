@@ -0,0 +1,97 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+from reference import determinant
+from src import stacked
+from src.stacked import batchDeterminants
+
+numpy = stacked.numpy
+
+
+def __systems(rng, count, n, limit, singular=0):
+    """Return count random n x n integer systems with entries up to limit.
+
+    The first singular systems have two equal rows.
+    """
+    systems = [[[rng.randint(-limit, limit) if rng.random() < 0.8 else 0
+                 for j in range(n)] for i in range(n)] for k in range(count)]
+    if n > 1:
+        for system in systems[:singular]:
+            system[-1] = list(system[0])
+    return systems
+
+
+@pytest.fixture(params=["numpy", "python"])
+def stackPath(request, monkeypatch):
+    """Run a test with and without NumPy."""
+    if request.param == "numpy":
+        if numpy is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(stacked, "numpy", None)
+    return request.param
+
+
+def test_lists_match_fractions(stackPath):
+    rng = random.Random(1)
+    for n in range(0, 8):
+        for limit in (3, 1000, 10 ** 30):
+            systems = __systems(rng, 20, n, limit, 5)
+            dets, singular = batchDeterminants(systems)
+            for system, det, flag in zip(systems, dets, singular):
+                assert det == determinant(system)
+                assert flag == (det == 0)
+
+
+def test_fraction_systems(stackPath):
+    rng = random.Random(2)
+    for n in range(1, 6):
+        systems = [[[(rng.randint(-9, 9), rng.randint(1, 9))
+                     for j in range(n)] for i in range(n)]
+                   for k in range(10)]
+        dets, singular = batchDeterminants(systems)
+        for system, det in zip(systems, dets):
+            expected = determinant([[Fraction(*cell) for cell in row]
+                                    for row in system])
+            assert Fraction(*det) == expected
+
+
+@pytest.mark.skipif(numpy is None, reason="NumPy is not installed")
+def test_int64_stacks_match_fractions():
+    # The limits cover the closed forms, the one and two prime modular paths
+    # and entries too big for them, in the same stack too.
+    rng = random.Random(3)
+    for n in range(1, 9):
+        for limit in (1, 3, 100, 470, 2000, 10 ** 6, 10 ** 9):
+            systems = __systems(rng, 40, n, limit, 8)
+            if limit > 100:
+                systems[-1] = __systems(rng, 1, n, 3)[0]
+            dets, singular = batchDeterminants(numpy.array(systems,
+                                                           dtype=numpy.int64))
+            for system, det, flag in zip(systems, dets, singular):
+                assert int(det) == determinant(system)
+                assert bool(flag) == (determinant(system) == 0)
+
+
+@pytest.mark.skipif(numpy is None, reason="NumPy is not installed")
+def test_object_and_float_stacks():
+    rng = random.Random(4)
+    systems = __systems(rng, 10, 5, 10 ** 20, 2)
+    dets, singular = batchDeterminants(numpy.array(systems, dtype=object))
+    assert [int(det) for det in dets] == [determinant(s) for s in systems]
+
+    systems = __systems(rng, 10, 6, 9, 2)
+    dets, singular = batchDeterminants(numpy.array(systems, dtype=float))
+    for system, det in zip(systems, dets):
+        expected = float(determinant(system))
+        assert abs(det - expected) <= 1e-9 * max(1.0, abs(expected))
+
+
+@pytest.mark.skipif(numpy is None, reason="NumPy is not installed")
+def test_shapes():
+    dets, singular = batchDeterminants(numpy.zeros((3, 0, 0), dtype=int))
+    assert list(dets) == [1, 1, 1]
+    with pytest.raises(ValueError):
+        batchDeterminants(numpy.zeros((3, 2, 3), dtype=int))
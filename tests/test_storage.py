@@ -0,0 +1,52 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+from reference import determinant, randomRows, toFractions, toMatrix
+from src.Matrix import Matrix
+from src.calculator import matrixDeterminantFraction
+from src.storage import loadBinary, saveBinary
+
+
+def test_round_trip_matches_fractions(tmp_path):
+    rng = random.Random(1)
+    for bits in (8, 62, 64, 200):
+        rows = randomRows(rng, 5, 4, bits, 0.8, rational=True)
+        A = toMatrix(rows)
+        A.multiplyScalar(-3)
+        path = str(tmp_path / "a.smat")
+        saveBinary(A, path)
+        B = loadBinary(path)
+        assert toFractions(B) == [[-3 * x for x in row] for row in rows]
+
+        # A loaded matrix can be saved again.
+        saveBinary(B, path)
+        assert toFractions(loadBinary(path)) == toFractions(B)
+
+
+def test_loaded_matrix_computes(tmp_path):
+    rows = [[2, -1, 0], [1, 3, 5], [7, 0, 1]]
+    path = str(tmp_path / "b.smat")
+    saveBinary(toMatrix(rows), path)
+    assert Fraction(*matrixDeterminantFraction(loadBinary(path))) == \
+        determinant(rows)
+
+
+def test_inexact_matrices_are_rejected(tmp_path):
+    path = str(tmp_path / "c.smat")
+    A = Matrix.fromBuffers([1, 2, 3.5, 4], [1, 1], 2, 2)
+    with pytest.raises(ValueError):
+        saveBinary(A, path)
+
+    B = toMatrix([[1, 2], [3, 4]])
+    B.multiplyScalar(0.5)
+    with pytest.raises(ValueError):
+        saveBinary(B, path)
+
+
+def test_not_a_matrix_file(tmp_path):
+    path = tmp_path / "d.smat"
+    path.write_bytes(b"not a matrix")
+    with pytest.raises(ValueError):
+        loadBinary(str(path))
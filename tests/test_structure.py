@@ -0,0 +1,113 @@
+import random
+from fractions import Fraction
+
+from reference import determinant, inverse, product, randomRows, toFractions, \
+    toMatrix
+from src.SparseMatrix import SparseMatrix
+from src.calculator import matrixDeterminantFraction, matrixFactorization, \
+    matrixInverse, matrixStructure, solve
+from src.structure import BAND_LIMIT
+
+
+def __banded(rng, n, lower, upper, rational=False):
+    """Return a random matrix with exactly the given bandwidths."""
+    rows = randomRows(rng, n, n, 6, rational=rational)
+    for i in range(n):
+        for j in range(n):
+            if i - j > lower or j - i > upper:
+                rows[i][j] = 0
+        rows[i][i] = rng.randint(1, 9)
+    if n > lower:
+        rows[lower][0] = 1
+    if n > upper:
+        rows[0][upper] = 1
+    return rows
+
+
+def __check_results(rows, rng):
+    A = toMatrix(rows)
+    det = determinant(rows)
+    assert Fraction(*matrixDeterminantFraction(A)) == det
+    if det != 0:
+        assert toFractions(matrixInverse(toMatrix(rows))) == inverse(rows)
+        B = randomRows(rng, len(rows), 2, 5)
+        assert toFractions(solve(toMatrix(rows), toMatrix(B))) == \
+            product(inverse(rows), B)
+
+
+def test_small_dense_matrices_are_general():
+    # Every matrix of at most 2 * BAND_LIMIT rows fits into the band, but is
+    # faster with the general algorithms.
+    rng = random.Random(1)
+    for n in range(3, 2 * BAND_LIMIT + 1):
+        rows = [[rng.randint(1, 9) for j in range(n)] for i in range(n)]
+        assert matrixStructure(toMatrix(rows)).kind == "general"
+
+
+def test_wide_bands_are_general():
+    rng = random.Random(2)
+    n = 2 * BAND_LIMIT + 1
+    assert matrixStructure(toMatrix(__banded(rng, n, BAND_LIMIT,
+                                             BAND_LIMIT))).kind == "general"
+    assert matrixStructure(toMatrix(__banded(rng, n + 5, BAND_LIMIT + 1,
+                                             1))).kind == "general"
+
+
+def test_banded_matrices_match_fractions():
+    rng = random.Random(3)
+    for n in (2 * BAND_LIMIT + 1, 20, 31):
+        for lower, upper in ((1, 1), (0, 2), (2, 0), (1, 3), (BAND_LIMIT,
+                                                              BAND_LIMIT)):
+            rows = __banded(rng, n, lower, upper, n % 2 == 0)
+            structure = matrixStructure(toMatrix(rows))
+            if lower == 0 or upper == 0:
+                assert structure.kind in ("upper", "lower")
+            elif lower + upper >= n - 1:
+                # The band covers the whole matrix.
+                assert structure.kind == "general"
+            else:
+                assert (structure.kind, structure.lower, structure.upper) == \
+                    ("banded", lower, upper)
+            __check_results(rows, rng)
+
+
+def test_special_structures_match_fractions():
+    rng = random.Random(4)
+    for n in (1, 4, 12):
+        diagonal = [[rng.randint(1, 9) * (i == j) for j in range(n)]
+                    for i in range(n)]
+        order = list(range(n))
+        rng.shuffle(order)
+        permutation = [[int(j == order[i]) for j in range(n)]
+                       for i in range(n)]
+        upper = [[rng.randint(-9, 9) if j > i else diagonal[i][j]
+                  for j in range(n)] for i in range(n)]
+        lower = [list(col) for col in zip(*upper)]
+
+        assert matrixStructure(toMatrix(diagonal)).kind == "diagonal"
+        if n > 1:
+            assert matrixStructure(toMatrix(permutation)).kind in \
+                ("permutation", "diagonal")
+            assert matrixStructure(toMatrix(upper)).kind == "upper"
+            assert matrixStructure(toMatrix(lower)).kind == "lower"
+        for rows in (diagonal, permutation, upper, lower):
+            __check_results(rows, rng)
+
+        # A zero on the diagonal makes a triangular matrix singular.
+        upper[n // 2][n // 2] = 0
+        assert matrixDeterminantFraction(toMatrix(upper))[0] == 0
+        assert solve(toMatrix(upper), toMatrix([[1]] * n)) is None
+
+
+def test_sparse_sign_of_the_permutation():
+    # The sparse LU pivots along the permutation; its sign decides the
+    # determinant.
+    rng = random.Random(5)
+    for n in range(2, 9):
+        order = list(range(n))
+        rng.shuffle(order)
+        rows = [[rng.randint(1, 9) * (j == order[i]) for j in range(n)]
+                for i in range(n)]
+        det = matrixFactorization(SparseMatrix.fromMatrix(
+            toMatrix(rows))).determinant()
+        assert Fraction(*det) == determinant(rows)
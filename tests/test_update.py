@@ -0,0 +1,104 @@
+import random
+from fractions import Fraction
+
+from reference import determinant, inverse, product, toFractions, toMatrix
+from src import calculator
+from src.calculator import matrixDeterminantFraction, matrixFactorization, \
+    matrixInverse, solve
+
+
+def __cell(rng, big=False):
+    value = Fraction(rng.randint(-5, 5) * (2 ** 70 if big else 1),
+                     rng.randint(1, 3))
+    return (value.numerator, value.denominator)
+
+
+def __nonsingular(rng, n):
+    while True:
+        rows = [[rng.randint(-9, 9) for j in range(n)] for i in range(n)]
+        if determinant(rows) != 0:
+            return rows
+
+
+def __check_caches(A):
+    """Compare the cached determinant and inverse of A with fractions."""
+    rows = toFractions(A)
+    det = determinant(rows)
+    if A.determinant is not None:
+        assert Fraction(*A.determinant) == det
+    if A.inverse is not None:
+        assert toFractions(A.inverse) == inverse(rows)
+    return det
+
+
+def test_edits_keep_the_caches_current():
+    rng = random.Random(1)
+    for n in range(1, 7):
+        for trial in range(10):
+            A = toMatrix(__nonsingular(rng, n))
+            matrixInverse(A)
+            for step in range(6):
+                kind = rng.choice(["cell", "row", "column"])
+                big = rng.random() < 0.2
+                if kind == "cell":
+                    A.setCell(rng.randrange(n), rng.randrange(n),
+                              __cell(rng, big))
+                elif kind == "row":
+                    A.replaceRow(rng.randrange(n),
+                                 [__cell(rng, big) for j in range(n)])
+                else:
+                    A.replaceColumn(rng.randrange(n),
+                                    [__cell(rng, big) for i in range(n)])
+                det = __check_caches(A)
+                assert Fraction(*matrixDeterminantFraction(A)) == det
+
+
+def test_updates_are_used():
+    # A rank-one edit keeps both caches instead of dropping them.
+    A = toMatrix([[2, 1, 0], [1, 3, 1], [0, 1, 4]])
+    matrixInverse(A)
+    A.setCell(0, 2, (1, 2))
+    assert A.determinant is not None and A.inverse is not None
+    __check_caches(A)
+
+    B = [[1], [2], [3]]
+    X = solve(A, toMatrix(B))
+    assert toFractions(X) == product(inverse(toFractions(A)), B)
+
+
+def test_edit_to_singular_and_back():
+    A = toMatrix([[1, 2], [3, 4]])
+    matrixInverse(A)
+    A.replaceRow(1, [(2, 1), (4, 1)])
+    assert A.determinant == (0, 1)
+    assert A.inverse is None
+
+    A.setCell(1, 1, (5, 1))
+    assert Fraction(*matrixDeterminantFraction(A)) == 1
+    assert toFractions(matrixInverse(A)) == [[5, -2], [-2, 1]]
+
+
+def test_edits_compute_no_new_caches(monkeypatch):
+    # Without a cached inverse an edit must not invert A.
+    def forbidden(*args):
+        raise AssertionError("an edit inverted the matrix")
+
+    rows = [[2, 1, 0], [1, 3, 1], [0, 1, 4]]
+    A = toMatrix(rows)
+    matrixDeterminantFraction(A, "bareiss")
+    monkeypatch.setattr(calculator, "adjugate_determinant", forbidden)
+    A.setCell(0, 0, (5, 1))
+    assert A.inverse is None and A.determinant is None
+
+    # A cached factorization updates the determinant through the lemma.
+    A = toMatrix(rows)
+    matrixFactorization(A)
+    matrixDeterminantFraction(A)
+    for edit in range(2):
+        A.replaceRow(edit, [(edit + 1, 2), (1, 1), (-edit, 1)])
+        assert A.inverse is None
+        assert A.determinant is not None
+        __check_caches(A)
+        matrixFactorization(A)
+    A.replaceColumn(0, [(0, 1), (0, 1), (0, 1)])
+    assert A.determinant == (0, 1)
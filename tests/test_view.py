@@ -0,0 +1,100 @@
+import random
+from fractions import Fraction
+
+from reference import determinant, inverse, product, randomRows, toFractions, \
+    toMatrix, transpose
+from src.calculator import matrixDeterminantFraction, matrixInverse, \
+    matrixMultiplication
+from src.view import minorView, scaledView, sliceView, transposeView
+
+
+def __minor(rows, row, col):
+    return [[x for j, x in enumerate(r) if j != col]
+            for i, r in enumerate(rows) if i != row]
+
+
+def test_views_match_fractions():
+    rng = random.Random(1)
+    rows = randomRows(rng, 6, 5, 20, 0.8, rational=True)
+    A = toMatrix(rows)
+
+    assert toFractions(transposeView(A)) == transpose(rows)
+    assert toFractions(sliceView(A, slice(1, 4), [4, 0])) == \
+        [[row[4], row[0]] for row in rows[1:4]]
+    assert toFractions(minorView(A, 2, 3)) == __minor(rows, 2, 3)
+    assert toFractions(scaledView(A, -3)) == \
+        [[-3 * x for x in row] for row in rows]
+
+    # A view of a view looks straight into the matrix.
+    V = sliceView(transposeView(scaledView(A, 2)), [0, 2], slice(None, None,
+                                                                  2))
+    expected = [[2 * x for x in row[::2]] for row in transpose(rows)[0:3:2]]
+    assert toFractions(V) == expected
+    assert V.matrix is A
+    assert toFractions(V.toMatrix()) == expected
+
+
+def test_calculator_functions_accept_views():
+    rng = random.Random(2)
+    rows = randomRows(rng, 6, 6, 10, rational=True)
+    A = toMatrix(rows)
+    for i in range(6):
+        minor = __minor(rows, i, (i + 1) % 6)
+        det = matrixDeterminantFraction(minorView(A, i, (i + 1) % 6))
+        assert Fraction(*det) == determinant(minor)
+
+    T = transposeView(A)
+    assert toFractions(matrixMultiplication(T, A)) == \
+        product(transpose(rows), rows)
+    if determinant(rows) != 0:
+        assert toFractions(matrixInverse(T)) == inverse(transpose(rows))
+
+
+def test_edits_show_through_and_drop_caches():
+    A = toMatrix([[1, 2, 3], [4, 5, 6], [7, 8, 10]])
+    V = minorView(A, 0, 0)
+    assert matrixDeterminantFraction(V) == (2, 1)
+    A.setCell(2, 2, (11, 1))
+    assert toFractions(V) == [[5, 6], [8, 11]]
+    assert matrixDeterminantFraction(V) == (7, 1)
+    A.multiplyScalar(2)
+    assert matrixDeterminantFraction(V) == (28, 1)
+
+
+def test_view_operators():
+    rng = random.Random(3)
+    rows = randomRows(rng, 4, 4, 8, rational=True)
+    other = randomRows(rng, 3, 4, 8, rational=True)
+    A = toMatrix(rows)
+    B = toMatrix(other)
+    V = sliceView(A, [0, 1, 3])
+    W = transposeView(sliceView(A, [0, 2]))
+    v = rows[:2] + rows[3:]
+    w = transpose([rows[0], rows[2]])
+
+    def combine(X, Y, a, b):
+        return [[a * x + b * y for x, y in zip(rowX, rowY)]
+                for rowX, rowY in zip(X, Y)]
+
+    assert toFractions((V + B).evaluate()) == combine(v, other, 1, 1)
+    assert toFractions((B - V).evaluate()) == combine(other, v, 1, -1)
+    assert toFractions((-V).evaluate()) == combine(v, v, -1, 0)
+    assert toFractions((V * (1, 2)).evaluate()) == \
+        combine(v, v, Fraction(1, 2), 0)
+    assert toFractions((3 * V).evaluate()) == combine(v, v, 3, 0)
+    assert toFractions(V.T.evaluate()) == transpose(v)
+    assert toFractions((V @ W).evaluate()) == product(v, w)
+    assert toFractions((V * W).evaluate()) == product(v, w)
+    assert toFractions((B.T @ V).evaluate()) == product(transpose(other), v)
+    assert toFractions((W.T @ V.T - 2 * W.T @ B.T).evaluate()) == \
+        combine(product(transpose(w), transpose(v)),
+                product(transpose(w), transpose(other)), 1, -2)
+
+
+def test_view_operators_with_floats():
+    A = toMatrix([[1, 2], [3, 4]])
+    A.multiplyScalar(0.5)
+    V = transposeView(A)
+    result = (V + V).evaluate().getRowArray()
+    assert [[x[0] / x[1] for x in row] for row in result] == \
+        [[1.0, 3.0], [2.0, 4.0]]
@@ -0,0 +1,70 @@
+import io
+import random
+from fractions import Fraction
+
+import pytest
+
+from reference import randomRows, toFractions, toMatrix
+from src import writer
+from src.SparseMatrix import SparseMatrix
+from src.reader import loadMatrix, readMatrix
+from src.writer import saveMatrix, writeMatrix
+
+
+def __write(A, format, digits=6):
+    stream = io.StringIO()
+    writeMatrix(A, stream, format, digits)
+    return stream.getvalue()
+
+
+def test_exact_and_csv_read_back():
+    rng = random.Random(1)
+    for bits in (4, 100):
+        rows = randomRows(rng, 7, 5, bits, 0.7, rational=True)
+        A = toMatrix(rows)
+        for format in ("exact", "csv"):
+            text = __write(A, format)
+            readFormat = "csv" if format == "csv" else "text"
+            B = readMatrix(io.StringIO(text), readFormat)
+            assert toFractions(B) == rows
+        assert toFractions(readMatrix(io.StringIO(__write(
+            SparseMatrix.fromMatrix(A), "exact")))) == rows
+
+
+def __rounded(x, digits):
+    """Round a Fraction half away from zero to digits decimals."""
+    unit = 10 ** digits
+    scaled = (2 * abs(x) * unit + 1) // 2
+    return Fraction(scaled if x >= 0 else -scaled, unit)
+
+
+def test_decimals_round_half_away_from_zero():
+    rng = random.Random(2)
+    rows = randomRows(rng, 6, 6, 40, rational=True)
+    rows[0][:4] = [Fraction(1, 8), Fraction(-1, 8), Fraction(-1, 10 ** 9),
+                   Fraction(10 ** 40 + 1, 3)]
+    for digits in (0, 2, 6):
+        lines = __write(toMatrix(rows), "decimal", digits).splitlines()
+        for row, line in zip(rows, lines):
+            for x, text in zip(row, line.split()):
+                expected = __rounded(x, digits)
+                assert Fraction(text) == expected
+                assert len(text.partition(".")[2]) == digits
+                if expected == 0:
+                    assert not text.startswith("-")
+
+
+def test_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(writer, "CHUNK_SIZE", 16)
+    rng = random.Random(3)
+    rows = randomRows(rng, 40, 8, 20, rational=True)
+    path = str(tmp_path / "a.csv")
+    saveMatrix(toMatrix(rows), path)
+    assert toFractions(loadMatrix(path)) == rows
+
+
+def test_unknown_format(tmp_path):
+    path = tmp_path / "b.txt"
+    with pytest.raises(ValueError):
+        saveMatrix(toMatrix([[1]]), str(path), "xml")
+    assert not path.exists()